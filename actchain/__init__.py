@@ -1,18 +1,45 @@
-from . import exceptions
-from .apis import run
+from . import (
+    channel,
+    clock,
+    eventlog,
+    exceptions,
+    executor,
+    limiter,
+    metrics,
+    shm,
+    tracing,
+)
+from .apis import EventLoopType, eager_tasks_available, new_event_loop, run, run_sync
 from .chains import (
     AccompanyChain,
+    BatchFunctionChain,
+    BroadcastChain,
     Chain,
     ConcurrentFunctionChain,
+    DebounceChain,
     ExclusiveFunctionChain,
     Flow,
     FunctionChain,
+    FusedFunctionChain,
     IntervalSamplingChain,
     JunctionChain,
+    JunctionSnapshot,
     LoopChain,
+    OverflowPolicy,
     PassThroughChain,
+    ProcessFlow,
+    ProcessFunctionChain,
+    RecorderChain,
+    SampleChain,
+    ShmBroadcastChain,
+    SlowConsumerPolicy,
+    ThrottleChain,
+    WindowChain,
 )
+from .channel import BroadcastRing, Channel
 from .event import Event
 from .function import Function
-from .loop import Loop
+from .limiter import AIMDLimiter, FixedLimiter, GradientLimiter, Limiter
+from .loop import Loop, ReplayLoop, ShmBroadcastLoop
+from .payload import LayeredData
 from .singleton import State
@@ -1,11 +1,63 @@
+from __future__ import annotations
+
 import asyncio
+import gc
+import sys
+from enum import StrEnum
+from typing import Any, Coroutine, Literal
 
 from actchain.chains import Flow
 from actchain.chains.base import Chainable
 
 
-async def run(*chainables: Chainable, run_forever: bool = False) -> None:
-    coro = []
+class EventLoopType(StrEnum):
+    """Event loop implementation `run_sync` runs chainables on."""
+
+    # uvloop if it is installed, the asyncio event loop otherwise
+    AUTO = "auto"
+    ASYNCIO = "asyncio"
+    UVLOOP = "uvloop"
+
+
+def new_event_loop(
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto",
+) -> asyncio.AbstractEventLoop:
+    """Create a new event loop of the implementation `loop`.
+
+    Raises:
+        ImportError: If `loop` is "uvloop" and uvloop is not installed.
+    """
+    loop_type = EventLoopType(loop)
+    if loop_type != EventLoopType.ASYNCIO:
+        try:
+            import uvloop
+        except ImportError:
+            if loop_type == EventLoopType.UVLOOP:
+                raise
+        else:
+            return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def eager_tasks_available() -> bool:
+    """Return whether eager task execution is available (Python 3.12 or later)."""
+    return sys.version_info >= (3, 12)
+
+
+async def run(
+    *chainables: Chainable, run_forever: bool = False, eager_tasks: bool = False
+) -> None:
+    """Run chainables on the running event loop until they finish.
+
+    Args:
+        chainables (Chainable): Chainables to run. Flows are frozen before running.
+        run_forever (bool): Restart chainables that stopped with an error.
+        eager_tasks (bool): Start tasks eagerly while running: a task runs until its
+            first suspension when it is created, so the short-lived tasks of
+            ConcurrentFunctionChain and ExclusiveFunctionChain that finish without
+            suspending are never scheduled. Ignored before Python 3.12.
+    """
+    coro: list[Coroutine[Any, Any, None]] = []
     for chainable in chainables:
         if isinstance(chainable, Flow) and not chainable.is_frozen:
             chainable.freeze()
@@ -14,4 +66,66 @@ async def run(*chainables: Chainable, run_forever: bool = False) -> None:
             coro.append(chainable.run_forever())
         else:
             coro.append(chainable.run())
-    await asyncio.gather(*coro)
+
+    if not (eager_tasks and eager_tasks_available()):
+        await _gather(coro)
+        return
+    loop = asyncio.get_running_loop()
+    task_factory = loop.get_task_factory()
+    loop.set_task_factory(asyncio.eager_task_factory)  # type: ignore[attr-defined]
+    try:
+        await _gather(coro)
+    finally:
+        loop.set_task_factory(task_factory)
+
+
+async def _gather(coro: list[Coroutine[Any, Any, None]]) -> None:
+    tasks = [asyncio.ensure_future(c) for c in coro]
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        # gatherは最初にキャンセルされたものだけで終わるので、後片付けを待つ
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def run_sync(
+    *chainables: Chainable,
+    run_forever: bool = False,
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto",
+    eager_tasks: bool = True,
+    gc_freeze: bool = True,
+    gc_threshold: tuple[int, int, int] | None = None,
+) -> None:
+    """Run chainables on a new event loop until they finish, like asyncio.run.
+
+    Args:
+        chainables (Chainable): Chainables to run. Flows are frozen before running.
+        run_forever (bool): Restart chainables that stopped with an error.
+        loop (str): Event loop implementation, "asyncio", "uvloop", or "auto" for
+            uvloop if it is installed.
+        eager_tasks (bool): Start tasks eagerly. See `run`.
+        gc_freeze (bool): Move the objects alive at startup, such as modules and the
+            chainables, to the permanent generation of the garbage collector, so
+            that collections while running do not traverse them.
+        gc_threshold (tuple[int, int, int], optional): Thresholds of the garbage
+            collector while running (see gc.set_threshold). Higher thresholds make
+            collections, and the pauses they cause, less frequent.
+    """
+    threshold = gc.get_threshold()
+    if gc_threshold is not None:
+        gc.set_threshold(*gc_threshold)
+    if gc_freeze:
+        gc.collect()
+        gc.freeze()
+    try:
+        with asyncio.Runner(loop_factory=lambda: new_event_loop(loop)) as runner:
+            runner.run(
+                run(*chainables, run_forever=run_forever, eager_tasks=eager_tasks)
+            )
+    finally:
+        if gc_freeze:
+            gc.unfreeze()
+        gc.set_threshold(*threshold)
@@ -0,0 +1,2 @@
+from . import cases
+from .suite import Metric, Regression, benchmark, benchmarks, compare, load, run, save
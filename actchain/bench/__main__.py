@@ -0,0 +1,63 @@
+"""Run the benchmark suite of the chain runtime.
+
+    python -m actchain.bench [-n 2000] [-o results.json] [--baseline base.json]
+        [--threshold 0.1] [--loop asyncio] [--eager-tasks] [--gc-freeze] [names ...]
+
+Exits with status 1 if a metric regressed from the baseline beyond the threshold.
+"""
+from __future__ import annotations
+
+import sys
+from argparse import ArgumentParser
+
+from actchain import bench
+from actchain.bench import Metric
+
+
+def _print_result(name: str, metrics: dict[str, Metric]) -> None:
+    for key, metric in metrics.items():
+        print(f"{name + '.' + key:<40} {metric.value:>14,.2f} {metric.unit}")
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m actchain.bench")
+    parser.add_argument("names", nargs="*", help=f"from {bench.benchmarks()}")
+    parser.add_argument("-n", type=int, default=2000, help="iterations")
+    parser.add_argument("-o", "--output", help="JSON file to write the results to")
+    parser.add_argument(
+        "--loop", choices=["auto", "asyncio", "uvloop"], default="asyncio"
+    )
+    parser.add_argument("--eager-tasks", action="store_true")
+    parser.add_argument("--gc-freeze", action="store_true")
+    parser.add_argument("--baseline", help="JSON file of results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="tolerated relative regression"
+    )
+    args = parser.parse_args()
+
+    report = bench.run(
+        args.names or None,
+        n=args.n,
+        loop=args.loop,
+        eager_tasks=args.eager_tasks,
+        gc_freeze=args.gc_freeze,
+        on_result=_print_result,
+    )
+    if args.output:
+        bench.save(report, args.output)
+    if args.baseline is None:
+        return 0
+
+    regressions = bench.compare(
+        bench.load(args.baseline), report, threshold=args.threshold
+    )
+    for r in regressions:
+        print(
+            f"REGRESSION {r.name}: {r.baseline:,.2f} -> {r.current:,.2f} {r.unit} "
+            f"({r.change:+.1%})"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
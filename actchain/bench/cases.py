@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import importlib.util
+import itertools
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import actchain
+from actchain.apis import eager_tasks_available, new_event_loop
+from actchain.bench.suite import Metric, _with_eager_tasks, benchmark, percentile_us
+from actchain.chains.base import Chainable
+from actchain.channel import Channel
+
+
+def _identity(event: actchain.Event) -> Any:
+    return event.data
+
+
+class _Sink:
+    """Sink chains counting the events arriving at them."""
+
+    def __init__(self) -> None:
+        self._done = asyncio.Event()
+        self._remaining = 0
+
+    def chain(self, name: str = "sink") -> actchain.PassThroughChain:
+        return actchain.PassThroughChain(name, on_handle_cb=self._arrive)
+
+    def expect(self, arrivals: int) -> None:
+        self._done.clear()
+        self._remaining = arrivals
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+    def _arrive(self, event: actchain.Event) -> None:
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._done.set()
+
+
+async def _latencies(
+    sink: _Sink,
+    chainables: list[Chainable],
+    trigger: Callable[[int], None],
+    n: int,
+    arrivals: int = 1,
+) -> list[int]:
+    """Run `chainables` and return the latencies of `n` rounds in nanoseconds.
+
+    Each round calls `trigger` and waits until the sinks received `arrivals` events.
+    """
+    tasks = [asyncio.create_task(c.run()) for c in chainables]
+    try:
+        latencies = []
+        for i in range(n):
+            sink.expect(arrivals)
+            start = time.perf_counter_ns()
+            trigger(i)
+            await sink.wait()
+            latencies.append(time.perf_counter_ns() - start)
+        return latencies
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _latency_metrics(latencies: list[int]) -> dict[str, Metric]:
+    return {
+        "p50_us": Metric(percentile_us(latencies, 0.5), "us"),
+        "p99_us": Metric(percentile_us(latencies, 0.99), "us"),
+    }
+
+
+@benchmark("hop")
+async def hop(n: int) -> dict[str, Metric]:
+    """Cost of one hop: `emit` to the next chain and `next` on it, and a hop between
+    running chains."""
+    source = actchain.PassThroughChain("source")
+    target = actchain.PassThroughChain("target")
+    source.chain(target)
+    data = {"n": 0}
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        source.emit(data)
+        await target.next()
+    raw = (time.perf_counter_ns() - start) / n
+
+    relay = actchain.PassThroughChain("relay")
+    sink = _Sink()
+    sink_chain = sink.chain()
+    relay.chain(sink_chain)
+    latencies = await _latencies(
+        sink,
+        [relay, sink_chain],
+        lambda i: relay.trigger(relay.to_event({"n": i})),
+        n,
+    )
+    return {
+        "emit_next_ns": Metric(raw, "ns"),
+        **_latency_metrics(latencies),
+    }
+
+
+@benchmark("flow_depth")
+async def flow_depth(n: int) -> dict[str, Metric]:
+    """End-to-end latency of linear flows of FunctionChains by depth."""
+    metrics: dict[str, Metric] = {}
+    for depth in (1, 10, 50):
+        flow = actchain.Flow("flow")
+        for i in range(depth):
+            flow.add(actchain.Function(_identity).as_chain(f"stage{i}"))
+        sink = _Sink()
+        sink_chain = sink.chain()
+        flow.chain(sink_chain)
+        latencies = await _latencies(
+            sink,
+            [flow, sink_chain],
+            lambda i: flow.trigger(actchain.Event("source", {"n": i})),
+            max(n // depth, 10),
+        )
+        metrics[f"{depth}.p50_us"] = Metric(percentile_us(latencies, 0.5), "us")
+    return metrics
+
+
+async def _put_get(queue: Any, n: int) -> float:
+    """Return nanoseconds per put and get of an item already queued."""
+    put = queue.put if isinstance(queue, Channel) else queue.put_nowait
+    start = time.perf_counter_ns()
+    for i in range(n):
+        put(i)
+        await queue.get()
+    return (time.perf_counter_ns() - start) / n
+
+
+async def _handoff(queue: Any, n: int) -> float:
+    """Return nanoseconds per item passed to a consumer waiting for it."""
+    put = queue.put if isinstance(queue, Channel) else queue.put_nowait
+    done = asyncio.Event()
+
+    async def consume() -> None:
+        for _ in range(n):
+            await queue.get()
+            done.set()
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    start = time.perf_counter_ns()
+    for i in range(n):
+        done.clear()
+        put(i)
+        await done.wait()
+    elapsed = time.perf_counter_ns() - start
+    await consumer
+    return elapsed / n
+
+
+@benchmark("channel")
+async def channel(n: int) -> dict[str, Metric]:
+    """Cost of Channel, the input of chains, and of asyncio.Queue it replaced: a put
+    followed by a get without waiting, and a handoff to a waiting consumer."""
+    metrics: dict[str, Metric] = {}
+    factories: dict[str, Callable[[], Any]] = {
+        "channel": Channel,
+        "asyncio_queue": asyncio.Queue,
+    }
+    for name, factory in factories.items():
+        metrics[f"{name}.put_get_ns"] = Metric(await _put_get(factory(), n * 10), "ns")
+        metrics[f"{name}.handoff_ns"] = Metric(
+            await _handoff(factory(), max(n, 10)), "ns"
+        )
+    return metrics
+
+
+@benchmark("fanout")
+async def fanout(n: int) -> dict[str, Metric]:
+    """Latency until an event emitted to N chains reaches all of them."""
+    metrics: dict[str, Metric] = {}
+    for width in (1, 10, 100):
+        source = actchain.PassThroughChain("source")
+        sink = _Sink()
+        children = [sink.chain(f"sink{i}") for i in range(width)]
+        for child in children:
+            source.chain(child)
+        latencies = await _latencies(
+            sink,
+            list(children),
+            lambda i: source.emit({"n": i}),
+            max(n // width, 10),
+            arrivals=width,
+        )
+        metrics[f"{width}.p50_us"] = Metric(percentile_us(latencies, 0.5), "us")
+    return metrics
+
+
+@benchmark("fanout_broadcast")
+async def fanout_broadcast(n: int) -> dict[str, Metric]:
+    """Cost of `emit` to N chains, queued to each of them or written once to the
+    ring of a BroadcastChain, and the latency until a broadcast reaches all of them."""
+    metrics: dict[str, Metric] = {}
+    for width in (1, 10, 100):
+        for kind in ("queue", "broadcast"):
+            source: actchain.Chain = (
+                actchain.BroadcastChain("source", capacity=64)
+                if kind == "broadcast"
+                else actchain.PassThroughChain("source")
+            )
+            children = [actchain.PassThroughChain(f"c{i}") for i in range(width)]
+            for child in children:
+                source.chain(child)
+            data = {"n": 0}
+            elapsed = 0
+            rounds = max(n // 64, 1)
+            for _ in range(rounds):
+                start = time.perf_counter_ns()
+                for _ in range(64):
+                    source.emit(data)
+                elapsed += time.perf_counter_ns() - start
+                for child in children:
+                    child.drain()
+            metrics[f"{kind}.{width}.emit_ns"] = Metric(elapsed / (rounds * 64), "ns")
+
+        broadcast = actchain.BroadcastChain("source")
+        sink = _Sink()
+        sinks = [sink.chain(f"sink{i}") for i in range(width)]
+        for sink_chain in sinks:
+            broadcast.chain(sink_chain)
+        latencies = await _latencies(
+            sink,
+            list(sinks),
+            lambda i: broadcast.emit({"n": i}),
+            max(n // width, 10),
+            arrivals=width,
+        )
+        metrics[f"broadcast.{width}.p50_us"] = Metric(
+            percentile_us(latencies, 0.5), "us"
+        )
+    return metrics
+
+
+@benchmark("fanin_junction")
+async def fanin_junction(n: int) -> dict[str, Metric]:
+    """Latency of a round of N inputs through a JunctionChain."""
+    metrics: dict[str, Metric] = {}
+    for width in (2, 10, 100):
+        sources = [actchain.PassThroughChain(f"source{i}") for i in range(width)]
+        junction = actchain.JunctionChain("junction", mode="all")
+        for source in sources:
+            source.chain(junction)
+        sink = _Sink()
+        sink_chain = sink.chain()
+        junction.chain(sink_chain)
+        for source in sources:
+            source.emit({"n": -1})
+
+        def emit_all(i: int) -> None:
+            for source in sources:
+                source.emit({"n": i})
+
+        latencies = await _latencies(
+            sink, [junction, sink_chain], emit_all, max(n // width, 10), arrivals=width
+        )
+        # 準備のために流したイベントは最初のラウンドで受け取られる
+        metrics[f"{width}.p50_us"] = Metric(percentile_us(latencies[1:], 0.5), "us")
+    return metrics
+
+
+@benchmark("fanin_accompany")
+async def fanin_accompany(n: int) -> dict[str, Metric]:
+    """Latency through a sequence of N AccompanyChains."""
+    metrics: dict[str, Metric] = {}
+    for width in (1, 5, 20):
+        relay = actchain.PassThroughChain("relay")
+        prev: Chainable = relay
+        chains: list[Chainable] = [relay]
+        for i in range(width):
+            accompanied = actchain.PassThroughChain(f"accompanied{i}")
+            accompanied.emit({f"v{i}": i})
+            accompany = actchain.AccompanyChain(f"accompany{i}", accompanied)
+            prev.chain(accompany)
+            chains.append(accompany)
+            prev = accompany
+        sink = _Sink()
+        sink_chain = sink.chain()
+        prev.chain(sink_chain)
+        latencies = await _latencies(
+            sink,
+            [*chains, sink_chain],
+            lambda i: relay.trigger(relay.to_event({"n": i})),
+            max(n // width, 10),
+        )
+        metrics[f"{width}.p50_us"] = Metric(percentile_us(latencies, 0.5), "us")
+    return metrics
+
+
+async def _burst(chain: actchain.Chain, arrivals: int, size: int, rounds: int) -> float:
+    """Return events per second handled in bursts of `size` events."""
+    sink = _Sink()
+    sink_chain = sink.chain()
+    chain.chain(sink_chain)
+
+    def trigger_burst(_: int) -> None:
+        for i in range(size):
+            chain.trigger(chain.to_event({"n": i}))
+
+    latencies = await _latencies(
+        sink, [chain, sink_chain], trigger_burst, rounds, arrivals=arrivals
+    )
+    return size * rounds / (sum(latencies) / 1e9)
+
+
+async def _io(event: actchain.Event) -> Any:
+    await asyncio.sleep(0)
+    return event.data
+
+
+@benchmark("burst")
+async def burst(n: int) -> dict[str, Metric]:
+    """Throughput of ConcurrentFunctionChain and ExclusiveFunctionChain receiving
+    bursts of 100 events of an async function."""
+    size = 100
+    rounds = max(n // size, 5)
+    concurrent: actchain.Chain = actchain.Function(_io).as_chain(
+        "concurrent", chain_type="concurrent", max_concurrency=32
+    )
+    exclusive: actchain.Chain = actchain.Function(_io).as_chain(
+        "exclusive", chain_type="exclusive", mode="latest"
+    )
+    return {
+        "concurrent.events_per_s": Metric(
+            await _burst(concurrent, size, size, rounds), "events/s", False
+        ),
+        # latestは最初と最後のイベントだけを処理する
+        "exclusive.events_per_s": Metric(
+            await _burst(exclusive, 2, size, rounds), "events/s", False
+        ),
+    }
+
+
+@benchmark("memory")
+async def memory(n: int) -> dict[str, Metric]:
+    """Memory allocated per chainable."""
+    count = max(n // 2, 100)
+    metrics: dict[str, Metric] = {}
+    factories: dict[str, Callable[[int], Any]] = {
+        "function": lambda i: actchain.Function(_identity).as_chain(f"c{i}"),
+        "pass_through": lambda i: actchain.PassThroughChain(f"c{i}"),
+        "junction": lambda i: actchain.JunctionChain(f"c{i}"),
+    }
+    for name, factory in factories.items():
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        chains = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        metrics[f"{name}.bytes"] = Metric((after - before) / len(chains), "bytes")
+    return metrics
+
+
+@benchmark("run_options")
+async def run_options(n: int) -> dict[str, Metric]:
+    """Hop latency and burst throughput under each option of `actchain.run_sync`: the
+    event loop implementation, eager tasks and freezing the heap. Options that are
+    not available (uvloop not installed, eager tasks before Python 3.12) are
+    skipped."""
+    loops: list[Any] = ["asyncio"]
+    if importlib.util.find_spec("uvloop") is not None:
+        loops.append("uvloop")
+    eager = [False, True] if eager_tasks_available() else [False]
+    metrics: dict[str, Metric] = {}
+    for loop, eager_tasks, gc_freeze in itertools.product(loops, eager, [False, True]):
+        label = "+".join(
+            [loop]
+            + (["eager"] if eager_tasks else [])
+            + (["gc_freeze"] if gc_freeze else [])
+        )
+        # 実行中のループの中では別のループを回せないので、スレッドで回す
+        variant = await asyncio.to_thread(_run_variant, n, loop, eager_tasks, gc_freeze)
+        for key, metric in variant.items():
+            metrics[f"{label}.{key}"] = metric
+    return metrics
+
+
+def _run_variant(
+    n: int, loop: Any, eager_tasks: bool, gc_freeze: bool
+) -> dict[str, Metric]:
+    if gc_freeze:
+        gc.collect()
+        gc.freeze()
+    try:
+        with asyncio.Runner(loop_factory=lambda: new_event_loop(loop)) as runner:
+            return runner.run(_with_eager_tasks(_variant_metrics(n), eager_tasks))
+    finally:
+        if gc_freeze:
+            gc.unfreeze()
+
+
+async def _variant_metrics(n: int) -> dict[str, Metric]:
+    hop_metrics = await hop(n)
+    burst_metrics = await burst(n)
+    return {
+        "hop.p50_us": hop_metrics["p50_us"],
+        "burst.concurrent.events_per_s": burst_metrics["concurrent.events_per_s"],
+        "burst.exclusive.events_per_s": burst_metrics["exclusive.events_per_s"],
+    }
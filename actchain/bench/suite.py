@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import json
+import platform
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Iterable, Literal
+
+from actchain.apis import eager_tasks_available, new_event_loop
+
+_BenchmarkFn = Callable[[int], Coroutine[Any, Any, dict[str, "Metric"]]]
+_benchmarks: dict[str, _BenchmarkFn] = {}
+
+
+@dataclass(slots=True)
+class Metric:
+    """Metric is a measured value of a benchmark.
+
+    Args:
+        value (float): Measured value.
+        unit (str): Unit of the value.
+        lower_is_better (bool): Whether a lower value is an improvement.
+    """
+
+    value: float
+    unit: str
+    lower_is_better: bool = True
+
+
+@dataclass(slots=True)
+class Regression:
+    """Regression is a metric that got worse than the baseline beyond the threshold."""
+
+    name: str
+    baseline: float
+    current: float
+    unit: str
+
+    @property
+    def change(self) -> float:
+        """Relative change from the baseline."""
+        return self.current / self.baseline - 1
+
+
+def benchmark(name: str) -> Callable[[_BenchmarkFn], _BenchmarkFn]:
+    """Register a benchmark.
+
+    The benchmark is a coroutine function taking the number of iterations and
+    returning its metrics keyed by name.
+    """
+
+    def decorator(fn: _BenchmarkFn) -> _BenchmarkFn:
+        if name in _benchmarks:
+            raise ValueError(f"benchmark {name} is already registered")
+        _benchmarks[name] = fn
+        return fn
+
+    return decorator
+
+
+def benchmarks() -> list[str]:
+    """Return the names of the registered benchmarks."""
+    return list(_benchmarks)
+
+
+def percentile_us(samples_ns: list[int], q: float) -> float:
+    """Return the `q` quantile (0-1) of nanosecond samples in microseconds."""
+    ordered = sorted(samples_ns)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] / 1e3
+
+
+def run(
+    names: Iterable[str] | None = None,
+    *,
+    n: int = 2000,
+    loop: Literal["auto", "asyncio", "uvloop"] = "asyncio",
+    eager_tasks: bool = False,
+    gc_freeze: bool = False,
+    on_result: Callable[[str, dict[str, Metric]], None] | None = None,
+) -> dict[str, Any]:
+    """Run benchmarks, each on a fresh event loop, and return the report.
+
+    Args:
+        names (Iterable[str], optional): Benchmarks to run. All by default.
+        n (int): Number of iterations of each benchmark.
+        loop (str): Event loop implementation. See `actchain.run_sync`.
+        eager_tasks (bool): Start tasks eagerly. See `actchain.run`.
+        gc_freeze (bool): Freeze the heap before each benchmark. See
+            `actchain.run_sync`.
+        on_result (Callable, optional): Called with the name and the metrics of each
+            benchmark when it finishes.
+    """
+    selected = list(_benchmarks) if names is None else list(names)
+    unknown = [name for name in selected if name not in _benchmarks]
+    if unknown:
+        raise ValueError(f"unknown benchmarks: {unknown}")
+    results: dict[str, dict[str, Any]] = {}
+    for name in selected:
+        if gc_freeze:
+            gc.collect()
+            gc.freeze()
+        try:
+            with asyncio.Runner(loop_factory=lambda: new_event_loop(loop)) as runner:
+                metrics = runner.run(
+                    _with_eager_tasks(_benchmarks[name](n), eager_tasks)
+                )
+        finally:
+            if gc_freeze:
+                gc.unfreeze()
+        if on_result is not None:
+            on_result(name, metrics)
+        for key, metric in metrics.items():
+            results[f"{name}.{key}"] = asdict(metric)
+    meta = _meta(n)
+    meta["config"] = {
+        "loop": _loop_name(loop),
+        "eager_tasks": eager_tasks and eager_tasks_available(),
+        "gc_freeze": gc_freeze,
+    }
+    return {"meta": meta, "results": results}
+
+
+def _loop_name(loop: Literal["auto", "asyncio", "uvloop"]) -> str:
+    """Return the name of the event loop implementation `loop` resolves to."""
+    event_loop = new_event_loop(loop)
+    event_loop.close()
+    return type(event_loop).__module__.split(".")[0]
+
+
+async def _with_eager_tasks(
+    coro: Coroutine[Any, Any, dict[str, Metric]], eager_tasks: bool
+) -> dict[str, Metric]:
+    if eager_tasks and eager_tasks_available():
+        loop = asyncio.get_running_loop()
+        loop.set_task_factory(asyncio.eager_task_factory)  # type: ignore[attr-defined]
+    return await coro
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], *, threshold: float = 0.1
+) -> list[Regression]:
+    """Return the metrics of `current` worse than `baseline` by more than `threshold`.
+
+    Metrics missing from either report are ignored.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["value"] <= 0:
+            continue
+        ratio = result["value"] / base["value"]
+        worse = ratio - 1 if result["lower_is_better"] else 1 - ratio
+        if worse > threshold:
+            regressions.append(
+                Regression(name, base["value"], result["value"], result["unit"])
+            )
+    return regressions
+
+
+def save(report: dict[str, Any], path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load(path: str | Path) -> dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def _meta(n: int) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "n": n,
+    }
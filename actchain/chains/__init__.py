@@ -1,7 +1,24 @@
-from .base import Chain
+from .base import Chain, OverflowPolicy
+from .broadcast import BroadcastChain, SlowConsumerPolicy
 from .flow import Flow
-from .function import ConcurrentFunctionChain, ExclusiveFunctionChain, FunctionChain
-from .junction import AccompanyChain, JunctionChain
+from .function import (
+    BatchFunctionChain,
+    ConcurrentFunctionChain,
+    ExclusiveFunctionChain,
+    FunctionChain,
+)
+from .fused import FusedFunctionChain
+from .junction import AccompanyChain, JunctionChain, JunctionSnapshot
 from .loop import LoopChain
 from .pass_through import PassThroughChain
-from .sampling import IntervalSamplingChain
+from .process import ProcessFunctionChain
+from .process_flow import ProcessFlow
+from .recorder import RecorderChain
+from .sampling import (
+    DebounceChain,
+    IntervalSamplingChain,
+    SampleChain,
+    ThrottleChain,
+)
+from .shm import ShmBroadcastChain
+from .window import WindowChain
@@ -3,13 +3,27 @@ from __future__ import annotations
 import asyncio
 import uuid
 from abc import ABCMeta, abstractmethod
+from contextvars import ContextVar
 from enum import StrEnum
-from typing import Any, Callable, Generic, Type, overload
+from typing import Any, Callable, Generic, Literal, Type, overload
 
 from loguru import logger
 
+from actchain import clock, tracing
+from actchain.channel import Channel
 from actchain.event import Event, TDefaultEventData, TReceiveEventData, TSendEventData
-from actchain.exceptions import ChainableAlreadyRunningError, EventHandleError
+from actchain.exceptions import (
+    ChainableAlreadyRunningError,
+    EventHandleError,
+    QueueOverflowError,
+)
+from actchain.metrics import ChainMetrics
+
+# 処理中のイベント。emitされるイベントのparentになる
+# （タスクやコールバックにはcontextごとコピーされるのでConcurrent系でも辿れる）
+_current_event: ContextVar[Event | None] = ContextVar(
+    "actchain_current_event", default=None
+)
 
 
 class ChainableStatus(StrEnum):
@@ -18,6 +32,19 @@ class ChainableStatus(StrEnum):
     ERROR = "error"
 
 
+class OverflowPolicy(StrEnum):
+    """What a chainable does with an event that arrives while its queue is full."""
+
+    # the producer waits until the queue has room
+    BLOCK = "block"
+    # the arriving event is discarded
+    DROP_NEWEST = "drop_newest"
+    # the oldest queued event is discarded to make room
+    DROP_OLDEST = "drop_oldest"
+    # QueueOverflowError is raised to the producer
+    RAISE = "raise"
+
+
 class Connection:
     def __init__(self):
         self._parents: list[Chainable] = []
@@ -46,6 +73,9 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
 
     Args:
         name (str): Name of the chainable object.
+        maxsize (int, optional): Maximum number of queued events. 0 means unbounded.
+        overflow (str, optional): Overflow policy applied when the queue is full.
+            "block", "drop_newest", "drop_oldest" or "raise". Defaults to "block".
 
     Attributes:
         name (str): Name of the chainable object.
@@ -64,6 +94,8 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
         *,
         type_receive: Type[TReceiveEventData] | None = None,
         type_send: Type[TSendEventData] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
     ) -> None:
         ...
 
@@ -73,17 +105,33 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
         *,
         type_receive: Type[TReceiveEventData] | None = None,
         type_send: Type[TSendEventData] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
     ):
         self._name = name or str(uuid.uuid4())
-        self._queue: asyncio.Queue = asyncio.Queue()
+        # maxsizeはtriggerで自前で判定する（Channel側は常に無制限）
+        self._channel: Channel[Event[TReceiveEventData]] = Channel()
+        self._maxsize = 0
+        self._overflow = OverflowPolicy.BLOCK
+        self._queue_configured = False
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._overflow_counts: dict[OverflowPolicy, int] = {
+            p: 0 for p in OverflowPolicy
+        }
         self._connection = Connection()
         self._last_emit_event: Event[TSendEventData] | None = None
         self._last_trigger_event: Event[TReceiveEventData] | None = None
         self._status = ChainableStatus.STOPPING
+        self._seq = 0
+        self._metrics = ChainMetrics()
 
         self._type_receive = type_receive | dict
         self._type_send = type_send | dict
 
+        if maxsize is not None or overflow is not None:
+            self.configure_queue(maxsize=maxsize, overflow=overflow)
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self._name})"
 
@@ -126,16 +174,17 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
             await _run()  # type: ignore
             self._status = ChainableStatus.ERROR
             logger.error(f"Chain {self._name} is down, restarting...")
-            await asyncio.sleep(cooldown)
+            await clock.sleep(cooldown)
 
             if clear_queue:
-                while self._queue.qsize() > 0:
-                    await self._queue.get()
+                self._clear_queue()
 
     def emit(self, data: TSendEventData) -> None:
         """Emit an event to the next chainable objects."""
         event = self.to_event(data)
         self._last_emit_event = event
+        if self._metrics.enabled:
+            self._metrics.emitted += 1
         for c in self.next_chains:
             c.trigger(event)
 
@@ -144,8 +193,60 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
         if not isinstance(event, Event):
             raise TypeError(f"event must be an instance of Event, not {type(event)}")
 
+        if event.ts == 0:
+            # 直接作られたイベントは最初にtriggerされた時刻を持つ
+            event.ts = clock.monotonic_ns()
         self._last_trigger_event = event
-        self._queue.put_nowait(event)
+        metrics = self._metrics
+        if metrics.enabled:
+            metrics.received += 1
+        channel = self._channel
+        if self._maxsize > 0 and len(channel) >= self._maxsize:
+            if not self._on_overflow(event):
+                return
+        channel.put(event)
+        size = len(channel)
+        if self._maxsize > 0 and size >= self._maxsize:
+            self._not_full.clear()
+        if metrics.enabled and size > metrics.queue_high_water:
+            metrics.queue_high_water = size
+
+    def configure_queue(
+        self,
+        *,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+    ) -> None:
+        """Configure the bound and the overflow policy of the event queue.
+
+        Args:
+            maxsize (int, optional): Maximum number of queued events. 0 means unbounded.
+            overflow (str, optional): Overflow policy. Defaults to "block".
+        """
+        if maxsize is not None:
+            if maxsize < 0:
+                raise ValueError(f"maxsize must be >= 0, not {maxsize}")
+            self._maxsize = maxsize
+        if overflow is not None:
+            self._overflow = OverflowPolicy(overflow)
+        self._queue_configured = True
+        if self.writable:
+            self._not_full.set()
+        else:
+            self._not_full.clear()
+
+    async def wait_writable(self) -> None:
+        """Wait until the queue has room for a new event.
+
+        This only waits with the "block" overflow policy; other policies resolve
+        overflows in `trigger`.
+        """
+        if self.writable:
+            return
+        self._overflow_counts[OverflowPolicy.BLOCK] += 1
+        while not self.writable:
+            self._not_full.clear()
+            await self._not_full.wait()
 
     def chain(self, child: Chainable[TSendEventData, Any]) -> None:
         """Chain the chainable object with another chainable object."""
@@ -153,11 +254,76 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
         child._create_connection_as_child(self)
 
     def to_event(self, data: TSendEventData) -> Event[TSendEventData]:
-        return Event(self._name, data)
+        self._seq += 1
+        parent = _current_event.get()
+        if parent is None:
+            # 起点のイベントでトレースするかどうかを決める
+            tracer = tracing.tracer
+            return Event(
+                self._name,
+                data,
+                clock.monotonic_ns(),
+                self._seq,
+                None,
+                0 if tracer is None else tracer.start_trace(),
+            )
+        event = Event(
+            self._name, data, clock.monotonic_ns(), self._seq, None, parent.trace_id
+        )
+        event._parent_name = parent.name
+        event._parent_seq = parent.seq
+        return event
 
     async def next(self) -> Event[TReceiveEventData]:
         """Wait for the next event."""
-        return await self._queue.get()
+        event = await self._channel.get()
+        if self._maxsize > 0 and len(self._channel) < self._maxsize:
+            self._not_full.set()
+        if self._metrics.sample_wait():
+            self._metrics.queue_wait.record(clock.monotonic_ns() - event.ts)
+        return event
+
+    def next_nowait(self) -> Event[TReceiveEventData]:
+        """Get the next event without waiting. Raises asyncio.QueueEmpty if empty."""
+        event = self._channel.get_nowait()
+        if self._maxsize > 0 and len(self._channel) < self._maxsize:
+            self._not_full.set()
+        if self._metrics.sample_wait():
+            self._metrics.queue_wait.record(clock.monotonic_ns() - event.ts)
+        return event
+
+    def drain(self, max_events: int | None = None) -> list[Event[TReceiveEventData]]:
+        """Get up to `max_events` queued events (all by default) without waiting."""
+        events = self._channel.drain(max_events)
+        if self._maxsize > 0 and len(self._channel) < self._maxsize:
+            self._not_full.set()
+        metrics = self._metrics
+        if metrics.enabled:
+            now = clock.monotonic_ns()
+            for event in events:
+                if metrics.sample_wait():
+                    metrics.queue_wait.record(now - event.ts)
+        return events
+
+    def enable_metrics(
+        self, enabled: bool = True, *, sample_every: int | None = None
+    ) -> None:
+        """Switch metrics recording of the chainable object.
+
+        Args:
+            enabled (bool): Whether to record metrics. Defaults to True.
+            sample_every (int, optional): Record timings for one in every N events.
+        """
+        self._metrics.enabled = enabled
+        if sample_every is not None:
+            self._metrics.sample_every = sample_every
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Return a snapshot of the runtime metrics keyed by the chainable name.
+
+        The queue wait is measured from the creation of the event (`Event.ts`).
+        """
+        return {self._name: {"queue_size": self.queue_size, **self._metrics.snapshot()}}
 
     @property
     def name(self) -> str:
@@ -169,7 +335,33 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
 
     @property
     def queue_size(self) -> int:
-        return self._queue.qsize()
+        return len(self._channel)
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def overflow(self) -> OverflowPolicy:
+        return self._overflow
+
+    @property
+    def queue_configured(self) -> bool:
+        return self._queue_configured
+
+    @property
+    def writable(self) -> bool:
+        """Whether a producer may emit without waiting (see `wait_writable`)."""
+        return (
+            self._maxsize == 0
+            or self._overflow != OverflowPolicy.BLOCK
+            or len(self._channel) < self._maxsize
+        )
+
+    @property
+    def overflow_counts(self) -> dict[OverflowPolicy, int]:
+        """Number of times each overflow policy fired."""
+        return dict(self._overflow_counts)
 
     @property
     def connection(self) -> Connection:
@@ -200,17 +392,66 @@ class Chainable(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
     ) -> None:
         self._connection.add_child(child)
 
+    def _clear_queue(self) -> None:
+        self._channel.clear()
+        self._not_full.set()
+
     def _create_connection_as_child(
         self, parent: Chainable[TSendEventData, Any]
     ) -> None:
         self._connection.add_parent(parent)
 
+    def _on_overflow(self, event: Event[TReceiveEventData]) -> bool:
+        """Apply the overflow policy. Returns whether `event` should be enqueued."""
+        self._overflow_counts[self._overflow] += 1
+        if self._overflow == OverflowPolicy.DROP_NEWEST:
+            self._count_dropped()
+            return False
+        elif self._overflow == OverflowPolicy.DROP_OLDEST:
+            self._channel.get_nowait()
+            self._count_dropped()
+            return True
+        elif self._overflow == OverflowPolicy.RAISE:
+            raise QueueOverflowError(self._name)
+        else:
+            # 同期的なtrigger（タスクの完了コールバックなど）は待たせられないので
+            # キューに積む。非同期のproducerはemit前にwait_writableで待つ
+            return True
+
+    def _count_dropped(self, n: int = 1) -> None:
+        if self._metrics.enabled:
+            self._metrics.dropped += n
+
+    async def _wait_next_chains_writable(self) -> None:
+        for c in self.next_chains:
+            if not c.writable:
+                await c.wait_writable()
+
 
 class Chain(
     Generic[TReceiveEventData, TSendEventData],
     Chainable[TReceiveEventData, TSendEventData],
     metaclass=ABCMeta,
 ):
+    """Chain is a base class for chainables that handle triggered events one by one.
+
+    Args:
+        name (str): Name of the chain.
+        input (str): Input mode. "all" handles every queued event in order. "latest"
+            skips to the most recent event when the handler frees up, and
+            "latest_by_name" does so per `event.name`. Superseded events are dropped
+            and counted in `conflated_count`.
+    """
+
+    class InputMode(StrEnum):
+        ALL = "all"
+        LATEST = "latest"
+        LATEST_BY_NAME = "latest_by_name"
+
+    # _on_handleの所要時間をhandle_timeとして記録するか。
+    # 処理をタスクに投げるchainはタスク側で記録する
+    _times_on_handle = True
+
     @overload
     def __init__(self: Chain[TDefaultEventData, TDefaultEventData], name: str):
         ...
@@ -222,6 +463,9 @@ class Chain(
         *,
         type_receive: Type[TReceiveEventData] | None = None,
         type_send: Type[TSendEventData] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
     ) -> None:
         ...
 
@@ -231,11 +475,22 @@ class Chain(
         *,
         type_receive: Type[TReceiveEventData] | None = None,
         type_send: Type[TSendEventData] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
     ):
         super(Chain, self).__init__(
-            name, type_receive=type_receive, type_send=type_send
+            name,
+            type_receive=type_receive,
+            type_send=type_send,
+            maxsize=maxsize,
+            overflow=overflow,
         )
         self._last_handle_event: Event[TReceiveEventData] | None = None
+        self._input = self.InputMode(input)
+        # 間引き待ちのイベント（key -> event）。keyはLATESTならNone、LATEST_BY_NAMEなら名前
+        self._pending: dict[str | None, Event[TReceiveEventData]] = {}
+        self._conflated_count = 0
 
     async def _run_impl(self) -> None:
         while True:
@@ -243,22 +498,63 @@ class Chain(
 
     async def _process_event(self) -> None:
         event = await self._on_wait()
+        _current_event.set(event)
+        timed = self._times_on_handle and self._metrics.sample_handle()
+        traced = (
+            self._times_on_handle and event.trace_id != 0 and tracing.tracer is not None
+        )
+        start = clock.monotonic_ns() if timed or traced else 0
         try:
             data = await self._on_handle(event)
         except Exception:
             raise EventHandleError(event)
         else:
+            if timed or traced:
+                self._observe_handle(event, start, timed, traced)
             if data is None:
                 return
 
             await self._on_emit(data)
 
     async def _on_wait(self) -> Event[TReceiveEventData]:
-        return await self.next()
+        if self._input == self.InputMode.ALL:
+            return await self.next()
+        return await self._next_latest()
+
+    async def _next_latest(self) -> Event[TReceiveEventData]:
+        if len(self._pending) == 0:
+            self._put_pending(await self.next())
+        while self.queue_size > 0:
+            self._put_pending(self.next_nowait())
+        key = next(iter(self._pending))
+        return self._pending.pop(key)
+
+    def _put_pending(self, event: Event[TReceiveEventData]) -> None:
+        key = event.name if self._input == self.InputMode.LATEST_BY_NAME else None
+        if self._pending.pop(key, None) is not None:
+            self._conflated_count += 1
+            self._count_dropped()
+        self._pending[key] = event
 
     async def _on_emit(self, data: TSendEventData) -> None:
+        await self._wait_next_chains_writable()
         self.emit(data)
 
+    def _observe_handle(
+        self, event: Event[TReceiveEventData], start: int, timed: bool, traced: bool
+    ) -> None:
+        """Record the handling of `event` started at `start` to metrics/tracing."""
+        end = clock.monotonic_ns()
+        if timed:
+            self._metrics.handle_time.record(end - start)
+        tracer = tracing.tracer
+        if traced and tracer is not None:
+            tracer.record_span(self._name, event, start, end, self._span_args(event))
+
+    def _span_args(self, event: Event[TReceiveEventData]) -> dict[str, Any] | None:
+        """Extra arguments attached to the span of `event`."""
+        return None
+
     def _emit_after_task(self, task: asyncio.Task) -> None:
         result = task.result()
         if result is not None:
@@ -273,3 +569,12 @@ class Chain(
     @property
     def last_handle_event(self) -> Event[TReceiveEventData] | None:
         return self._last_handle_event
+
+    @property
+    def input(self) -> InputMode:
+        return self._input
+
+    @property
+    def conflated_count(self) -> int:
+        """Number of events dropped because a newer event superseded them."""
+        return self._conflated_count
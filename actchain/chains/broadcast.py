@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+from enum import StrEnum
+from typing import Any, Callable, Literal, Type
+
+from actchain.chains.base import Chain, Chainable
+from actchain.chains.flow import Flow
+from actchain.chains.pass_through import PassThroughChain
+from actchain.channel import BroadcastRing, Channel
+from actchain.event import Event, TDefaultEventData, TReceiveEventData
+from actchain.exceptions import OverrunError
+
+
+class SlowConsumerPolicy(StrEnum):
+    """What happens to a subscriber of a BroadcastChain that falls behind the ring."""
+
+    # the subscriber loses the overwritten events and resumes from the oldest one
+    LAG = "lag"
+    # the subscriber loses all the events it has not read but the latest one
+    SKIP = "skip"
+    # the subscriber is unsubscribed and its next read raises OverrunError
+    DISCONNECT = "disconnect"
+
+
+class _Subscription(Channel[Event]):
+    """Input of a subscriber reading a BroadcastRing through its own cursor.
+
+    It replaces the channel of the subscriber, so events triggered by its other
+    parents are still queued as usual, and read after the broadcast events.
+    """
+
+    __slots__ = ("_ring", "_cursor", "_owner", "_policy", "_on_disconnect")
+
+    def __init__(
+        self,
+        ring: BroadcastRing[Event],
+        owner: Chainable,
+        policy: SlowConsumerPolicy,
+        on_disconnect: Callable[[_Subscription], None],
+        items: Channel[Event],
+    ):
+        super(_Subscription, self).__init__()
+        self._items.extend(items.drain())
+        self._ring = ring
+        self._cursor = ring.latest_seq + 1
+        self._owner = owner
+        self._policy = policy
+        self._on_disconnect = on_disconnect
+
+    async def get(self) -> Event:
+        while True:
+            event = self._take()
+            if event is not None:
+                return event
+            if self._waiter is not None:
+                raise RuntimeError("Channel supports only a single consumer")
+            # ローカルのputとリングへの書き込みのどちらでも起きる
+            waiter = self._waiter = asyncio.get_running_loop().create_future()
+            signal = self._ring.signal()
+            signal.add_done_callback(self._wake)
+            try:
+                await waiter
+            finally:
+                signal.remove_done_callback(self._wake)
+                if self._waiter is waiter:
+                    self._waiter = None
+
+    def get_nowait(self) -> Event:
+        event = self._take()
+        if event is None:
+            raise asyncio.QueueEmpty
+        return event
+
+    def drain(self, max_items: int | None = None) -> list[Event]:
+        events: list[Event] = []
+        while max_items is None or len(events) < max_items:
+            event = self._take()
+            if event is None:
+                break
+            events.append(event)
+        return events
+
+    def clear(self) -> None:
+        self._cursor = self._ring.latest_seq + 1
+        self._items.clear()
+
+    def detach(self) -> Channel[Event]:
+        """Return a plain channel of the events queued by the other parents."""
+        channel: Channel[Event] = Channel()
+        for event in self._items:
+            channel.put(event)
+        return channel
+
+    def _take(self) -> Event | None:
+        ring = self._ring
+        if self._cursor <= ring.latest_seq:
+            if self._cursor < ring.oldest_seq:
+                self._overrun()
+            event = ring.read(self._cursor)
+            self._cursor += 1
+            owner = self._owner
+            owner._last_trigger_event = event
+            if owner._metrics.enabled:
+                owner._metrics.received += 1
+            return event
+        if self._items:
+            return self._items.popleft()
+        return None
+
+    def _overrun(self) -> None:
+        ring = self._ring
+        if self._policy == SlowConsumerPolicy.DISCONNECT:
+            self._on_disconnect(self)
+            raise OverrunError(f"{self._owner.name} fell behind {ring.capacity} events")
+        resume = (
+            ring.oldest_seq
+            if self._policy == SlowConsumerPolicy.LAG
+            else ring.latest_seq
+        )
+        self._owner._count_dropped(resume - self._cursor)
+        self._cursor = resume
+
+    def _wake(self, _: asyncio.Future) -> None:
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @property
+    def owner(self) -> Chainable:
+        return self._owner
+
+    @property
+    def lag(self) -> int:
+        """Number of broadcast events the subscriber has not read."""
+        return max(self._ring.latest_seq - self._cursor + 1, 0)
+
+    def __len__(self) -> int:
+        ring = self._ring
+        unread = ring.latest_seq - max(self._cursor, ring.oldest_seq) + 1
+        return max(unread, 0) + len(self._items)
+
+
+class BroadcastChain(Chain[TReceiveEventData, TReceiveEventData]):
+    """BroadcastChain passes events through to many next chains via a shared ring.
+
+    Instead of queueing each event to every next chain, the chain writes it once to
+    a ring of `capacity` events, and each next chain reads the ring through its own
+    cursor when it takes its next event. Emitting costs the same however many next
+    chains there are, and the chain never waits for them: a next chain more than
+    `capacity` events behind is handled by the slow consumer policy, "lag" to lose
+    the overwritten events, "skip" to jump to the latest event, or "disconnect" to
+    unsubscribe it and raise OverrunError from its next read. Lost events are
+    counted as dropped by the next chain.
+
+    Next chains subscribe to the ring when chained, and read the events emitted
+    after that. The overflow policies of their queues do not apply to broadcast
+    events. Inline PassThroughChains, which do not read a queue, and chains already
+    subscribed to another BroadcastChain are triggered directly instead.
+
+    Args:
+        name (str): Name of the chain.
+        capacity (int): Number of events the ring holds.
+        slow_consumer (str): Slow consumer policy, "lag", "skip" or "disconnect".
+    """
+
+    def __init__(
+        self: BroadcastChain[TDefaultEventData],
+        name: str,
+        *,
+        capacity: int = 1024,
+        slow_consumer: Literal["lag", "skip", "disconnect"] = "lag",
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(BroadcastChain, self).__init__(name, type_receive=type, type_send=type)
+        self._ring: BroadcastRing[Event] = BroadcastRing(capacity)
+        self._slow_consumer = SlowConsumerPolicy(slow_consumer)
+        self._subscriptions: list[_Subscription] = []
+        self._direct: list[Chainable] = []
+
+    def chain(self, child: Chainable[TReceiveEventData, Any]) -> None:
+        super(BroadcastChain, self).chain(child)
+        for c in _entry_chainables(child):
+            # 他のBroadcastChainを読んでいるchainも直接triggerする
+            if (isinstance(c, PassThroughChain) and c.inline) or isinstance(
+                c._channel, _Subscription
+            ):
+                self._direct.append(c)
+            else:
+                subscription = _Subscription(
+                    self._ring, c, self._slow_consumer, self._disconnect, c._channel
+                )
+                c._channel = subscription
+                self._subscriptions.append(subscription)
+
+    def emit(self, data: TReceiveEventData) -> None:
+        event = self.to_event(data)
+        self._last_emit_event = event
+        if self._metrics.enabled:
+            self._metrics.emitted += 1
+        self._ring.write(event)
+        for c in self._direct:
+            c.trigger(event)
+
+    async def _on_handle(
+        self, event: Event[TReceiveEventData]
+    ) -> TReceiveEventData | None:
+        self._last_handle_event = event
+        return event.data
+
+    async def _on_emit(self, data: TReceiveEventData) -> None:
+        # 遅い読み手は待たずにポリシーで扱う
+        self.emit(data)
+
+    def _disconnect(self, subscription: _Subscription) -> None:
+        owner = subscription.owner
+        self._subscriptions.remove(subscription)
+        owner._channel = subscription.detach()
+        owner.prev_chains.remove(self)
+        if owner in self.next_chains:
+            self.next_chains.remove(owner)
+
+    @property
+    def capacity(self) -> int:
+        return self._ring.capacity
+
+    @property
+    def slow_consumer(self) -> SlowConsumerPolicy:
+        return self._slow_consumer
+
+    @property
+    def lags(self) -> dict[str, int]:
+        """Number of events each subscriber has not read, keyed by its name."""
+        return {s.owner.name: s.lag for s in self._subscriptions}
+
+
+def _entry_chainables(chainable: Chainable) -> list[Chainable]:
+    """Return the chainables that receive the events triggered to `chainable`."""
+    if not isinstance(chainable, Flow):
+        return [chainable]
+    entries: list[Chainable] = []
+    for c in chainable.chainables()[0]:  # type: ignore[union-attr]
+        entries.extend(_entry_chainables(c))
+    return entries
@@ -2,16 +2,32 @@ from __future__ import annotations
 
 import asyncio
 from itertools import chain
-from typing import Any, Callable, Self, Type
+from typing import Any, Callable, Literal, Self, Type
 
-from actchain.chains.base import Chainable, ChainableStatus
+from actchain.chains.base import Chain, Chainable, ChainableStatus, OverflowPolicy
+from actchain.chains.function import FunctionChain
+from actchain.chains.fused import FusedFunctionChain
 from actchain.chains.junction import JunctionChain
 from actchain.chains.pass_through import PassThroughChain
 from actchain.event import Event, TDefaultEventData, TReceiveEventData, TSendEventData
 from actchain.exceptions import UnsupportedOperationError
+from actchain.metrics import collect
 
 
 class Flow(Chainable[TReceiveEventData, TSendEventData]):
+    """Flow is a layered group of chainables that can be chained as one chainable.
+
+    Args:
+        name (str): Name of the flow.
+        anchor_chain (JunctionChain | PassThroughChain, optional): Chain placed at the
+            end of the flow on freeze.
+        maxsize (int, optional): Default queue bound for chainables added to the flow.
+        overflow (str, optional): Default overflow policy for chainables added to the
+            flow.
+
+    Queue settings given to a chainable itself take precedence over the flow defaults.
+    """
+
     def __init__(
         self: Flow[TDefaultEventData, TDefaultEventData],
         name: str,
@@ -19,10 +35,14 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
         anchor_chain: JunctionChain | PassThroughChain | None = None,
         type_receive: Type[TReceiveEventData] | None = None,
         type_send: Type[TSendEventData] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
     ):
         super(Flow, self).__init__(name, type_receive=type_receive, type_send=type_send)
         self._chainables: list[list[Chainable]] = []
         self._freeze = False
+        self._default_maxsize = maxsize
+        self._default_overflow = overflow
         if anchor_chain is not None and not isinstance(
             anchor_chain, (JunctionChain, PassThroughChain)
         ):
@@ -31,6 +51,7 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
             )
 
         self._anchor_chain: JunctionChain | PassThroughChain | None = anchor_chain
+        self._fused_chains: list[FusedFunctionChain] | None = None
 
     def __repr__(self) -> str:
         _str = "Flow<"
@@ -42,12 +63,7 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
         return _str
 
     async def _run_impl(self) -> None:
-        coros = []
-        for chainables in self._chainables:
-            for chainable in chainables:
-                if isinstance(chainable, Flow):
-                    continue
-                coros.append(chainable.run())
+        coros = [chainable.run() for chainable in self._runnables()]
 
         self._status = ChainableStatus.RUNNING
         await asyncio.gather(*coros)
@@ -56,6 +72,8 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
     def add(self, *chainables: Chainable) -> Self:
         if self._freeze:
             raise UnsupportedOperationError("Cannot add chainable to frozen flow")
+        for chainable in chainables:
+            self._apply_queue_defaults(chainable)
         layer = len(self._chainables)
         if layer > 0:
             for prev_chainable in self._chainables[layer - 1]:
@@ -104,16 +122,39 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
                 self._onerror_in_run_forever(e)
                 onerror(e)
 
-        for chainables in self._chainables:
-            for chainable in chainables:
-                if isinstance(chainable, Flow):
-                    continue
-                coros.append(
-                    chainable.run_forever(cooldown, _onstart, _onerror, clear_queue)
-                )
+        for chainable in self._runnables():
+            coros.append(
+                chainable.run_forever(cooldown, _onstart, _onerror, clear_queue)
+            )
         # error handling&restartは各chainableのrun_foreverで行われるので、Flowの中で行う必要はない
         await asyncio.gather(*coros)
 
+    def compile(self) -> Self:
+        """Compile the flow to cut the per-hop overhead of queues and tasks.
+
+        Linear sequences of FunctionChains in the flow, where each chain is the only
+        child of the previous one and vice versa, are fused into a
+        FusedFunctionChain that runs the sequence in a single task. The PassThrough
+        anchor chain passes events through inline. Nested flows are compiled as
+        well. Chains keep their connections, last events and metrics.
+
+        The flow is frozen on compile. Fused chains read the queue of their first
+        stage, so the flow can still be chained to, or subscribed by a
+        BroadcastChain, after compiling.
+        """
+        if self._fused_chains is not None:
+            return self
+        self.freeze()
+        for chainable in chain.from_iterable(self._chainables):
+            if isinstance(chainable, Flow):
+                chainable.compile()
+        self._fused_chains = [
+            FusedFunctionChain(stages) for stages in self._find_fusible_stages()
+        ]
+        if isinstance(self._anchor_chain, PassThroughChain):
+            self._anchor_chain.set_inline()
+        return self
+
     def emit(self, data: TSendEventData) -> None:
         event = self.to_event(data)
         self._last_emit_event = event
@@ -130,6 +171,21 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
         assert self._anchor_chain is not None
         self._anchor_chain.chain(child)
 
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Return metrics snapshots of all chainables in the flow keyed by name."""
+        return collect(*chain.from_iterable(self._chainables))
+
+    def enable_metrics(
+        self, enabled: bool = True, *, sample_every: int | None = None
+    ) -> None:
+        """Switch metrics recording of all chainables in the flow."""
+        for chainable in chain.from_iterable(self._chainables):
+            chainable.enable_metrics(enabled, sample_every=sample_every)
+
+    async def wait_writable(self) -> None:
+        for c in self._chainables[0]:
+            await c.wait_writable()
+
     def chainables(
         self, *, flat: bool = False
     ) -> list[Chainable] | list[list[Chainable]]:
@@ -168,6 +224,23 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
             else self._chainables[0][0].last_trigger_event
         )
 
+    @property
+    def writable(self) -> bool:
+        return len(self._chainables) == 0 or all(
+            c.writable for c in self._chainables[0]
+        )
+
+    @property
+    def overflow_counts(self) -> dict[OverflowPolicy, int]:
+        """Number of times each overflow policy fired, summed over the flow."""
+        counts = {p: 0 for p in OverflowPolicy}
+        for chainable in chain.from_iterable(self._chainables):
+            if isinstance(chainable, Flow):
+                continue
+            for policy, count in chainable.overflow_counts.items():
+                counts[policy] += count
+        return counts
+
     @property
     def anchor_chain(self) -> JunctionChain | PassThroughChain | None:
         return self._anchor_chain
@@ -176,6 +249,14 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
     def is_frozen(self) -> bool:
         return self._freeze
 
+    @property
+    def is_compiled(self) -> bool:
+        return self._fused_chains is not None
+
+    @property
+    def fused_chains(self) -> list[FusedFunctionChain]:
+        return [] if self._fused_chains is None else self._fused_chains
+
     def to_event(self, data: TSendEventData) -> Event[TSendEventData]:
         raise UnsupportedOperationError("Flow cannot convert data to event")
 
@@ -190,6 +271,60 @@ class Flow(Chainable[TReceiveEventData, TSendEventData]):
         for chainable in self._chainables[0]:
             chainable._create_connection_as_child(parent)
 
+    def _apply_queue_defaults(self, chainable: Chainable) -> None:
+        if self._default_maxsize is None and self._default_overflow is None:
+            return
+        # Flowは自身のキューを持たない。ネストしたFlowは自身のデフォルトに従う
+        if isinstance(chainable, Flow) or chainable.queue_configured:
+            return
+        chainable.configure_queue(
+            maxsize=self._default_maxsize, overflow=self._default_overflow
+        )
+
+    def _runnables(self) -> list[Chainable]:
+        """Return the chainables the flow runs by itself."""
+        owned = [
+            c for c in chain.from_iterable(self._chainables) if not isinstance(c, Flow)
+        ]
+        if self._fused_chains is None:
+            return owned
+        # 融合されたchainとインライン化したアンカーは自身のタスクを持たない
+        fused = {id(stage) for f in self._fused_chains for stage in f.stages}
+        runnables: list[Chainable] = list(self._fused_chains)
+        for c in owned:
+            if id(c) in fused or (isinstance(c, PassThroughChain) and c.inline):
+                continue
+            runnables.append(c)
+        return runnables
+
+    def _find_fusible_stages(self) -> list[list[FunctionChain]]:
+        owned = {
+            id(c): c
+            for c in chain.from_iterable(self._chainables)
+            if type(c) is FunctionChain and c.input == Chain.InputMode.ALL
+        }
+
+        def next_stage(c: FunctionChain) -> FunctionChain | None:
+            children = c.next_chains
+            if len(children) != 1 or id(children[0]) not in owned:
+                return None
+            child = owned[id(children[0])]
+            return child if child.prev_chains == [c] else None
+
+        has_prev_stage = {
+            id(n) for c in owned.values() if (n := next_stage(c)) is not None
+        }
+        runs = []
+        for c in owned.values():
+            if id(c) in has_prev_stage:
+                continue
+            stages = [c]
+            while (n := next_stage(stages[-1])) is not None and n not in stages:
+                stages.append(n)
+            if len(stages) > 1:
+                runs.append(stages)
+        return runs
+
     def _onstart_in_run_forever(self) -> None:
         self._status = ChainableStatus.RUNNING
 
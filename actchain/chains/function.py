@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import asyncio
-from typing import TYPE_CHECKING
+from enum import StrEnum
+from typing import TYPE_CHECKING, Literal, cast
 
 if TYPE_CHECKING:
     from actchain.function import Function
 
-from actchain.chains.base import Chain
+from actchain import clock, tracing
+from actchain.chains.base import Chain, _current_event
+from actchain.chains.reorder import ReorderBuffer
 from actchain.event import Event, TReceiveEventData, TSendEventData
+from actchain.exceptions import BatchHandleError, EventHandleError, ThrottledError
+from actchain.limiter import FixedLimiter, Limiter
+from actchain.payload import LayeredData
 
 
 class FunctionChain(Chain[TReceiveEventData, TSendEventData]):
@@ -17,48 +23,381 @@ class FunctionChain(Chain[TReceiveEventData, TSendEventData]):
         self,
         name: str,
         function: Function[TReceiveEventData, TSendEventData],
+        *,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
     ):
-        super(FunctionChain, self).__init__(name)
+        super(FunctionChain, self).__init__(
+            name, maxsize=maxsize, overflow=overflow, input=input
+        )
         self._function = function
 
     async def _on_handle(
         self, event: Event[TReceiveEventData]
     ) -> TSendEventData | None:
         self._last_handle_event = event
-        data = await self._function.handle(event)
+        data = await self._call_function(event)
+        return data
+
+    async def _call_function(
+        self, event: Event[TReceiveEventData]
+    ) -> TSendEventData | None:
+        return self._stack(event, await self._function.handle(event))
+
+    def _stack(
+        self, event: Event[TReceiveEventData], data: TSendEventData | None
+    ) -> TSendEventData | None:
+        if data is not None and self._function.layered:
+            return cast(TSendEventData, LayeredData(data, event.data))
+        return data
+
+    async def _call_function_timed(
+        self, event: Event[TReceiveEventData]
+    ) -> TSendEventData | None:
+        timed = self._metrics.sample_handle()
+        traced = event.trace_id != 0 and tracing.tracer is not None
+        if not timed and not traced:
+            return await self._call_function(event)
+        start = clock.monotonic_ns()
+        data = await self._call_function(event)
+        self._observe_handle(event, start, timed, traced)
         return data
 
 
 class ConcurrentFunctionChain(FunctionChain[TReceiveEventData, TSendEventData]):
     """ConcurrentFunctionChain is a chain that handles events concurrently.
 
-    Events are handled concurrently and emitted in the order they are completed.
+    Events are handled concurrently and emitted in the order they are completed, or
+    in the order of the events with `ordered=True`. In the ordered mode, a result is
+    held only until the results of all the earlier events are emitted.
+
+    With a limiter, every handling is reported to it with its latency, and handlers
+    raising ThrottledError count as throttled: the limiter backs off and the event
+    is dropped. The current limit is reported as the "concurrency_limit" metric.
+
+    Args:
+        name (str): Name of the chain.
+        function (Function): Function to handle events.
+        max_concurrency (int | Limiter, optional): Maximum number of events handled at
+            a time, or a Limiter adjusting it from the observed latency and errors
+            (e.g. AIMDLimiter). When reached, the chain stops taking events from its
+            queue until a handler completes, so the queue fills up and backpressure
+            reaches the producers. Unlimited by default.
+        ordered (bool): Whether to emit results in the order of the events.
     """
 
+    _times_on_handle = False
+
+    def __init__(
+        self,
+        name: str,
+        function: Function[TReceiveEventData, TSendEventData],
+        *,
+        max_concurrency: int | Limiter | None = None,
+        ordered: bool = False,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+    ):
+        super(ConcurrentFunctionChain, self).__init__(
+            name, function, maxsize=maxsize, overflow=overflow, input=input
+        )
+        if isinstance(max_concurrency, int):
+            if max_concurrency < 1:
+                raise ValueError(f"max_concurrency must be >= 1, not {max_concurrency}")
+            max_concurrency = FixedLimiter(max_concurrency)
+        self._limiter = max_concurrency
+        if self._limiter is not None:
+            self._metrics.gauges["concurrency_limit"] = self._limiter.limit
+        self._in_flight = 0
+        self._ordered = ordered
+        self._reorder: ReorderBuffer[
+            tuple[Event[TReceiveEventData], asyncio.Task]
+        ] = ReorderBuffer()
+
+    async def _on_wait(self) -> Event[TReceiveEventData]:
+        if self._limiter is None:
+            return await super(ConcurrentFunctionChain, self)._on_wait()
+        # 空きができるまでキューから取り出さない
+        await self._limiter.acquire()
+        try:
+            return await super(ConcurrentFunctionChain, self)._on_wait()
+        except BaseException:
+            self._limiter.abandon()
+            raise
+
     async def _on_handle(self, event: Event[TReceiveEventData]) -> None:
         self._last_handle_event = event
-        task = asyncio.create_task(self._function.handle(event))
-        task.add_done_callback(self._emit_after_task)
+        self._in_flight += 1
+        task = asyncio.create_task(self._call_concurrently(event))
+        if self._ordered:
+            ticket = self._reorder.reserve()
+            task.add_done_callback(lambda t: self._emit_in_order(ticket, event, t))
+        else:
+            task.add_done_callback(self._emit_after_task)
+
+    async def _call_concurrently(
+        self, event: Event[TReceiveEventData]
+    ) -> TSendEventData | None:
+        if self._limiter is None:
+            try:
+                return await self._call_function_timed(event)
+            finally:
+                self._in_flight -= 1
+
+        # 待ち時間を含むレイテンシなのでactchainの時計で測る
+        start = clock.monotonic_ns()
+        try:
+            data = await self._call_function_timed(event)
+        except ThrottledError:
+            self._release(clock.monotonic_ns() - start, True)
+            self._count_dropped()
+            return None
+        except BaseException:
+            self._release(clock.monotonic_ns() - start, True)
+            raise
+        self._release(clock.monotonic_ns() - start, False)
+        return data
+
+    def _release(self, latency_ns: int, error: bool) -> None:
+        assert self._limiter is not None
+        self._in_flight -= 1
+        self._limiter.release(latency_ns, error)
+        if self._metrics.enabled:
+            self._metrics.gauges["concurrency_limit"] = self._limiter.limit
+
+    def _emit_in_order(
+        self, ticket: int, event: Event[TReceiveEventData], task: asyncio.Task
+    ) -> None:
+        error: tuple[Event, BaseException] | None = None
+        for e, t in self._reorder.complete(ticket, (event, task)):
+            if t.cancelled():
+                continue
+            exc = t.exception()
+            if exc is not None:
+                # 後続の結果は止めずにemitし、最初のエラーだけ上げる
+                error = error or (e, exc)
+                continue
+            data = t.result()
+            if data is not None:
+                _current_event.set(e)
+                self.emit(data)
+        if error is not None:
+            raise EventHandleError(error[0]) from error[1]
+
+    @property
+    def max_concurrency(self) -> int | None:
+        """Current concurrency limit. None if unlimited."""
+        return None if self._limiter is None else self._limiter.limit
+
+    @property
+    def limiter(self) -> Limiter | None:
+        return self._limiter
+
+    @property
+    def ordered(self) -> bool:
+        return self._ordered
+
+    @property
+    def in_flight(self) -> int:
+        """Number of events being handled."""
+        return self._in_flight
 
 
 class ExclusiveFunctionChain(FunctionChain[TReceiveEventData, TSendEventData]):
     """ExclusiveFunctionChain is a chain that handles events exclusively.
 
-    Events are handled exclusively and emitted in the order they are completed. Events
-    are ignored when at most one event is being handled.
+    Events are handled one at a time and emitted as they are completed. What happens
+    to events arriving while an event is being handled depends on the mode:
+
+    - "drop": they are ignored.
+    - "latest": the most recent one is kept and handled as soon as the current
+      handling completes; the others are dropped.
+    - "restart": the current handling is cancelled and the new event is handled
+      instead. Use it only for idempotent handlers.
+
+    Args:
+        name (str): Name of the chain.
+        function (Function): Function to handle events.
+        mode (str): "drop", "latest" or "restart". Defaults to "drop".
     """
 
+    _times_on_handle = False
+
+    class Mode(StrEnum):
+        DROP = "drop"
+        LATEST = "latest"
+        RESTART = "restart"
+
     def __init__(
         self,
         name: str,
         function: Function[TReceiveEventData, TSendEventData],
+        *,
+        mode: Literal["drop", "latest", "restart"] = "drop",
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
     ):
-        super(ExclusiveFunctionChain, self).__init__(name, function)
+        super(ExclusiveFunctionChain, self).__init__(
+            name, function, maxsize=maxsize, overflow=overflow, input=input
+        )
+        self._mode = self.Mode(mode)
         self._task: asyncio.Task | None = None
+        self._pending_event: Event[TReceiveEventData] | None = None
 
     async def _on_handle(self, event: Event[TReceiveEventData]) -> None:
         if self._task is None or self._task.done():
-            self._last_handle_event = event
-            self._task = asyncio.create_task(self._function.handle(event))
-            self._task.add_done_callback(self._emit_after_task)
+            if self._pending_event is not None:
+                # 完了コールバックより先に新しいイベントが届いた。保留中のイベントは
+                # これより古いので、後から処理すると順序が逆転する
+                self._pending_event = None
+                self._count_dropped()
+            self._start(event)
+        elif self._mode == self.Mode.LATEST:
+            if self._pending_event is not None:
+                self._count_dropped()
+            self._pending_event = event
+        elif self._mode == self.Mode.RESTART:
+            self._task.cancel()
+            self._count_dropped()
+            self._start(event)
+        else:
+            self._count_dropped()
         return None
+
+    def _start(self, event: Event[TReceiveEventData]) -> None:
+        self._last_handle_event = event
+        self._task = asyncio.create_task(self._call_function_timed(event))
+        self._task.add_done_callback(self._emit_after_task)
+
+    def _emit_after_task(self, task: asyncio.Task) -> None:
+        try:
+            if not task.cancelled():
+                super(ExclusiveFunctionChain, self)._emit_after_task(task)
+        finally:
+            if task is self._task and self._pending_event is not None:
+                # 新しいタスクが動いていれば、_on_handleが保留中のイベントを捨てている
+                # 実行中に届いた最新のイベントをすぐに処理する
+                event, self._pending_event = self._pending_event, None
+                _current_event.set(event)
+                self._start(event)
+
+    @property
+    def mode(self) -> Mode:
+        return self._mode
+
+
+class BatchFunctionChain(FunctionChain[TReceiveEventData, TSendEventData]):
+    """BatchFunctionChain is a chain that handles queued events in batches.
+
+    The chain drains up to `batch_size` queued events, waiting up to `max_wait`
+    seconds for more to arrive, and passes them to `Function.handle_batch` at once.
+    Results are emitted in the order of the events.
+
+    Args:
+        name (str): Name of the chain.
+        function (Function): Function to handle events.
+        batch_size (int): Maximum number of events in a batch.
+        max_wait (float): Maximum time in seconds to wait for a batch to fill up.
+            0 handles whatever is queued without waiting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: Function[TReceiveEventData, TSendEventData],
+        *,
+        batch_size: int = 64,
+        max_wait: float = 0.0,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+    ):
+        super(BatchFunctionChain, self).__init__(
+            name, function, maxsize=maxsize, overflow=overflow
+        )
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, not {batch_size}")
+        self._batch_size = batch_size
+        self._max_wait = max_wait
+
+    async def _process_event(self) -> None:
+        events = await self._on_wait_batch()
+        timed = self._metrics.sample_handle()
+        traced = tracing.tracer is not None and any(e.trace_id for e in events)
+        start = clock.monotonic_ns() if timed or traced else 0
+        try:
+            results = await self._on_handle_batch(events)
+        except Exception:
+            raise BatchHandleError(events)
+        else:
+            if timed or traced:
+                self._observe_batch(events, start, timed, traced)
+            for event, data in zip(events, results):
+                if data is not None:
+                    _current_event.set(event)
+                    await self._on_emit(data)
+
+    async def _on_wait_batch(self) -> list[Event[TReceiveEventData]]:
+        events = [await self.next()]
+        self._drain(events)
+        if self._max_wait <= 0:
+            return events
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._max_wait
+        while len(events) < self._batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                events.append(await asyncio.wait_for(self.next(), timeout))
+            except asyncio.TimeoutError:
+                break
+            self._drain(events)
+        return events
+
+    async def _on_handle_batch(
+        self, events: list[Event[TReceiveEventData]]
+    ) -> list[TSendEventData | None]:
+        self._last_handle_event = events[-1]
+        results = await self._function.handle_batch(events)
+        if len(results) != len(events):
+            # zipで黙って切り詰めると、イベントと結果の対応がずれたまま流れる
+            raise ValueError(
+                f"handle_batch returned {len(results)} results for {len(events)} events"
+            )
+        if self._function.layered:
+            return [
+                None
+                if data is None
+                else cast(TSendEventData, LayeredData(data, e.data))
+                for e, data in zip(events, results)
+            ]
+        return results
+
+    async def _on_handle(
+        self, event: Event[TReceiveEventData]
+    ) -> TSendEventData | None:
+        return (await self._on_handle_batch([event]))[0]
+
+    def _observe_batch(
+        self,
+        events: list[Event[TReceiveEventData]],
+        start: int,
+        timed: bool,
+        traced: bool,
+    ) -> None:
+        end = clock.monotonic_ns()
+        if timed:
+            self._metrics.handle_time.record(end - start)
+        tracer = tracing.tracer
+        if traced and tracer is not None:
+            args = {"batch_size": len(events)}
+            for event in events:
+                if event.trace_id != 0:
+                    tracer.record_span(self._name, event, start, end, args)
+
+    def _drain(self, events: list[Event[TReceiveEventData]]) -> None:
+        events.extend(self.drain(self._batch_size - len(events)))
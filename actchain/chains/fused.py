@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from actchain import clock, tracing
+from actchain.chains.base import (
+    Chain,
+    ChainableStatus,
+    OverflowPolicy,
+    _current_event,
+)
+from actchain.chains.function import FunctionChain
+from actchain.event import Event
+from actchain.exceptions import EventHandleError, UnsupportedOperationError
+
+
+class FusedFunctionChain(Chain[Any, Any]):
+    """FusedFunctionChain runs a linear sequence of FunctionChains as a single task.
+
+    Created by `Flow.compile`. The fused chain takes events from the queue of the
+    first stage and calls the stages back to back, handing the result of a stage to
+    the next one without queueing it. Each stage keeps its own last events, metrics
+    and tracing spans as if it ran by itself, and the last stage emits to the chains
+    after the sequence.
+
+    Args:
+        stages (list[FunctionChain]): FunctionChains to fuse, in order. Each stage must
+            be the only child of the previous stage and vice versa.
+    """
+
+    def __init__(self, stages: list[FunctionChain]):
+        if len(stages) < 2:
+            raise ValueError("at least two stages are required to fuse")
+        super(FusedFunctionChain, self).__init__(
+            "+".join(stage.name for stage in stages)
+        )
+        self._stages = stages
+
+    # キューは先頭ステージのものを使い、自前のキューは使わない。操作のたびに
+    # 先頭ステージへ委譲するので、コンパイル後にBroadcastChainが先頭ステージの
+    # キューを差し替えても追従する
+    def trigger(self, event: Event) -> None:
+        self._stages[0].trigger(event)
+
+    def configure_queue(
+        self,
+        *,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+    ) -> None:
+        self._stages[0].configure_queue(maxsize=maxsize, overflow=overflow)
+
+    async def wait_writable(self) -> None:
+        await self._stages[0].wait_writable()
+
+    def _clear_queue(self) -> None:
+        self._stages[0]._clear_queue()
+
+    async def _run_impl(self) -> None:
+        for stage in self._stages:
+            stage._status = ChainableStatus.RUNNING
+        try:
+            await super(FusedFunctionChain, self)._run_impl()
+        finally:
+            for stage in self._stages:
+                stage._status = ChainableStatus.STOPPING
+
+    async def _process_event(self) -> None:
+        stages = self._stages
+        last = len(stages) - 1
+        event = await stages[0]._on_wait()
+        for i, stage in enumerate(stages):
+            _current_event.set(event)
+            timed = stage._metrics.sample_handle()
+            traced = event.trace_id != 0 and tracing.tracer is not None
+            start = clock.monotonic_ns() if timed or traced else 0
+            try:
+                data = await stage._on_handle(event)
+            except Exception:
+                raise EventHandleError(event)
+            if timed or traced:
+                stage._observe_handle(event, start, timed, traced)
+            if data is None:
+                return
+            if i == last:
+                await stage._on_emit(data)
+            else:
+                event = self._hand_over(stage, stages[i + 1], data)
+
+    @staticmethod
+    def _hand_over(stage: FunctionChain, next_stage: FunctionChain, data: Any) -> Event:
+        # emit -> triggerの記録だけを行い、キューは経由しない
+        event = stage.to_event(data)
+        stage._last_emit_event = event
+        if stage._metrics.enabled:
+            stage._metrics.emitted += 1
+        next_stage._last_trigger_event = event
+        if next_stage._metrics.enabled:
+            next_stage._metrics.received += 1
+        return event
+
+    async def _on_handle(self, event: Event) -> Any:
+        raise UnsupportedOperationError("Fused chain handles events in its stages")
+
+    @property
+    def queue_size(self) -> int:
+        return self._stages[0].queue_size
+
+    @property
+    def maxsize(self) -> int:
+        return self._stages[0].maxsize
+
+    @property
+    def overflow(self) -> OverflowPolicy:
+        return self._stages[0].overflow
+
+    @property
+    def writable(self) -> bool:
+        return self._stages[0].writable
+
+    @property
+    def stages(self) -> list[FunctionChain]:
+        return self._stages
@@ -1,69 +1,211 @@
 from __future__ import annotations
 
 from enum import StrEnum
-from typing import Any, Callable, Literal, Type, cast
+from typing import Any, Callable, Iterator, Literal, Mapping, Type, cast
 
 from actchain.chains.base import Chain, Chainable
 from actchain.event import Event, TDefaultEventData, TReceiveEventData, TSendEventData
 from actchain.exceptions import UnsupportedOperationError
+from actchain.payload import LayeredData
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        # pickleしても同一のオブジェクトに戻るようにする
+        return "_MISSING"
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+_MISSING: Any = _Missing()
+
+
+class JunctionSnapshot(Mapping[str, Any]):
+    """JunctionSnapshot is an immutable view of the latest data of each junction input.
+
+    The name-to-slot index and a base tuple of slot values are shared between
+    snapshots. Each snapshot holds only the slots changed since the base was taken,
+    and the base is retaken once the changes outnumber the square root of the
+    slots, so taking a snapshot costs O(sqrt(inputs)) amortized instead of copying
+    every slot.
+    """
+
+    __slots__ = ("_index", "_base", "_changes", "_size")
+
+    def __init__(
+        self,
+        index: Mapping[str, int],
+        base: tuple[Any, ...],
+        changes: Mapping[int, Any],
+        size: int,
+    ):
+        self._index = index
+        self._base = base
+        self._changes = changes
+        self._size = size
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._get(self._index[name])
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for name, i in self._index.items():
+            if self._get(i) is not _MISSING:
+                yield name
+
+    def _get(self, i: int) -> Any:
+        value = self._changes.get(i, _MISSING)
+        if value is _MISSING and i < len(self._base):
+            value = self._base[i]
+        return value
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self)})"
 
 
 class JunctionChain(Chain[TReceiveEventData, TSendEventData]):
     """JunctionChain "junctions" events from multiple chains. JunctionChain emits an  # noqa: E501
     event when all or any of the previous chains emit an event.
 
+    Readiness is tracked incrementally with a name-to-slot index built when chains are
+    connected, so handling an event does not scan all the inputs.
+
     Args:
         name (str): Name of the chain.
         mode (str): Mode of the junction. "all" or "any".
         transform_fn (Callable[[dict[str, Event]], Any]): Function that generates event data.
+        output (str): Data emitted without `transform_fn`. "dict" builds a new dict of
+            the latest data of each input per event. "snapshot" emits a
+            JunctionSnapshot, an immutable mapping rebuilt only for the inputs that
+            changed, which is cheaper for many inputs but cannot be mutated nor
+            passed to json.dumps as is.
     """
 
     class Mode(StrEnum):
         ALL = "all"
         ANY = "any"
 
+    class Output(StrEnum):
+        DICT = "dict"
+        SNAPSHOT = "snapshot"
+
     def __init__(
         self: JunctionChain[TDefaultEventData, TDefaultEventData],
         name: str,
         *,
         mode: Literal["all", "any"] = "all",
         transform_fn: Callable[[dict[str, Event]], Any] | None = None,
+        output: Literal["dict", "snapshot"] = "dict",
         type_receive: Type[TReceiveEventData] | None = None,
         type_send: Type[TSendEventData] | None = None,
     ):
         super(JunctionChain, self).__init__(
             name, type_receive=type_receive, type_send=type_send
         )
+        if mode not in (self.Mode.ALL, self.Mode.ANY):
+            raise UnsupportedOperationError(f"invalid mode: {mode}")
         self._mode = mode
         self._last_events: dict[str, Event] = {}
         self._transform_fn = transform_fn
+        self._output = self.Output(output)
+        # 入力名 -> スロット。接続時に作り直し、スナップショット間で共有する
+        self._index: dict[str, int] = {}
+        self._connected: list[bool] = []
+        self._values: list[Any] = []
+        self._n_connected = 0
+        self._n_ready = 0
+        self._n_values = 0
+        # スナップショット間で共有する値と、その後に変わったスロット
+        self._base: tuple[Any, ...] = ()
+        self._changes: dict[int, Any] = {}
+        self._snapshot: JunctionSnapshot | None = None
 
     async def _on_handle(
         self, event: Event[TReceiveEventData]
     ) -> TSendEventData | None:
         self._last_handle_event = event
         self._last_events[event.name] = event
-        _last_events = [
-            self._last_events.get(c.name, None) is not None for c in self.prev_chains
-        ]
+        i = self._index.get(event.name)
+        if i is None:
+            # 接続されていないchainからのイベントはreadyの判定には含めない
+            i = self._add_slot(event.name)
+        if self._values[i] is _MISSING:
+            self._n_values += 1
+            if self._connected[i]:
+                self._n_ready += 1
+        self._values[i] = event.data
+        self._changes[i] = event.data
+        self._snapshot = None
+
         if self._mode == self.Mode.ALL:
-            if all(_last_events):
+            if self._n_ready == self._n_connected:
                 return self.transform(self._last_events)
             else:
                 return None
-        elif self._mode == self.Mode.ANY:
-            if any(_last_events):
+        else:
+            if self._n_ready > 0:
                 return self.transform(self._last_events)
             else:
                 return None
-        else:
-            raise UnsupportedOperationError(f"invalid mode: {self._mode}")
 
     def transform(self, events: dict[str, Event]) -> TSendEventData | None:
-        if self._transform_fn is None:
-            return cast(TSendEventData, {e.name: e.data for e in events.values()})
-        else:
+        if self._transform_fn is not None:
             return self._transform_fn(events)
+        elif self._output == self.Output.SNAPSHOT:
+            return cast(TSendEventData, self.snapshot())
+        else:
+            return cast(TSendEventData, {e.name: e.data for e in events.values()})
+
+    def snapshot(self) -> JunctionSnapshot:
+        """Return an immutable view of the latest data of each input."""
+        if self._snapshot is None:
+            values = self._values
+            if len(self._changes) ** 2 > len(values) or len(self._base) != len(values):
+                self._base = tuple(values)
+                self._changes = {}
+            self._snapshot = JunctionSnapshot(
+                self._index, self._base, dict(self._changes), self._n_values
+            )
+        return self._snapshot
+
+    def _span_args(self, event: Event[TReceiveEventData]) -> dict[str, Any] | None:
+        # 合流した他の入力のイベントをリンクとして残す
+        return {
+            "links": [
+                f"{e.name}#{e.seq}"
+                for e in self._last_events.values()
+                if e is not event
+            ]
+        }
+
+    def _create_connection_as_child(
+        self, parent: Chainable[TSendEventData, Any]
+    ) -> None:
+        super(JunctionChain, self)._create_connection_as_child(parent)
+        i = self._index.get(parent.name)
+        if i is None:
+            i = self._add_slot(parent.name)
+        if not self._connected[i]:
+            self._connected[i] = True
+            self._n_connected += 1
+            if self._values[i] is not _MISSING:
+                self._n_ready += 1
+
+    def _add_slot(self, name: str) -> int:
+        i = len(self._values)
+        # 既存のスナップショットが参照しているindexは変更しない
+        self._index = {**self._index, name: i}
+        self._connected.append(False)
+        self._values.append(_MISSING)
+        return i
 
 
 class AccompanyChain(Chain[TReceiveEventData, TSendEventData]):
@@ -100,24 +242,28 @@ class AccompanyChain(Chain[TReceiveEventData, TSendEventData]):
         self._last_handle_event = event
         return self._transform(event)
 
+    def _span_args(self, event: Event[TReceiveEventData]) -> dict[str, Any] | None:
+        accompanied = self._chainable.last_emit_event
+        if accompanied is None:
+            return None
+        return {"links": [f"{accompanied.name}#{accompanied.seq}"]}
+
     def _transform(self, event: Event[TReceiveEventData]) -> TSendEventData | None:
         if self._transform_fn is not None:
             return self._transform_fn(event.data, self._chainable)
         elif self._mode == self.Mode.FLAT:
+            # 本流のイベントを上に重ねる（コピーはしない）
             return cast(
                 TSendEventData,
-                {
-                    **self._chainable.last_emit_event.data,
-                    **event.data,
-                },
+                LayeredData(event.data, self._chainable.last_emit_event.data),
             )
         elif self._mode == self.Mode.NESTED:
             return cast(
                 TSendEventData,
-                {
-                    **event.data,
-                    self._chainable.name: self._chainable.last_emit_event.data,
-                },
+                LayeredData(
+                    {self._chainable.name: self._chainable.last_emit_event.data},
+                    event.data,
+                ),
             )
         else:
             raise UnsupportedOperationError(f"Unsupported concatenation: {self._mode}")
@@ -6,10 +6,16 @@ if TYPE_CHECKING:
     from actchain.loop import Loop
 
 from actchain.chains.base import Chainable
-from actchain.event import TDefaultEventData, TSendEventData
+from actchain.event import Event, TDefaultEventData, TSendEventData
 
 
 class LoopChain(Chainable[TDefaultEventData, TSendEventData]):
+    """LoopChain emits the data yielded by a Loop.
+
+    An Event yielded by the loop, such as a replayed one, is emitted as is instead
+    of being wrapped in an event of the chain.
+    """
+
     def __init__(
         self: LoopChain[TDefaultEventData],
         name: str,
@@ -22,8 +28,19 @@ class LoopChain(Chainable[TDefaultEventData, TSendEventData]):
     async def _run_impl(self) -> None:
         gen = self._loop.loop()
         async for data in gen:
-            self.emit(data)
+            await self._wait_next_chains_writable()
+            if isinstance(data, Event):
+                self._emit_event(data)
+            else:
+                self.emit(data)
         self._done = True
 
+    def _emit_event(self, event: Event[TSendEventData]) -> None:
+        self._last_emit_event = event
+        if self._metrics.enabled:
+            self._metrics.emitted += 1
+        for c in self.next_chains:
+            c.trigger(event)
+
     def done(self) -> bool:
         return self._done
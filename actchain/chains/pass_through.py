@@ -2,12 +2,23 @@ from __future__ import annotations
 
 from typing import Callable, Type
 
-from actchain.chains.base import Chain
+from actchain import clock
+from actchain.chains.base import Chain, ChainableStatus, _current_event
 from actchain.event import Event, TDefaultEventData, TReceiveEventData
+from actchain.exceptions import UnsupportedOperationError
 
 
 class PassThroughChain(Chain[TReceiveEventData, TReceiveEventData]):
-    """PassThroughChain is a chain that passes through events."""
+    """PassThroughChain is a chain that passes through events.
+
+    Args:
+        name (str): Name of the chain.
+        on_handle_cb (Callable[[Event], None], optional): Callback called with each
+            event.
+        inline (bool): Whether to pass events through synchronously in `trigger`
+            instead of queueing them and handling them in its own task. Its
+            writability then follows the next chains.
+    """
 
     def __init__(
         self: PassThroughChain[TDefaultEventData],
@@ -15,14 +26,64 @@ class PassThroughChain(Chain[TReceiveEventData, TReceiveEventData]):
         *,
         on_handle_cb: Callable[[Event[TReceiveEventData]], None] | None = None,
         type: Type[TReceiveEventData] | None = None,
+        inline: bool = False,
     ):
         super(PassThroughChain, self).__init__(name, type_receive=type, type_send=type)
         self._on_handle_cb = on_handle_cb
+        self._inline = inline
+
+    def trigger(self, event: Event[TReceiveEventData]) -> None:
+        if not self._inline:
+            super(PassThroughChain, self).trigger(event)
+            return
+        if not isinstance(event, Event):
+            raise TypeError(f"event must be an instance of Event, not {type(event)}")
+        if event.ts == 0:
+            event.ts = clock.monotonic_ns()
+        self._last_trigger_event = event
+        if self._metrics.enabled:
+            self._metrics.received += 1
+        token = _current_event.set(event)
+        try:
+            self.emit(self._pass(event))
+        finally:
+            _current_event.reset(token)
+
+    def set_inline(self, inline: bool = True) -> None:
+        """Switch whether to pass events through inline. See the `inline` argument.
+
+        Raises:
+            UnsupportedOperationError: If the chain is running.
+        """
+        if self._status == ChainableStatus.RUNNING:
+            raise UnsupportedOperationError(
+                f"cannot switch inline of running chain {self._name}"
+            )
+        self._inline = inline
+
+    async def wait_writable(self) -> None:
+        if not self._inline:
+            await super(PassThroughChain, self).wait_writable()
+            return
+        await self._wait_next_chains_writable()
 
     async def _on_handle(
         self, event: Event[TReceiveEventData]
     ) -> TReceiveEventData | None:
+        return self._pass(event)
+
+    def _pass(self, event: Event[TReceiveEventData]) -> TReceiveEventData:
         self._last_handle_event = event
         if self._on_handle_cb:
             self._on_handle_cb(event)
         return event.data
+
+    @property
+    def writable(self) -> bool:
+        if not self._inline:
+            return super(PassThroughChain, self).writable
+        return all(c.writable for c in self.next_chains)
+
+    @property
+    def inline(self) -> bool:
+        return self._inline
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal
+
+if TYPE_CHECKING:
+    from actchain.function import Function
+
+from actchain.chains.function import ConcurrentFunctionChain
+from actchain.event import Event, TReceiveEventData, TSendEventData
+from actchain.limiter import Limiter
+
+# ワーカープロセスごとに一度だけ受け取るFunctionと、handleを回すイベントループ
+_worker_function: Function | None = None
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _init_worker(function: Function) -> None:
+    global _worker_function, _worker_loop
+    _worker_function = function
+    _worker_loop = asyncio.new_event_loop()
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _handle_in_worker(event: Event) -> Any:
+    assert _worker_function is not None and _worker_loop is not None
+    return _worker_loop.run_until_complete(_worker_function.handle(event))
+
+
+class ProcessFunctionChain(ConcurrentFunctionChain[TReceiveEventData, TSendEventData]):
+    """ProcessFunctionChain is a chain that handles events in worker processes.
+
+    Use it for CPU-bound functions, which would otherwise block the event loop and
+    stall the other chains. The function is sent to each worker once when the pool
+    starts, and the workers are kept until the chain stops. Events and results are
+    pickled between the processes, so they must be picklable as well as the function.
+
+    At most `max_concurrency` events are handled at a time. While the pool is
+    saturated, the chain stops taking events from its queue.
+
+    Args:
+        name (str): Name of the chain.
+        function (Function): Function to handle events. Must be picklable.
+        workers (int, optional): Number of worker processes. Defaults to the number of
+            CPUs.
+        ordered (bool): Whether to emit results in the order of the events. If false,
+            results are emitted in the order they are completed.
+        max_concurrency (int | Limiter, optional): Maximum number of events handled at
+            a time, or a Limiter adjusting it. Defaults to twice the number of workers.
+        mp_context (str, optional): Start method of the workers, "fork", "spawn" or
+            "forkserver". Defaults to the platform default.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: Function[TReceiveEventData, TSendEventData],
+        *,
+        workers: int | None = None,
+        ordered: bool = True,
+        max_concurrency: int | Limiter | None = None,
+        mp_context: Literal["fork", "spawn", "forkserver"] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+    ):
+        n_workers = workers or os.cpu_count() or 1
+        if n_workers < 1:
+            raise ValueError(f"workers must be >= 1, not {workers}")
+        super(ProcessFunctionChain, self).__init__(
+            name,
+            function,
+            max_concurrency=max_concurrency or 2 * n_workers,
+            ordered=ordered,
+            maxsize=maxsize,
+            overflow=overflow,
+            input=input,
+        )
+        self._workers = n_workers
+        self._mp_context = mp_context
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def _run_impl(self) -> None:
+        await self.start()
+        try:
+            await super(ProcessFunctionChain, self)._run_impl()
+        finally:
+            self.shutdown(wait=False)
+
+    async def start(self) -> None:
+        """Start the worker processes and wait until all of them are ready."""
+        executor = self._ensure_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _warm_up) for _ in range(self._workers))
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes. Events being handled are cancelled."""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+
+    async def _call_function(
+        self, event: Event[TReceiveEventData]
+    ) -> TSendEventData | None:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(
+            self._ensure_executor(), _handle_in_worker, event
+        )
+        return self._stack(event, data)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self._workers,
+                mp_context=None
+                if self._mp_context is None
+                else multiprocessing.get_context(self._mp_context),
+                initializer=_init_worker,
+                initargs=(self._function,),
+            )
+        return self._executor
+
+    @property
+    def workers(self) -> int:
+        return self._workers
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import pickle
+import socket
+import struct
+from multiprocessing.process import BaseProcess
+from typing import Callable, Literal, Type
+
+from actchain.chains.base import Chain, Chainable, _current_event
+from actchain.chains.flow import Flow
+from actchain.event import Event, TDefaultEventData, TReceiveEventData, TSendEventData
+from actchain.exceptions import ProcessExitedError
+
+# イベントはpickleしたものに長さ（4バイト）を付けて送る
+_HEADER = struct.Struct("!I")
+
+
+async def _send(writer: asyncio.StreamWriter, event: Event) -> None:
+    payload = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def _receive(reader: asyncio.StreamReader) -> Event | None:
+    """Read the next event. Returns None if the other side closed the connection."""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        payload = await reader.readexactly(_HEADER.unpack(header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    return pickle.loads(payload)
+
+
+class _SendChain(Chain):
+    """Chain sending the events emitted by the flow in the child to the parent."""
+
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        super(_SendChain, self).__init__(name)
+        self._writer = writer
+
+    async def _on_handle(self, event: Event) -> None:
+        await _send(self._writer, event)
+        return None
+
+
+def _flows(flow: Flow) -> list[Flow]:
+    """Return `flow` and the flows nested in it."""
+    flows = [flow]
+    for c in flow.chainables(flat=True):
+        if isinstance(c, Flow):
+            flows.extend(f for f in _flows(c) if f not in flows)
+    return flows
+
+
+def _run_in_child(factory: Callable[[], Flow], sock: socket.socket) -> None:
+    asyncio.run(_serve(factory, sock))
+
+
+async def _serve(factory: Callable[[], Flow], sock: socket.socket) -> None:
+    reader, writer = await asyncio.open_connection(sock=sock)
+    flow = factory()
+    sender = _SendChain(f"{flow.name}_sender", writer)
+    flow.chain(sender)
+    tasks = [asyncio.create_task(sender.run())]
+    for f in _flows(flow):
+        if not f.is_frozen:
+            f.freeze()
+        tasks.append(asyncio.create_task(f.run()))
+
+    async def relay() -> None:
+        while (event := await _receive(reader)) is not None:
+            await flow.wait_writable()
+            flow.trigger(event)
+
+    # 親が接続を閉じたら終了し、flowが落ちたら例外で終了する
+    tasks.append(asyncio.create_task(relay()))
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    writer.close()
+    for task in done:
+        task.result()
+
+
+class ProcessFlow(Chainable[TReceiveEventData, TSendEventData]):
+    """ProcessFlow runs a flow in a child process.
+
+    The flow is built in the child by `factory`, so that it does not share the event
+    loop or the GIL with the flows of the parent. Flows nested in it run in the child
+    as well. Events triggered to the ProcessFlow are sent to the flow, and events
+    emitted by the flow are emitted by the ProcessFlow, over a socket pair. Events
+    are pickled, so their data must be picklable, as well as `factory` unless the
+    start method is "fork".
+
+    The child is started when the ProcessFlow runs and stopped when it stops. If the
+    child exits, `run` raises ProcessExitedError, and `run_forever` starts a new
+    child after the cooldown.
+
+    Args:
+        name (str): Name of the flow.
+        factory (Callable[[], Flow]): Function building the flow in the child.
+        mp_context (str, optional): Start method of the child, "fork", "spawn" or
+            "forkserver". Defaults to the platform default.
+        shutdown_timeout (float): Seconds to wait for the child to exit on shutdown
+            before terminating it.
+    """
+
+    def __init__(
+        self: ProcessFlow[TDefaultEventData, TDefaultEventData],
+        name: str,
+        factory: Callable[[], Flow],
+        *,
+        mp_context: Literal["fork", "spawn", "forkserver"] | None = None,
+        shutdown_timeout: float = 5.0,
+        type_receive: Type[TReceiveEventData] | None = None,
+        type_send: Type[TSendEventData] | None = None,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+    ):
+        super(ProcessFlow, self).__init__(
+            name,
+            type_receive=type_receive,
+            type_send=type_send,
+            maxsize=maxsize,
+            overflow=overflow,
+        )
+        self._factory = factory
+        self._mp_context = mp_context
+        self._shutdown_timeout = shutdown_timeout
+        self._process: BaseProcess | None = None
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def _run_impl(self) -> None:
+        await self.start()
+        try:
+            await self._relay()
+        finally:
+            await self.shutdown()
+
+    async def start(self) -> None:
+        """Start the child process and connect to it."""
+        if self._process is not None:
+            return
+        parent_sock, child_sock = socket.socketpair()
+        context = multiprocessing.get_context(self._mp_context)
+        self._process = context.Process(
+            target=_run_in_child,
+            args=(self._factory, child_sock),
+            name=f"actchain-{self._name}",
+        )
+        self._process.start()
+        child_sock.close()
+        self._reader, self._writer = await asyncio.open_connection(sock=parent_sock)
+
+    async def shutdown(self) -> None:
+        """Stop the child process.
+
+        The connection is closed so that the child exits by itself, and the child
+        is terminated if it does not exit within `shutdown_timeout`. The child is
+        waited for in a thread, so that the event loop keeps running meanwhile.
+        """
+        if self._writer is not None:
+            # forkした子も親側のソケットを持っているので、closeでなくshutdownで伝える
+            if self._writer.can_write_eof() and not self._writer.is_closing():
+                self._writer.write_eof()
+            self._writer.close()
+            self._writer = self._reader = None
+        process = self._process
+        if process is None:
+            return
+        await self._join(process, self._shutdown_timeout)
+        if process.is_alive():
+            process.terminate()
+            await self._join(process, None)
+        if self._process is process:
+            self._process = None
+
+    async def _relay(self) -> None:
+        tasks = [
+            asyncio.create_task(self._send_events()),
+            asyncio.create_task(self._receive_events()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _send_events(self) -> None:
+        assert self._writer is not None
+        while True:
+            await _send(self._writer, await self.next())
+
+    async def _receive_events(self) -> None:
+        assert self._reader is not None and self._process is not None
+        while (event := await _receive(self._reader)) is not None:
+            # 子プロセスでemitされたイベントをparentにする
+            _current_event.set(event)
+            await self._wait_next_chains_writable()
+            self.emit(event.data)
+        await self._join(self._process, self._shutdown_timeout)
+        raise ProcessExitedError(
+            f"{self._name} (pid={self._process.pid}, "
+            f"exitcode={self._process.exitcode})"
+        )
+
+    @staticmethod
+    async def _join(process: BaseProcess, timeout: float | None) -> None:
+        # joinはブロックするのでイベントループを止めないようにスレッドで待つ
+        await asyncio.get_running_loop().run_in_executor(None, process.join, timeout)
+
+    @property
+    def pid(self) -> int | None:
+        """Process id of the child, or None if it is not running."""
+        return None if self._process is None else self._process.pid
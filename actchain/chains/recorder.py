@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Literal, Type
+
+from actchain import clock
+from actchain.chains.base import Chain
+from actchain.event import Event, TDefaultEventData, TReceiveEventData
+from actchain.eventlog import EventLogWriter
+from actchain.shm import Serializer
+
+
+class RecorderChain(Chain[TReceiveEventData, TReceiveEventData]):
+    """RecorderChain records events to an event log and passes them through.
+
+    Events are written with their name, sequence number, data and the time they are
+    recorded at, by an EventLogWriter (see it for the log format). Events are
+    encoded into a buffer on the event loop, and the buffer is handed in batches to
+    a writer thread, which writes and fsyncs the log without blocking the loop. The
+    buffer is handed over when it is full, every `flush_interval` seconds and when
+    the chain stops. Read the log with EventLogReader, or replay it with
+    ReplayLoop.
+
+    Args:
+        name (str): Name of the chain.
+        path (str | Path): Directory of the log.
+        serializer (Serializer, optional): Serializer of event data. Defaults to
+            PickleSerializer.
+        segment_size (int): Maximum size of a segment file in bytes.
+        flush_size (int): Size of the write buffer in bytes.
+        flush_interval (float): Maximum seconds events stay in the write buffer.
+        index_interval (int): Bytes of records between index entries.
+        fsync (str): When to fsync written data, "never", "flush" or "interval".
+        fsync_interval (float): Seconds between fsyncs for the "interval" policy.
+    """
+
+    def __init__(
+        self: RecorderChain[TDefaultEventData],
+        name: str,
+        path: str | Path,
+        *,
+        serializer: Serializer | None = None,
+        segment_size: int = 64 * 1024 * 1024,
+        flush_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        index_interval: int = 4096,
+        fsync: Literal["never", "flush", "interval"] = "interval",
+        fsync_interval: float = 1.0,
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(RecorderChain, self).__init__(name, type_receive=type, type_send=type)
+        self._writer = EventLogWriter(
+            path,
+            serializer=serializer,
+            segment_size=segment_size,
+            flush_size=flush_size,
+            index_interval=index_interval,
+            fsync=fsync,
+            fsync_interval=fsync_interval,
+            background=True,
+        )
+        self._flush_interval = flush_interval
+
+    async def _run_impl(self) -> None:
+        flusher = asyncio.create_task(self._flush_periodically())
+        try:
+            await super(RecorderChain, self)._run_impl()
+        finally:
+            flusher.cancel()
+            # 書き込みスレッドの完了を待つ間もループを止めない
+            await asyncio.get_running_loop().run_in_executor(None, self._writer.close)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await clock.sleep(self._flush_interval)
+            self._writer.flush()
+
+    async def _on_handle(
+        self, event: Event[TReceiveEventData]
+    ) -> TReceiveEventData | None:
+        self._last_handle_event = event
+        self._writer.append(event.name, event.seq, event.data)
+        return event.data
+
+    def flush(self) -> None:
+        """Hand the buffered events to the writer thread."""
+        self._writer.flush()
+
+    @property
+    def path(self) -> Path:
+        return self._writer.path
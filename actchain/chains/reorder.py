@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ReorderBuffer(Generic[T]):
+    """ReorderBuffer releases items completed out of order in the order of reservation.
+
+    A ticket is reserved when work starts, and the item is handed back with the ticket
+    when the work completes. Items are held until all the earlier tickets complete.
+    """
+
+    __slots__ = ("_next_ticket", "_next_release", "_done")
+
+    def __init__(self) -> None:
+        self._next_ticket = 0
+        self._next_release = 0
+        self._done: dict[int, T] = {}
+
+    def reserve(self) -> int:
+        """Reserve the ticket of the next item."""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    def complete(self, ticket: int, item: T) -> list[T]:
+        """Complete `ticket` with `item` and return the items ready to release."""
+        self._done[ticket] = item
+        if ticket != self._next_release:
+            return []
+        ready = []
+        while self._next_release in self._done:
+            ready.append(self._done.pop(self._next_release))
+            self._next_release += 1
+        return ready
+
+    def __len__(self) -> int:
+        """Number of reserved items not released yet."""
+        return self._next_ticket - self._next_release
@@ -1,45 +1,249 @@
 from __future__ import annotations
 
-import time
+import asyncio
+from abc import abstractmethod
 from typing import Type
 
-from actchain.chains.base import Chain
+from actchain import clock
+from actchain.chains.base import Chain, _current_event
 from actchain.event import Event, TDefaultEventData, TReceiveEventData
 
 
-class IntervalSamplingChain(Chain[TReceiveEventData, TReceiveEventData]):
-    """IntervalSamplingChain samples events by a given interval.
+class _TimerChain(Chain[TReceiveEventData, TReceiveEventData]):
+    """Base class of chains emitting on event-loop timers.
+
+    Timers use the monotonic time of actchain.clock, so they are not affected by
+    changes of the system time, follow the clock set by `set_clock`, and emit on
+    time even if no more events arrive.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        *,
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(_TimerChain, self).__init__(name, type_receive=type, type_send=type)
+        if interval <= 0:
+            raise ValueError(f"interval must be > 0, not {interval}")
+        self._interval = float(interval)
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def _run_impl(self) -> None:
+        try:
+            await super(_TimerChain, self)._run_impl()
+        finally:
+            self._cancel_timer()
+
+    def _schedule_at(self, when: float) -> None:
+        self._timer = clock.call_at(when, self._fire)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _fire(self) -> None:
+        self._timer = None
+        self._on_timer()
+
+    @abstractmethod
+    def _on_timer(self) -> None:
+        raise NotImplementedError
+
+    def _emit_event(self, event: Event[TReceiveEventData]) -> None:
+        # タイマーからのemitでも元のイベントをparentにする
+        self._last_handle_event = event
+        _current_event.set(event)
+        self.emit(event.data)
+
+    @staticmethod
+    def _now() -> float:
+        return clock.monotonic()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+
+class ThrottleChain(_TimerChain[TReceiveEventData]):
+    """ThrottleChain emits at most one event per interval.
+
+    The first event is emitted immediately (leading edge) and opens a window of
+    `interval` seconds. The latest event received during the window is emitted when
+    the window closes (trailing edge), which opens the next window.
 
     Args:
         name (str): Name of the chain.
-        interval (int): Interval in seconds.
+        interval (float): Interval in seconds.
+        leading (bool): Whether to emit the event opening a window.
+        trailing (bool): Whether to emit the latest event of a window when it closes.
     """
 
     def __init__(
-        self: IntervalSamplingChain[TDefaultEventData],
+        self: ThrottleChain[TDefaultEventData],
         name: str,
-        interval: int,
+        interval: float,
         *,
+        leading: bool = True,
+        trailing: bool = True,
         type: Type[TReceiveEventData] | None = None,
     ):
-        super(IntervalSamplingChain, self).__init__(
-            name, type_receive=type, type_send=type
-        )
-        self._interval = interval
-        self._last_emit_ts: float | None = None
+        super(ThrottleChain, self).__init__(name, interval, type=type)
+        if not leading and not trailing:
+            raise ValueError("at least one of leading and trailing must be true")
+        self._leading = leading
+        self._trailing = trailing
+        self._trailing_event: Event[TReceiveEventData] | None = None
 
     async def _on_handle(
         self, event: Event[TReceiveEventData]
     ) -> TReceiveEventData | None:
-        if self._should_thinning_out():
+        if self._timer is None:
+            self._schedule_at(self._now() + self._interval)
+            if self._leading:
+                self._last_handle_event = event
+                return event.data
+        elif not self._trailing:
+            self._count_dropped()
             return None
-        else:
-            self._last_handle_event = event
-            self._last_emit_ts = time.time()
-            return event.data
+        if self._trailing_event is not None:
+            self._count_dropped()
+        self._trailing_event = event
+        return None
 
-    def _should_thinning_out(self) -> bool:
-        if self._last_emit_ts is None:
-            return False
+    def _on_timer(self) -> None:
+        if self._trailing_event is None:
+            return
+        event, self._trailing_event = self._trailing_event, None
+        self._schedule_at(self._now() + self._interval)
+        self._emit_event(event)
+
+
+class DebounceChain(_TimerChain[TReceiveEventData]):
+    """DebounceChain emits the latest event once no events arrive for an interval.
+
+    Args:
+        name (str): Name of the chain.
+        interval (float): Quiet period in seconds.
+        max_wait (float, optional): Maximum time in seconds an event waits. If set,
+            the latest event is emitted at least this often even if events keep
+            arriving.
+    """
+
+    def __init__(
+        self: DebounceChain[TDefaultEventData],
+        name: str,
+        interval: float,
+        *,
+        max_wait: float | None = None,
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(DebounceChain, self).__init__(name, interval, type=type)
+        if max_wait is not None and max_wait < interval:
+            raise ValueError(f"max_wait must be >= interval, not {max_wait}")
+        self._max_wait = max_wait
+        self._debounced: Event[TReceiveEventData] | None = None
+        self._deadline = 0.0
+        self._first_pending_at = 0.0
+
+    async def _on_handle(
+        self, event: Event[TReceiveEventData]
+    ) -> TReceiveEventData | None:
+        now = self._now()
+        if self._debounced is None:
+            self._first_pending_at = now
         else:
-            return time.time() - self._last_emit_ts < self._interval
+            self._count_dropped()
+        self._debounced = event
+        # イベントごとにタイマーを作り直さず、期限だけ延ばして発火時に確認する
+        self._deadline = now + self._interval
+        if self._timer is None:
+            self._schedule_at(self._deadline)
+        return None
+
+    def _on_timer(self) -> None:
+        if self._debounced is None:
+            return
+        now = self._now()
+        deadline = self._deadline
+        if self._max_wait is not None:
+            deadline = min(deadline, self._first_pending_at + self._max_wait)
+        if now < deadline:
+            self._schedule_at(deadline)
+            return
+        event, self._debounced = self._debounced, None
+        self._emit_event(event)
+
+
+class SampleChain(_TimerChain[TReceiveEventData]):
+    """SampleChain emits the latest event at a fixed rate (sample and hold).
+
+    Ticks start with the first event and are scheduled at fixed times, so they do
+    not drift.
+
+    Args:
+        name (str): Name of the chain.
+        interval (float): Interval of ticks in seconds.
+        hold (bool): Whether to emit the latest event again on ticks with no new
+            event. If false, such ticks are skipped.
+    """
+
+    def __init__(
+        self: SampleChain[TDefaultEventData],
+        name: str,
+        interval: float,
+        *,
+        hold: bool = True,
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(SampleChain, self).__init__(name, interval, type=type)
+        self._hold = hold
+        self._latest: Event[TReceiveEventData] | None = None
+        self._updated = False
+        self._next_tick = 0.0
+
+    async def _on_handle(
+        self, event: Event[TReceiveEventData]
+    ) -> TReceiveEventData | None:
+        if self._updated:
+            self._count_dropped()
+        self._latest = event
+        self._updated = True
+        if self._timer is None:
+            self._next_tick = self._now() + self._interval
+            self._schedule_at(self._next_tick)
+        return None
+
+    def _on_timer(self) -> None:
+        self._next_tick += self._interval
+        self._schedule_at(self._next_tick)
+        if self._latest is None or not (self._updated or self._hold):
+            return
+        self._updated = False
+        self._emit_event(self._latest)
+
+
+class IntervalSamplingChain(ThrottleChain[TReceiveEventData]):
+    """IntervalSamplingChain samples events by a given interval.
+
+    Only the first event of each interval is passed through. This is a ThrottleChain
+    without the trailing edge; use ThrottleChain to also deliver the last event of
+    a burst.
+
+    Args:
+        name (str): Name of the chain.
+        interval (float): Interval in seconds.
+    """
+
+    def __init__(
+        self: IntervalSamplingChain[TDefaultEventData],
+        name: str,
+        interval: float,
+        *,
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(IntervalSamplingChain, self).__init__(
+            name, interval, leading=True, trailing=False, type=type
+        )
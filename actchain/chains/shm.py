@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Type
+
+from loguru import logger
+
+from actchain.chains.base import Chain
+from actchain.event import Event, TDefaultEventData, TReceiveEventData
+from actchain.shm import PickleSerializer, Serializer, ShmRing
+
+
+class ShmBroadcastChain(Chain[TReceiveEventData, TReceiveEventData]):
+    """ShmBroadcastChain writes event data to a ring in shared memory.
+
+    Any number of processes read the ring with ShmBroadcastLoop, each at its own
+    pace. Data is serialized once per event however many readers there are, and the
+    chain never waits for readers; readers that fall behind lose data instead.
+    Events are passed through to the next chains.
+
+    Data larger than `slot_size` once serialized is not written to the ring: it is
+    counted as dropped and in `oversized`, and logged as a warning, while the event
+    is still passed through.
+
+    The ring is created when the chain starts running and removed by `close`.
+
+    Args:
+        name (str): Name of the chain.
+        shm_name (str): Name of the shared memory block readers attach to.
+        slots (int): Number of events the ring holds.
+        slot_size (int): Maximum size of serialized event data in bytes.
+        serializer (Serializer, optional): Serializer of event data. Defaults to
+            PickleSerializer.
+    """
+
+    def __init__(
+        self: ShmBroadcastChain[TDefaultEventData],
+        name: str,
+        shm_name: str,
+        *,
+        slots: int = 1024,
+        slot_size: int = 4096,
+        serializer: Serializer | None = None,
+        type: Type[TReceiveEventData] | None = None,
+    ):
+        super(ShmBroadcastChain, self).__init__(name, type_receive=type, type_send=type)
+        self._shm_name = shm_name
+        self._slots = slots
+        self._slot_size = slot_size
+        self._serializer = serializer or PickleSerializer()
+        self._ring: ShmRing | None = None
+        self._oversized = 0
+
+    async def _run_impl(self) -> None:
+        # 再起動しても読み手が同じブロックを読み続けられるように作り直さない
+        if self._ring is None:
+            self._ring = ShmRing.create(
+                self._shm_name, slots=self._slots, slot_size=self._slot_size
+            )
+        await super(ShmBroadcastChain, self)._run_impl()
+
+    async def _on_handle(
+        self, event: Event[TReceiveEventData]
+    ) -> TReceiveEventData | None:
+        assert self._ring is not None
+        self._last_handle_event = event
+        payload = self._serializer.dumps(event.data)
+        if len(payload) > self._slot_size:
+            self._drop_oversized(event, len(payload))
+        else:
+            self._ring.write(payload)
+        return event.data
+
+    def _drop_oversized(self, event: Event[TReceiveEventData], size: int) -> None:
+        self._oversized += 1
+        self._count_dropped()
+        # 大きなデータが続いてもログが溢れないよう、1, 2, 4, ...件目だけ出す
+        if self._oversized & (self._oversized - 1) == 0:
+            logger.warning(
+                f"Chain {self._name} dropped {event.name}#{event.seq} of {size} bytes"
+                f" exceeding slot_size {self._slot_size}"
+                f" ({self._oversized} dropped so far)"
+            )
+
+    def close(self) -> None:
+        """Remove the ring. Readers stop receiving events."""
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    @property
+    def ring(self) -> ShmRing | None:
+        return self._ring
+
+    @property
+    def oversized(self) -> int:
+        """Number of events dropped for exceeding `slot_size`."""
+        return self._oversized
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import math
+from array import array
+from collections import deque
+from enum import StrEnum
+from typing import Any, Literal, Mapping, Sequence
+
+from actchain.chains.base import Chain
+from actchain.event import Event
+
+
+class _RingBuffer:
+    """Array-backed FIFO of floats. Grows by doubling when full."""
+
+    __slots__ = ("_values", "_head", "_size")
+
+    def __init__(self, capacity: int):
+        self._values = array("d", bytes(8 * capacity))
+        self._head = 0
+        self._size = 0
+
+    def append(self, value: float) -> None:
+        if self._size == len(self._values):
+            self._grow()
+        self._values[(self._head + self._size) % len(self._values)] = value
+        self._size += 1
+
+    def popleft(self) -> float:
+        value = self._values[self._head]
+        self._head = (self._head + 1) % len(self._values)
+        self._size -= 1
+        return value
+
+    def first(self) -> float:
+        return self._values[self._head]
+
+    def _grow(self) -> None:
+        n = len(self._values)
+        values = array("d", bytes(16 * n))
+        for i in range(self._size):
+            values[i] = self._values[(self._head + i) % n]
+        self._values = values
+        self._head = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _FieldStats:
+    """Running sum, mean, variance (Welford) and min/max (monotonic deques)."""
+
+    __slots__ = ("total", "mean", "m2", "_min", "_max")
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # (通し番号, 値)。先頭が窓内の最小/最大
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+
+    def add(self, i: int, x: float, n: int) -> None:
+        """Add the `i`th value `x`, making the count `n`."""
+        self.total += x
+        d = x - self.mean
+        self.mean += d / n
+        self.m2 += d * (x - self.mean)
+        mins, maxs = self._min, self._max
+        while mins and mins[-1][1] >= x:
+            mins.pop()
+        mins.append((i, x))
+        while maxs and maxs[-1][1] <= x:
+            maxs.pop()
+        maxs.append((i, x))
+
+    def remove(self, i: int, x: float, n: int) -> None:
+        """Remove the `i`th value `x`, the oldest one, making the count `n`."""
+        self.total -= x
+        if n == 0:
+            self.mean = self.m2 = 0.0
+        else:
+            d = x - self.mean
+            self.mean -= d / n
+            self.m2 = max(self.m2 - d * (x - self.mean), 0.0)
+        if self._min and self._min[0][0] == i:
+            self._min.popleft()
+        if self._max and self._max[0][0] == i:
+            self._max.popleft()
+
+    def snapshot(self, n: int) -> dict[str, float]:
+        return {
+            "sum": self.total,
+            "mean": self.mean if n > 0 else math.nan,
+            "variance": self.m2 / n if n > 0 else math.nan,
+            "min": self._min[0][1] if self._min else math.nan,
+            "max": self._max[0][1] if self._max else math.nan,
+        }
+
+
+class _Window:
+    """Aggregates of the events in a window."""
+
+    __slots__ = ("start", "count", "stats", "pv", "volume", "_next_index")
+
+    def __init__(self, n_fields: int, start: float = math.nan):
+        self.start = start
+        self.count = 0
+        self.stats = [_FieldStats() for _ in range(n_fields)]
+        self.pv = 0.0
+        self.volume = 0.0
+        self._next_index = 0
+
+    def add(self, values: Sequence[float], price: float, volume: float) -> int:
+        i = self._next_index
+        self._next_index += 1
+        self.count += 1
+        for s, x in zip(self.stats, values):
+            s.add(i, x, self.count)
+        self.pv += price * volume
+        self.volume += volume
+        return i
+
+    def remove(self, i: int, values: Sequence[float], price: float, volume: float):
+        self.count -= 1
+        for s, x in zip(self.stats, values):
+            s.remove(i, x, self.count)
+        self.pv -= price * volume
+        self.volume -= volume
+
+
+class WindowChain(Chain[Mapping[str, Any], dict[str, Any]]):
+    """WindowChain aggregates numeric fields of events over count or time windows.
+
+    Sum, mean, variance, min and max of each field, and optionally VWAP, are updated
+    incrementally in O(1) per event. Windows are either:
+
+    - "tumbling": consecutive non-overlapping windows of `size` events or
+      `duration` seconds. Emits the aggregates on every event or when a window
+      closes.
+    - "sliding": the last `size` events or the events in the last `duration`
+      seconds. Values are kept in array-backed ring buffers to be evicted, and
+      the aggregates are emitted on every event.
+
+    Time windows use the event time in `time_field` (seconds), or the time the
+    event was created. Events may arrive out of order by up to `allowed_lateness`
+    seconds: the watermark trails the latest event time by it, a tumbling window
+    closes when the watermark passes its end, and events older than the watermark
+    are dropped as late. Sliding windows evict values in arrival order.
+
+    The emitted data holds "count", an entry per field with "sum", "mean",
+    "variance", "min" and "max", "vwap" if `vwap` is given, and "start"/"end" of
+    the window for time windows.
+
+    Args:
+        name (str): Name of the chain.
+        fields (Sequence[str]): Numeric fields of the event data to aggregate.
+        kind (str): "tumbling" or "sliding".
+        size (int, optional): Number of events in a window.
+        duration (float, optional): Length of a window in seconds. Exactly one of
+            `size` and `duration` must be given.
+        emit (str, optional): "every" to emit on every event or "close" to emit when
+            a window closes. Defaults to "close" for tumbling windows and "every"
+            for sliding windows, which only support "every".
+        time_field (str, optional): Field holding the event time in seconds.
+        allowed_lateness (float): Seconds events may be late by.
+        vwap (tuple[str, str], optional): Price and volume fields for VWAP.
+        capacity (int): Initial capacity of the ring buffers of time-based sliding
+            windows. They grow when needed.
+    """
+
+    class Kind(StrEnum):
+        TUMBLING = "tumbling"
+        SLIDING = "sliding"
+
+    class Emit(StrEnum):
+        EVERY = "every"
+        CLOSE = "close"
+
+    def __init__(
+        self,
+        name: str,
+        fields: Sequence[str],
+        *,
+        kind: Literal["tumbling", "sliding"] = "tumbling",
+        size: int | None = None,
+        duration: float | None = None,
+        emit: Literal["every", "close"] | None = None,
+        time_field: str | None = None,
+        allowed_lateness: float = 0.0,
+        vwap: tuple[str, str] | None = None,
+        capacity: int = 1024,
+    ):
+        super(WindowChain, self).__init__(name)
+        if (size is None) == (duration is None):
+            raise ValueError("exactly one of size and duration must be given")
+        if size is not None and size < 1:
+            raise ValueError(f"size must be >= 1, not {size}")
+        if duration is not None and duration <= 0:
+            raise ValueError(f"duration must be > 0, not {duration}")
+        self._kind = self.Kind(kind)
+        if emit is None:
+            emit = "close" if self._kind == self.Kind.TUMBLING else "every"
+        self._emit = self.Emit(emit)
+        if self._kind == self.Kind.SLIDING and self._emit == self.Emit.CLOSE:
+            raise ValueError("sliding windows only support emit='every'")
+        self._fields = tuple(fields)
+        self._size = size
+        self._duration = duration
+        self._time_field = time_field
+        self._allowed_lateness = allowed_lateness
+        self._vwap = vwap
+        self._watermark = -math.inf
+        self._latest_time = -math.inf
+        # tumbling: 開いている窓（開始時刻 -> 窓）。通常は1つだけ
+        self._open: dict[float, _Window] = {}
+        # sliding: 1つの窓と、追い出すための値のリングバッファ
+        self._window = _Window(len(self._fields))
+        n_buffers = len(self._fields) + (2 if vwap is not None else 0)
+        self._buffers = [_RingBuffer(size or capacity) for _ in range(n_buffers)]
+        self._times = _RingBuffer(size or capacity)
+        self._oldest = 0
+
+    async def _on_handle(
+        self, event: Event[Mapping[str, Any]]
+    ) -> dict[str, Any] | None:
+        self._last_handle_event = event
+        data = event.data
+        values = [float(data[f]) for f in self._fields]
+        if self._vwap is None:
+            price = volume = 0.0
+        else:
+            price, volume = float(data[self._vwap[0]]), float(data[self._vwap[1]])
+
+        if self._duration is None:
+            if self._kind == self.Kind.TUMBLING:
+                return self._add_tumbling_count(values, price, volume)
+            return self._add_sliding_count(values, price, volume)
+
+        t = float(data[self._time_field]) if self._time_field else event.ts / 1e9
+        if t < self._watermark:
+            self._count_dropped()
+            return None
+        if t > self._latest_time:
+            self._latest_time = t
+            self._watermark = t - self._allowed_lateness
+        if self._kind == self.Kind.TUMBLING:
+            return self._add_tumbling_time(t, values, price, volume)
+        return self._add_sliding_time(t, values, price, volume)
+
+    def _add_tumbling_count(
+        self, values: list[float], price: float, volume: float
+    ) -> dict[str, Any] | None:
+        window = self._window
+        window.add(values, price, volume)
+        closed = window.count == self._size
+        result = (
+            self._result(window) if closed or self._emit == self.Emit.EVERY else None
+        )
+        if closed:
+            self._window = _Window(len(self._fields))
+        return result
+
+    def _add_sliding_count(
+        self, values: list[float], price: float, volume: float
+    ) -> dict[str, Any]:
+        if self._window.count == self._size:
+            self._evict()
+        self._push(values, price, volume)
+        return self._result(self._window)
+
+    def _add_tumbling_time(
+        self, t: float, values: list[float], price: float, volume: float
+    ) -> dict[str, Any] | None:
+        assert self._duration is not None
+        start = math.floor(t / self._duration) * self._duration
+        window = self._open.get(start)
+        if window is None:
+            if start + self._duration <= self._watermark:
+                # 既に閉じた窓に属するイベント
+                self._count_dropped()
+                return None
+            window = self._open[start] = _Window(len(self._fields), start)
+        window.add(values, price, volume)
+        result = self._result(window) if self._emit == self.Emit.EVERY else None
+
+        # watermarkが終わりを過ぎた窓を古い順に閉じる
+        closed = [s for s in self._open if s + self._duration <= self._watermark]
+        for s in sorted(closed):
+            w = self._open.pop(s)
+            if self._emit == self.Emit.CLOSE:
+                # 複数閉じた場合は最後の窓以外をここでemitする
+                if result is not None:
+                    self.emit(result)
+                result = self._result(w)
+        return result
+
+    def _add_sliding_time(
+        self, t: float, values: list[float], price: float, volume: float
+    ) -> dict[str, Any]:
+        assert self._duration is not None
+        horizon = self._latest_time - self._duration
+        while len(self._times) > 0 and self._times.first() <= horizon:
+            self._evict()
+        self._times.append(t)
+        self._push(values, price, volume)
+        result = self._result(self._window)
+        result["start"] = self._latest_time - self._duration
+        result["end"] = self._latest_time
+        return result
+
+    def _push(self, values: list[float], price: float, volume: float) -> None:
+        self._window.add(values, price, volume)
+        buffers = self._buffers
+        for b, x in zip(buffers, values):
+            b.append(x)
+        if self._vwap is not None:
+            buffers[-2].append(price)
+            buffers[-1].append(volume)
+
+    def _evict(self) -> None:
+        buffers = self._buffers
+        values = [b.popleft() for b in buffers[: len(self._fields)]]
+        if self._vwap is None:
+            price = volume = 0.0
+        else:
+            price, volume = buffers[-2].popleft(), buffers[-1].popleft()
+        if self._duration is not None:
+            self._times.popleft()
+        self._window.remove(self._oldest, values, price, volume)
+        self._oldest += 1
+
+    def _result(self, window: _Window) -> dict[str, Any]:
+        n = window.count
+        result: dict[str, Any] = {"count": n}
+        for f, s in zip(self._fields, window.stats):
+            result[f] = s.snapshot(n)
+        if self._vwap is not None:
+            result["vwap"] = window.pv / window.volume if window.volume else math.nan
+        if self._duration is not None and not math.isnan(window.start):
+            result["start"] = window.start
+            result["end"] = window.start + self._duration
+        return result
+
+    @property
+    def watermark(self) -> float:
+        return self._watermark
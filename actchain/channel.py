@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Channel(Generic[T]):
+    """Channel is an unbounded FIFO of items for a single consumer.
+
+    Every chainable has one consumer of its events, its own run loop, so the
+    channel keeps only what that needs: a deque and the future of the consumer
+    while it waits for an item. Unlike asyncio.Queue there is no queue of getters
+    to wake in turn nor accounting of unfinished items. Producers may be any code
+    on the event loop of the consumer; bounds are enforced by the chainable.
+
+    An item put while the consumer waits stays in the channel until the consumer
+    takes it, so it is not lost if the consumer is cancelled in between.
+    """
+
+    __slots__ = ("_items", "_waiter")
+
+    def __init__(self) -> None:
+        self._items: deque[T] = deque()
+        self._waiter: asyncio.Future | None = None
+
+    def put(self, item: T) -> None:
+        """Append an item and wake the consumer if it is waiting."""
+        self._items.append(item)
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def get(self) -> T:
+        """Wait for an item and take it.
+
+        Raises:
+            RuntimeError: If another consumer is already waiting.
+        """
+        items = self._items
+        while not items:
+            if self._waiter is not None:
+                raise RuntimeError("Channel supports only a single consumer")
+            waiter = self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await waiter
+            finally:
+                if self._waiter is waiter:
+                    self._waiter = None
+        return items.popleft()
+
+    def get_nowait(self) -> T:
+        """Take an item without waiting. Raises asyncio.QueueEmpty if empty."""
+        if not self._items:
+            raise asyncio.QueueEmpty
+        return self._items.popleft()
+
+    def drain(self, max_items: int | None = None) -> list[T]:
+        """Take up to `max_items` items (all by default) without waiting."""
+        items = self._items
+        if max_items is None or max_items >= len(items):
+            drained = list(items)
+            items.clear()
+            return drained
+        return [items.popleft() for _ in range(max_items)]
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class BroadcastRing(Generic[T]):
+    """BroadcastRing is a bounded ring of items written once for many readers.
+
+    Items are numbered from 1, and each reader keeps its own cursor, the number of
+    the next item it reads, so writing costs the same however many readers there
+    are. The writer never waits: item `seq` overwrites item `seq - capacity`, and
+    readers more than `capacity` items behind have lost items.
+
+    Readers waiting for an item share a single future, resolved by the next write.
+
+    Args:
+        capacity (int): Number of items the ring holds.
+    """
+
+    __slots__ = ("_slots", "_capacity", "_seq", "_signal")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, not {capacity}")
+        self._slots: list[T | None] = [None] * capacity
+        self._capacity = capacity
+        self._seq = 0
+        self._signal: asyncio.Future | None = None
+
+    def write(self, item: T) -> int:
+        """Write an item, wake the waiting readers and return its number."""
+        seq = self._seq + 1
+        self._slots[seq % self._capacity] = item
+        self._seq = seq
+        signal = self._signal
+        if signal is not None:
+            self._signal = None
+            signal.set_result(None)
+        return seq
+
+    def read(self, seq: int) -> T:
+        """Read item `seq`, which must be in [oldest_seq, latest_seq]."""
+        return self._slots[seq % self._capacity]  # type: ignore[return-value]
+
+    def signal(self) -> asyncio.Future:
+        """Return the future resolved by the next write."""
+        if self._signal is None:
+            self._signal = asyncio.get_running_loop().create_future()
+        return self._signal
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def latest_seq(self) -> int:
+        """Number of the last item written. 0 if none."""
+        return self._seq
+
+    @property
+    def oldest_seq(self) -> int:
+        """Number of the oldest item still in the ring."""
+        return max(self._seq - self._capacity + 1, 1)
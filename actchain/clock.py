@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import selectors
+import time as _time
+from abc import ABCMeta, abstractmethod
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+class Clock(metaclass=ABCMeta):
+    """Clock is the source of time for actchain and the applications built on it.
+
+    Read the time with the functions of this module (`time`, `monotonic`, ...),
+    which follow the clock set by `set_clock`, instead of the time module.
+    """
+
+    @abstractmethod
+    def time(self) -> float:
+        """Return the wall-clock time in seconds since the epoch."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def time_ns(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        """Return the monotonic time in seconds."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def monotonic_ns(self) -> int:
+        raise NotImplementedError
+
+    async def sleep(self, delay: float) -> None:
+        """Sleep for `delay` seconds of this clock."""
+        await asyncio.sleep(delay)
+
+    def call_at(self, when: float, callback: Callable[[], Any]) -> asyncio.TimerHandle:
+        """Schedule `callback` on the running loop at the monotonic time `when`."""
+        loop = asyncio.get_running_loop()
+        return loop.call_later(max(when - self.monotonic(), 0), callback)
+
+
+class SystemClock(Clock):
+    """SystemClock reads the time of the system."""
+
+    def time(self) -> float:
+        return _time.time()
+
+    def time_ns(self) -> int:
+        return _time.time_ns()
+
+    def monotonic(self) -> float:
+        return _time.monotonic()
+
+    def monotonic_ns(self) -> int:
+        return _time.monotonic_ns()
+
+
+class LoopClock(Clock):
+    """LoopClock reads the time of an event loop.
+
+    With a VirtualTimeEventLoop, the time advances only when the loop jumps to its
+    next timer.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): Event loop to read the time of.
+        epoch (float, optional): Wall-clock time at the loop time 0. Defaults to the
+            current wall-clock time minus the loop time.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, epoch: float | None = None):
+        self._loop = loop
+        self._epoch = _time.time() - loop.time() if epoch is None else epoch
+
+    def time(self) -> float:
+        return self._epoch + self._loop.time()
+
+    def time_ns(self) -> int:
+        return int(self.time() * 1e9)
+
+    def monotonic(self) -> float:
+        return self._loop.time()
+
+    def monotonic_ns(self) -> int:
+        return int(self._loop.time() * 1e9)
+
+    def call_at(self, when: float, callback: Callable[[], Any]) -> asyncio.TimerHandle:
+        return self._loop.call_at(when, callback)
+
+
+class _VirtualTimeSelector(selectors.BaseSelector):
+    """Selector advancing the time of the loop instead of waiting for timers."""
+
+    def __init__(self, loop: VirtualTimeEventLoop):
+        self._selector = selectors.DefaultSelector()
+        self._loop = loop
+
+    def select(self, timeout: float | None = None) -> list:
+        if timeout is None or timeout <= 0:
+            # タイマーがなければ実際のI/O（スレッドからの通知など）を待つ
+            return self._selector.select(timeout)
+        events = self._selector.select(0)
+        if not events:
+            self._loop._time += timeout
+        return events
+
+    def register(self, fileobj: Any, events: int, data: Any = None) -> Any:
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj: Any) -> Any:
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj: Any, events: int, data: Any = None) -> Any:
+        return self._selector.modify(fileobj, events, data)
+
+    def close(self) -> None:
+        self._selector.close()
+
+    def get_map(self) -> Any:
+        return self._selector.get_map()
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """VirtualTimeEventLoop is an event loop whose time jumps to the next timer.
+
+    When there is nothing to run but timers, the loop advances its time to the
+    earliest timer instead of waiting for it, so `asyncio.sleep` and timeouts take
+    no real time and runs are deterministic. Real I/O ready at that moment is
+    handled first. With no timers, the loop waits for real I/O as usual.
+
+    Work in threads and processes is not accounted for: the time may jump past
+    timers while it runs.
+
+    Args:
+        start (float): Loop time to start at.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._time = start
+        super(VirtualTimeEventLoop, self).__init__(_VirtualTimeSelector(self))
+
+    def time(self) -> float:
+        return self._time
+
+
+_clock: Clock = SystemClock()
+time: Callable[[], float] = _clock.time
+time_ns: Callable[[], int] = _clock.time_ns
+monotonic: Callable[[], float] = _clock.monotonic
+monotonic_ns: Callable[[], int] = _clock.monotonic_ns
+sleep: Callable[[float], Awaitable[None]] = _clock.sleep
+call_at: Callable[[float, Callable[[], Any]], asyncio.TimerHandle] = _clock.call_at
+
+
+def set_clock(clock: Clock) -> None:
+    """Set the clock actchain and the functions of this module read."""
+    global _clock, time, time_ns, monotonic, monotonic_ns, sleep, call_at
+    _clock = clock
+    # 呼び出しごとの間接参照を避けるためにメソッドを直接束縛する
+    time = clock.time
+    time_ns = clock.time_ns
+    monotonic = clock.monotonic
+    monotonic_ns = clock.monotonic_ns
+    sleep = clock.sleep
+    call_at = clock.call_at
+
+
+def get_clock() -> Clock:
+    return _clock
+
+
+def run_virtual(main: Coroutine[Any, Any, T], *, epoch: float | None = None) -> T:
+    """Run `main` on a VirtualTimeEventLoop with a LoopClock of it, like asyncio.run.
+
+    The clock is restored when `main` finishes.
+
+    Args:
+        main (Coroutine): Coroutine to run.
+        epoch (float, optional): Wall-clock time the run starts at. Defaults to the
+            current wall-clock time.
+    """
+    loop = VirtualTimeEventLoop()
+    previous = _clock
+    set_clock(LoopClock(loop, epoch=_time.time() if epoch is None else epoch))
+    try:
+        with asyncio.Runner(loop_factory=lambda: loop) as runner:
+            return runner.run(main)
+    finally:
+        set_clock(previous)
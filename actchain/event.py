@@ -1,4 +1,3 @@
-from dataclasses import dataclass
 from typing import Any, Generic, Mapping, TypeAlias, TypeVar
 
 TDefaultEventData: TypeAlias = Mapping[Any, Any]
@@ -7,17 +6,64 @@ TReceiveEventData = TypeVar("TReceiveEventData", bound=TDefaultEventData)
 TSendEventData = TypeVar("TSendEventData", bound=TDefaultEventData)
 
 
-@dataclass
 class Event(Generic[TEventData]):
-    """Event is a dataclass that represents an event.
+    """Event is a slotted object that represents an event.
+
+    Only `name` and `data` take part in equality; the rest is metadata, filled by
+    `Chainable.to_event`. An event created directly gets its `ts` when it is first
+    triggered to a chainable.
 
     Args:
         name (str): Name of the event.
         data (TEventData): Data of the event.
+        ts (int): Monotonic creation time in nanoseconds (see actchain.clock). 0 if
+            not set yet.
+        seq (int): Sequence number of the event within its source.
+        parent (tuple[str, int], optional): Id of the event that caused this event.
+        trace_id (int): Id of the trace the event belongs to. 0 if not traced.
     """
 
-    name: str
-    data: TEventData
+    # parentはタプルを作らずに済むよう名前とseqに分けて持つ
+    __slots__ = ("name", "data", "ts", "seq", "_parent_name", "_parent_seq", "trace_id")
+
+    def __init__(
+        self,
+        name: str,
+        data: TEventData,
+        ts: int = 0,
+        seq: int = 0,
+        parent: tuple[str, int] | None = None,
+        trace_id: int = 0,
+    ):
+        self.name = name
+        self.data = data
+        self.ts = ts
+        self.seq = seq
+        if parent is None:
+            self._parent_name: str | None = None
+            self._parent_seq = 0
+        else:
+            self._parent_name, self._parent_seq = parent
+        self.trace_id = trace_id
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.name == other.name and self.data == other.data  # type: ignore
+
+    __hash__ = None  # type: ignore[assignment]
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name}/{self.data})"
+
+    @property
+    def parent(self) -> tuple[str, int] | None:
+        """Id of the event that caused this event, or None if it started a flow."""
+        if self._parent_name is None:
+            return None
+        return self._parent_name, self._parent_seq
+
+    @property
+    def id(self) -> tuple[str, int]:
+        """Id of the event, a pair of the source name and the sequence number."""
+        return self.name, self.seq
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal
+
+from actchain import clock
+from actchain.shm import PickleSerializer, Serializer
+
+# レコード: レコード全体の長さ, 時刻(ns), seq, 名前の長さ。続けて名前とペイロード
+_RECORD_HEADER = struct.Struct("<IqQH")
+# インデックス: 時刻(ns), セグメント内のオフセット
+_INDEX_ENTRY = struct.Struct("<qQ")
+_SEGMENT_SUFFIX = ".log"
+_INDEX_SUFFIX = ".idx"
+
+
+@dataclass(slots=True, frozen=True)
+class LogRecord:
+    """LogRecord is an event read from an event log.
+
+    Args:
+        name (str): Name of the event.
+        ts (int): Wall-clock time the event was recorded at in nanoseconds.
+        seq (int): Sequence number of the event within its source.
+        data (Any): Data of the event.
+    """
+
+    name: str
+    ts: int
+    seq: int
+    data: Any
+
+
+def _segment_paths(path: Path) -> list[Path]:
+    return sorted(path.glob(f"*{_SEGMENT_SUFFIX}"))
+
+
+class EventLogWriter:
+    """EventLogWriter appends events to segmented log files in a directory.
+
+    Records are buffered in memory and written to the current segment in batches of
+    `flush_size` bytes, or by `flush`. A segment is closed and a new one started
+    when it would exceed `segment_size`. Each segment comes with a sparse index of
+    the time and the offset of a record every `index_interval` bytes, which
+    EventLogReader uses to find a time range. Record times never go backwards
+    within a log.
+
+    With `background`, files are written, fsynced and rolled by a dedicated thread:
+    `append` and `flush` only encode records and hand batches to it, so that an
+    event loop calling them does not wait for the disk. Errors of the thread are
+    raised by the next call. `close` waits for the thread.
+
+    Each writer starts a new segment, so that it never appends to a segment left
+    behind by a crash.
+
+    Args:
+        path (str | Path): Directory of the log. Created if missing.
+        serializer (Serializer, optional): Serializer of event data. Defaults to
+            PickleSerializer.
+        segment_size (int): Maximum size of a segment in bytes.
+        flush_size (int): Size of the write buffer in bytes.
+        index_interval (int): Bytes of records between index entries.
+        fsync (str): When to fsync written data: "never", on every "flush", or at
+            most every `fsync_interval` seconds on flushes ("interval").
+        fsync_interval (float): Seconds between fsyncs for the "interval" policy.
+        background (bool): Whether to do file I/O in a dedicated thread.
+    """
+
+    class FsyncPolicy(StrEnum):
+        NEVER = "never"
+        FLUSH = "flush"
+        INTERVAL = "interval"
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        serializer: Serializer | None = None,
+        segment_size: int = 64 * 1024 * 1024,
+        flush_size: int = 64 * 1024,
+        index_interval: int = 4096,
+        fsync: Literal["never", "flush", "interval"] = "interval",
+        fsync_interval: float = 1.0,
+        background: bool = False,
+    ):
+        self._path = Path(path)
+        self._serializer = serializer or PickleSerializer()
+        self._segment_size = segment_size
+        self._flush_size = flush_size
+        self._index_interval = index_interval
+        self._fsync = self.FsyncPolicy(fsync)
+        self._fsync_interval = fsync_interval
+        self._background = background
+        self._buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._open = False
+        self._number = 0
+        self._segment_offset = 0
+        self._next_index_offset = 0
+        self._last_ts = 0
+        self._names: dict[str, bytes] = {}
+        # 以下はファイルを扱うスレッドだけが触る
+        self._segment: Any = None
+        self._index: Any = None
+        self._last_fsync = 0.0
+        self._executor: ThreadPoolExecutor | None = None
+        self._last_io: Future | None = None
+        self._error: BaseException | None = None
+
+    def append(self, name: str, seq: int, data: Any, ts: int | None = None) -> None:
+        """Append an event. `ts` defaults to the current wall-clock time."""
+        name_bytes = self._names.get(name)
+        if name_bytes is None:
+            name_bytes = self._names[name] = name.encode()
+        payload = self._serializer.dumps(data)
+        length = _RECORD_HEADER.size + len(name_bytes) + len(payload)
+        if not self._open or (
+            self._segment_offset > 0
+            and self._segment_offset + length > self._segment_size
+        ):
+            self._roll()
+        ts = max(clock.time_ns() if ts is None else ts, self._last_ts)
+        self._last_ts = ts
+        if self._segment_offset >= self._next_index_offset:
+            self._index_buffer += _INDEX_ENTRY.pack(ts, self._segment_offset)
+            self._next_index_offset = self._segment_offset + self._index_interval
+        buffer = self._buffer
+        buffer += _RECORD_HEADER.pack(length, ts, seq, len(name_bytes))
+        buffer += name_bytes
+        buffer += payload
+        self._segment_offset += length
+        if len(buffer) >= self._flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records to the segment, and fsync per the policy.
+
+        With `background`, the records are handed to the writer thread instead.
+        """
+        if not self._open:
+            return
+        if self._buffer or self._index_buffer:
+            records, index = bytes(self._buffer), bytes(self._index_buffer)
+            self._buffer.clear()
+            self._index_buffer.clear()
+        else:
+            records = index = b""
+        self._submit(self._write, records, index)
+
+    def close(self) -> None:
+        """Flush and close the current segment, and wait for the writer thread.
+
+        The next append starts a new segment.
+        """
+        if self._open:
+            self.flush()
+            self._submit(self._close_files)
+            self._open = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = self._last_io = None
+        self._raise_error()
+
+    def _roll(self) -> None:
+        if self._open:
+            self.flush()
+            self._submit(self._close_files)
+        if self._number == 0:
+            self._path.mkdir(parents=True, exist_ok=True)
+            segments = _segment_paths(self._path)
+            self._number = int(segments[-1].stem) if segments else 0
+        self._number += 1
+        self._submit(self._open_files, self._path / f"{self._number:08d}")
+        self._open = True
+        self._segment_offset = 0
+        self._next_index_offset = 0
+
+    def _submit(self, fn: Callable[..., None], *args: Any) -> None:
+        self._raise_error()
+        if not self._background:
+            fn(*args)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="actchain-eventlog"
+            )
+        # ワーカーは1つなので投入した順に実行される
+        self._last_io = self._executor.submit(self._run_io, fn, *args)
+
+    def _run_io(self, fn: Callable[..., None], *args: Any) -> None:
+        if self._error is not None:
+            return
+        try:
+            fn(*args)
+        except BaseException as e:
+            self._error = e
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _open_files(self, stem: Path) -> None:
+        # バッファリングは自前で行うのでファイル側ではしない
+        self._segment = open(stem.with_suffix(_SEGMENT_SUFFIX), "xb", buffering=0)
+        self._index = open(stem.with_suffix(_INDEX_SUFFIX), "xb", buffering=0)
+
+    def _write(self, records: bytes, index: bytes) -> None:
+        if records:
+            self._segment.write(records)
+        if index:
+            self._index.write(index)
+        if self._fsync == self.FsyncPolicy.NEVER:
+            return
+        now = time.monotonic()
+        if (
+            self._fsync == self.FsyncPolicy.FLUSH
+            or now - self._last_fsync >= self._fsync_interval
+        ):
+            os.fsync(self._segment.fileno())
+            os.fsync(self._index.fileno())
+            self._last_fsync = now
+
+    def _close_files(self) -> None:
+        if self._fsync != self.FsyncPolicy.NEVER:
+            os.fsync(self._segment.fileno())
+            os.fsync(self._index.fileno())
+        self._segment.close()
+        self._index.close()
+        self._segment = self._index = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def background(self) -> bool:
+        return self._background
+
+
+class EventLogReader:
+    """EventLogReader reads events from an event log written by EventLogWriter.
+
+    Segments are memory-mapped, and the index is used to start reading a time range
+    near its start instead of at the beginning. A segment being written is read up
+    to its last complete record.
+
+    Args:
+        path (str | Path): Directory of the log.
+        serializer (Serializer, optional): Serializer of event data. Must match the
+            one of the writer. Defaults to PickleSerializer.
+    """
+
+    def __init__(self, path: str | Path, *, serializer: Serializer | None = None):
+        self._path = Path(path)
+        self._serializer = serializer or PickleSerializer()
+
+    def read(
+        self, start: int | None = None, end: int | None = None
+    ) -> Iterator[LogRecord]:
+        """Iterate over the events recorded in [start, end) in nanoseconds."""
+        segments = self.segments()
+        indexes = [self._read_index(s) for s in segments]
+        for i, segment in enumerate(segments):
+            ts_list, offsets = indexes[i]
+            if not ts_list:
+                continue
+            if end is not None and ts_list[0] >= end:
+                return
+            # 次のセグメントがstartより前から始まるなら、このセグメントは読まない
+            if start is not None and i + 1 < len(indexes):
+                next_ts = indexes[i + 1][0]
+                if next_ts and next_ts[0] < start:
+                    continue
+            offset = 0
+            if start is not None:
+                k = bisect_left(ts_list, start)
+                offset = offsets[k - 1] if k > 0 else 0
+            yield from self._read_segment(segment, offset, start, end)
+
+    def segments(self) -> list[Path]:
+        """Return the paths of the segments in order."""
+        return _segment_paths(self._path)
+
+    @staticmethod
+    def _read_index(segment: Path) -> tuple[list[int], list[int]]:
+        """Return the times and the offsets in the index of `segment`."""
+        index = segment.with_suffix(_INDEX_SUFFIX)
+        data = index.read_bytes() if index.exists() else b""
+        # 書き込み途中のエントリは無視する
+        data = data[: len(data) // _INDEX_ENTRY.size * _INDEX_ENTRY.size]
+        entries = list(_INDEX_ENTRY.iter_unpack(data))
+        return [ts for ts, _ in entries], [offset for _, offset in entries]
+
+    def _read_segment(
+        self, segment: Path, offset: int, start: int | None, end: int | None
+    ) -> Iterator[LogRecord]:
+        with open(segment, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = _RECORD_HEADER
+            loads = self._serializer.loads
+            while offset + header.size <= size:
+                length, ts, seq, name_length = header.unpack_from(mm, offset)
+                if offset + length > size:
+                    break
+                if end is not None and ts >= end:
+                    return
+                if start is None or ts >= start:
+                    name_start = offset + header.size
+                    payload_start = name_start + name_length
+                    yield LogRecord(
+                        mm[name_start:payload_start].decode(),
+                        ts,
+                        seq,
+                        loads(mm[payload_start : offset + length]),
+                    )
+                offset += length
+        finally:
+            mm.close()
@@ -21,6 +21,18 @@ class EventHandleError(ActchainError):
     pass
 
 
+class BatchHandleError(EventHandleError):
+    """Raised when a batch of events is failed to be handled.
+
+    The first event of the batch is the argument of the exception, like
+    EventHandleError, and the whole batch is kept in `events`.
+    """
+
+    def __init__(self, events: list):
+        super(BatchHandleError, self).__init__(events[0])
+        self.events = events
+
+
 class ChainableAlreadyRunningError(ActchainError):
     """Raised when a chainable is already running."""
 
@@ -31,3 +43,30 @@ class UnsupportedOperationError(ActchainError):
     """Raised when an unsupported operation is attempted."""
 
     pass
+
+
+class QueueOverflowError(ActchainError):
+    """Raised when an event is triggered to a chainable whose queue is full."""
+
+    pass
+
+
+class ThrottledError(ActchainError):
+    """Raised by a handler when the downstream asked to slow down (e.g. HTTP 429).
+
+    Chains with a concurrency limiter back off on it and drop the event.
+    """
+
+    pass
+
+
+class ProcessExitedError(ActchainError):
+    """Raised when the child process of a ProcessFlow exits while it is running."""
+
+    pass
+
+
+class OverrunError(ActchainError):
+    """Raised when a reader of a ring falls behind and its messages are overwritten."""
+
+    pass
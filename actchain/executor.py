@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+# 同期関数をイベントループの外で実行する共有スレッドプール。最初に使うときに作る
+_executor: ThreadPoolExecutor | None = None
+_max_workers: int | None = None
+
+
+def configure(max_workers: int | None = None) -> None:
+    """Configure the shared thread pool running offloaded sync functions.
+
+    The current pool, if any, is shut down after its running calls finish, and a new
+    one is created on next use.
+
+    Args:
+        max_workers (int, optional): Number of threads. Defaults to the default of
+            ThreadPoolExecutor.
+    """
+    global _max_workers
+    _max_workers = max_workers
+    shutdown()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool, creating it if needed."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(_max_workers, thread_name_prefix="actchain")
+    return _executor
+
+
+def shutdown(wait: bool = True) -> None:
+    """Shut down the shared thread pool."""
+    global _executor
+    if _executor is None:
+        return
+    _executor.shutdown(wait=wait)
+    _executor = None
@@ -15,27 +15,52 @@ from typing import (
 )
 
 from actchain.chains import (
+    BatchFunctionChain,
     ConcurrentFunctionChain,
     ExclusiveFunctionChain,
     FunctionChain,
+    ProcessFunctionChain,
 )
 from actchain.event import Event, TDefaultEventData, TReceiveEventData, TSendEventData
 from actchain.exceptions import InvalidOverrideError
+from actchain.executor import get_executor
+from actchain.limiter import Limiter
 
 
 class Function(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
+    """Function handles an event and returns data to emit.
+
+    Args:
+        fn (Callable, optional): Sync or async callable handling an event. Subclasses
+            override `handle` instead.
+        layered (bool): Whether the returned data holds only the keys the function
+            adds. If true, chains stack the returned data on the received payload
+            as a LayeredData view instead of the function copying it.
+        offload (bool): Whether to run a sync `fn` in the shared thread pool (see
+            `actchain.executor`) instead of on the event loop. Use it for blocking
+            calls such as REST clients or file writes. Ignored for async `fn`.
+    """
+
     @overload
-    def __init__(self):
+    def __init__(self, *, layered: bool = False, offload: bool = False):
         ...
 
     @overload
-    def __init__(self: Function[TDefaultEventData, TDefaultEventData]):
+    def __init__(
+        self: Function[TDefaultEventData, TDefaultEventData],
+        *,
+        layered: bool = False,
+        offload: bool = False,
+    ):
         ...
 
     @overload
     def __init__(
         self: Function[TReceiveEventData, TSendEventData],
         fn: Callable[[Event[TReceiveEventData]], TSendEventData | None],
+        *,
+        layered: bool = False,
+        offload: bool = False,
     ):
         ...
 
@@ -45,6 +70,9 @@ class Function(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
         fn: Callable[
             [Event[TReceiveEventData]], Coroutine[Any, Any, TSendEventData | None]
         ],
+        *,
+        layered: bool = False,
+        offload: bool = False,
     ):
         ...
 
@@ -59,56 +87,152 @@ class Function(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
                 ],
             ]
         ] = None,
+        *,
+        layered: bool = False,
+        offload: bool = False,
     ):
         self._fn = fn
+        self._layered = layered
+        self._offload = offload
+        # 同期・非同期の判定はイベントごとではなく生成時に一度だけ行う
+        self._fn_is_async = asyncio.iscoroutinefunction(fn)
 
     async def handle(self, event: Event[TReceiveEventData]) -> TSendEventData | None:
         assert self._fn is not None, "Function is not defined."
-        if asyncio.iscoroutinefunction(self._fn):
-            return await self._fn(event)
+        if self._fn_is_async:
+            return await cast(
+                Coroutine[Any, Any, TSendEventData | None], self._fn(event)
+            )
+        elif self._offload:
+            fn = cast(
+                Callable[[Event[TReceiveEventData]], TSendEventData | None], self._fn
+            )
+            return await asyncio.get_running_loop().run_in_executor(
+                get_executor(), fn, event
+            )
         else:
             return cast(TSendEventData | None, self._fn(event))
 
-    @overload
-    def as_chain(self) -> FunctionChain[TReceiveEventData, TSendEventData]:
-        ...
+    async def handle_batch(
+        self, events: list[Event[TReceiveEventData]]
+    ) -> list[TSendEventData | None]:
+        """Handle a batch of events and return one result per event, in order.
 
-    @overload
-    def as_chain(self, name: str) -> FunctionChain[TReceiveEventData, TSendEventData]:
-        ...
+        Used by BatchFunctionChain. Override this to process a batch at once (e.g.
+        with vectorized computation); by default events are handled one by one.
+        """
+        return [await self.handle(event) for event in events]
+
+    @property
+    def layered(self) -> bool:
+        return self._layered
+
+    @property
+    def offload(self) -> bool:
+        return self._offload
 
     @overload
     def as_chain(
-        self, *, chain_type: Literal["function"]
+        self,
+        name: str | None = None,
+        chain_type: Literal["function"] = "function",
+        *,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
     ) -> FunctionChain[TReceiveEventData, TSendEventData]:
         ...
 
     @overload
     def as_chain(
-        self, *, chain_type: Literal["concurrent"]
+        self,
+        name: str | None = None,
+        *,
+        chain_type: Literal["concurrent"],
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+        max_concurrency: int | Limiter | None = None,
+        ordered: bool = False,
     ) -> ConcurrentFunctionChain[TReceiveEventData, TSendEventData]:
         ...
 
     @overload
     def as_chain(
-        self, *, chain_type: Literal["exclusive"]
+        self,
+        name: str | None = None,
+        *,
+        chain_type: Literal["exclusive"],
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+        mode: Literal["drop", "latest", "restart"] = "drop",
     ) -> ExclusiveFunctionChain[TReceiveEventData, TSendEventData]:
         ...
 
     @overload
     def as_chain(
-        self, name: str, chain_type: Literal["exclusive"]
+        self,
+        name: str,
+        chain_type: Literal["exclusive"],
+        *,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+        mode: Literal["drop", "latest", "restart"] = "drop",
     ) -> ExclusiveFunctionChain[TReceiveEventData, TSendEventData]:
         ...
 
+    @overload
+    def as_chain(
+        self,
+        name: str | None = None,
+        *,
+        chain_type: Literal["batch"],
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        batch_size: int = 64,
+        max_wait: float = 0.0,
+    ) -> BatchFunctionChain[TReceiveEventData, TSendEventData]:
+        ...
+
+    @overload
+    def as_chain(
+        self,
+        name: str | None = None,
+        *,
+        chain_type: Literal["process"],
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+        workers: int | None = None,
+        max_concurrency: int | Limiter | None = None,
+        ordered: bool = True,
+    ) -> ProcessFunctionChain[TReceiveEventData, TSendEventData]:
+        ...
+
     def as_chain(
         self,
         name: str | None = None,
-        chain_type: Literal["function", "concurrent", "exclusive"] = "function",
+        chain_type: Literal[
+            "function", "concurrent", "exclusive", "batch", "process"
+        ] = "function",
+        *,
+        maxsize: int | None = None,
+        overflow: Literal["block", "drop_newest", "drop_oldest", "raise"] | None = None,
+        input: Literal["all", "latest", "latest_by_name"] = "all",
+        batch_size: int = 64,
+        max_wait: float = 0.0,
+        workers: int | None = None,
+        max_concurrency: int | Limiter | None = None,
+        ordered: bool | None = None,
+        mode: Literal["drop", "latest", "restart"] = "drop",
     ) -> (
         FunctionChain[TReceiveEventData, TSendEventData]
         | ConcurrentFunctionChain[TReceiveEventData, TSendEventData]
         | ExclusiveFunctionChain[TReceiveEventData, TSendEventData]
+        | BatchFunctionChain[TReceiveEventData, TSendEventData]
+        | ProcessFunctionChain[TReceiveEventData, TSendEventData]
     ):
         if name is None:
             if self._fn is not None:
@@ -120,10 +244,44 @@ class Function(Generic[TReceiveEventData, TSendEventData], metaclass=ABCMeta):
             raise InvalidOverrideError("Function is not a coroutine function.")
 
         if chain_type.startswith("function"):
-            return FunctionChain(name, self)
+            return FunctionChain(
+                name, self, maxsize=maxsize, overflow=overflow, input=input
+            )
         elif chain_type.startswith("concurrent"):
-            return ConcurrentFunctionChain(name, self)
+            return ConcurrentFunctionChain(
+                name,
+                self,
+                max_concurrency=max_concurrency,
+                ordered=bool(ordered),
+                maxsize=maxsize,
+                overflow=overflow,
+                input=input,
+            )
         elif chain_type.startswith("exclusive"):
-            return ExclusiveFunctionChain(name, self)
+            return ExclusiveFunctionChain(
+                name, self, mode=mode, maxsize=maxsize, overflow=overflow, input=input
+            )
+        elif chain_type.startswith("batch"):
+            if not asyncio.iscoroutinefunction(self.handle_batch):
+                raise InvalidOverrideError("handle_batch is not a coroutine function.")
+            return BatchFunctionChain(
+                name,
+                self,
+                batch_size=batch_size,
+                max_wait=max_wait,
+                maxsize=maxsize,
+                overflow=overflow,
+            )
+        elif chain_type.startswith("process"):
+            return ProcessFunctionChain(
+                name,
+                self,
+                workers=workers,
+                max_concurrency=max_concurrency,
+                ordered=ordered is None or ordered,
+                maxsize=maxsize,
+                overflow=overflow,
+                input=input,
+            )
         else:
             raise ValueError(f"Unknown chain name: {chain_type}")
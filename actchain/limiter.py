@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from abc import ABCMeta, abstractmethod
+from collections import deque
+
+
+class Limiter(metaclass=ABCMeta):
+    """Limiter bounds the number of events handled at a time.
+
+    `acquire` waits until the number of events in flight is below the limit, and
+    `release` reports the latency and the outcome of the handling, from which
+    subclasses adjust the limit.
+
+    Args:
+        initial_limit (int): Limit to start with.
+        min_limit (int): Lower bound of the limit.
+        max_limit (int): Upper bound of the limit.
+    """
+
+    def __init__(self, initial_limit: int, *, min_limit: int = 1, max_limit: int = 256):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "1 <= min_limit <= initial_limit <= max_limit must hold, not "
+                f"{min_limit}, {initial_limit}, {max_limit}"
+            )
+        self._estimate = float(initial_limit)
+        self._limit = initial_limit
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot and take it."""
+        while self._in_flight >= self._limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 起こされた後にキャンセルされた場合は他の待ち手に譲る
+                self._wake()
+                raise
+        self._in_flight += 1
+
+    def release(self, latency_ns: int, error: bool = False) -> None:
+        """Free a slot and update the limit with the result of the handling.
+
+        Args:
+            latency_ns (int): Time the handling took in nanoseconds.
+            error (bool): Whether the handling failed or was throttled.
+        """
+        self._update(latency_ns, error, self._in_flight)
+        self._in_flight -= 1
+        self._wake()
+
+    def abandon(self) -> None:
+        """Free a slot taken without handling anything."""
+        self._in_flight -= 1
+        self._wake()
+
+    @abstractmethod
+    def _update(self, latency_ns: int, error: bool, in_flight: int) -> None:
+        raise NotImplementedError
+
+    def _set_estimate(self, estimate: float) -> None:
+        self._estimate = min(max(estimate, self._min_limit), self._max_limit)
+        self._limit = int(self._estimate)
+
+    def _wake(self) -> None:
+        n = self._limit - self._in_flight
+        while n > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                n -= 1
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+
+class FixedLimiter(Limiter):
+    """FixedLimiter keeps the limit constant.
+
+    Args:
+        limit (int): Maximum number of events handled at a time.
+    """
+
+    def __init__(self, limit: int):
+        super(FixedLimiter, self).__init__(limit, min_limit=limit, max_limit=limit)
+
+    def _update(self, latency_ns: int, error: bool, in_flight: int) -> None:
+        pass
+
+
+class AIMDLimiter(Limiter):
+    """AIMDLimiter adjusts the limit by additive increase / multiplicative decrease.
+
+    The limit grows by about one per `limit` successful handlings while it is in use,
+    and is multiplied by `backoff_ratio` on an error, a throttle or a handling slower
+    than `latency_threshold`.
+
+    Args:
+        initial_limit (int): Limit to start with.
+        min_limit (int): Lower bound of the limit.
+        max_limit (int): Upper bound of the limit.
+        backoff_ratio (float): Ratio the limit is multiplied by on backoff.
+        latency_threshold (float, optional): Latency in seconds regarded as overload.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        backoff_ratio: float = 0.9,
+        latency_threshold: float | None = None,
+    ):
+        super(AIMDLimiter, self).__init__(
+            initial_limit, min_limit=min_limit, max_limit=max_limit
+        )
+        if not 0 < backoff_ratio < 1:
+            raise ValueError(f"backoff_ratio must be in (0, 1), not {backoff_ratio}")
+        self._backoff_ratio = backoff_ratio
+        self._latency_threshold_ns = (
+            None if latency_threshold is None else int(latency_threshold * 1e9)
+        )
+
+    def _update(self, latency_ns: int, error: bool, in_flight: int) -> None:
+        threshold = self._latency_threshold_ns
+        if error or (threshold is not None and latency_ns > threshold):
+            self._set_estimate(self._estimate * self._backoff_ratio)
+        elif in_flight * 2 >= self._limit:
+            # 上限まで使われていないときに増やしても意味がない
+            self._set_estimate(self._estimate + 1 / self._estimate)
+
+
+class GradientLimiter(Limiter):
+    """GradientLimiter adjusts the limit by the gradient of the handling latency.
+
+    The limit is scaled by the ratio of the long-term average latency to the latest
+    latency, so it shrinks as soon as handlings slow down (queueing at the
+    downstream) and grows while latency stays at its baseline. Errors and throttles
+    multiply the limit by `backoff_ratio`.
+
+    Args:
+        initial_limit (int): Limit to start with.
+        min_limit (int): Lower bound of the limit.
+        max_limit (int): Upper bound of the limit.
+        tolerance (float): Ratio of latency increase tolerated before shrinking.
+        smoothing (float): Weight of a new estimate in the limit.
+        long_window (int): Number of samples the long-term latency averages over.
+        backoff_ratio (float): Ratio the limit is multiplied by on an error.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+        backoff_ratio: float = 0.9,
+    ):
+        super(GradientLimiter, self).__init__(
+            initial_limit, min_limit=min_limit, max_limit=max_limit
+        )
+        self._tolerance = tolerance
+        self._smoothing = smoothing
+        self._alpha = 2 / (long_window + 1)
+        self._backoff_ratio = backoff_ratio
+        self._long_latency = 0.0
+
+    def _update(self, latency_ns: int, error: bool, in_flight: int) -> None:
+        if error:
+            self._set_estimate(self._estimate * self._backoff_ratio)
+            return
+        latency = max(latency_ns, 1)
+        if self._long_latency == 0:
+            self._long_latency = latency
+        else:
+            self._long_latency += self._alpha * (latency - self._long_latency)
+            if self._long_latency / latency > 2:
+                # 過負荷からの回復中は基準のレイテンシを速めに下げる
+                self._long_latency *= 0.9
+
+        gradient = max(0.5, min(1.0, self._tolerance * self._long_latency / latency))
+        target = self._estimate * gradient + math.sqrt(self._estimate)
+        if target > self._estimate and in_flight * 2 < self._limit:
+            return
+        self._set_estimate(
+            self._estimate * (1 - self._smoothing) + target * self._smoothing
+        )
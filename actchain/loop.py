@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from abc import ABCMeta
-from typing import AsyncGenerator, Callable, Generic
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Collection, Generic, Literal
 
+from actchain import clock, tracing
 from actchain.chains import LoopChain
-from actchain.event import TSendEventData
-from actchain.exceptions import InvalidOverrideError
+from actchain.event import Event, TSendEventData
+from actchain.eventlog import EventLogReader
+from actchain.exceptions import InvalidOverrideError, OverrunError
+from actchain.shm import PickleSerializer, Serializer, ShmRing
+
+# ShmBroadcastLoopがバックオフを始める待ち時間
+_MIN_POLL_INTERVAL = 1e-5
 
 
 class Loop(Generic[TSendEventData], metaclass=ABCMeta):
@@ -36,3 +46,185 @@ class Loop(Generic[TSendEventData], metaclass=ABCMeta):
                 name = "loop"
 
         return LoopChain(name, self)
+
+
+class ShmBroadcastLoop(Loop[Any]):
+    """ShmBroadcastLoop yields event data written by a ShmBroadcastChain.
+
+    Each loop reads the shared memory ring with its own cursor. When there is
+    nothing new, it keeps checking at every turn of the event loop for `spin`
+    seconds, then backs off, doubling the wait from 10 microseconds up to
+    `poll_interval`. Data following other data closely is read within a turn of the
+    event loop, while data arriving after a quiet period waits up to
+    `poll_interval`, which is the latency floor of an idle loop. If the loop falls
+    so far behind that data is overwritten, it either skips to the oldest data in
+    the ring or raises OverrunError. Skipped data is counted in `lost`.
+
+    Args:
+        shm_name (str): Name of the shared memory block of the ShmBroadcastChain.
+        serializer (Serializer, optional): Serializer of event data. Must match the
+            one of the writer. Defaults to PickleSerializer.
+        start (str): "latest" to yield data written after the loop starts, or
+            "earliest" to start from the oldest data in the ring.
+        on_overrun (str): "skip" or "raise".
+        poll_interval (float): Maximum seconds to wait before checking for new data
+            again.
+        spin (float): Seconds to keep checking at every turn of the event loop
+            before backing off.
+        attach_timeout (float, optional): Seconds to wait for the writer to create the
+            ring. Waits forever by default.
+    """
+
+    class OverrunPolicy(StrEnum):
+        SKIP = "skip"
+        RAISE = "raise"
+
+    def __init__(
+        self,
+        shm_name: str,
+        *,
+        serializer: Serializer | None = None,
+        start: Literal["latest", "earliest"] = "latest",
+        on_overrun: Literal["skip", "raise"] = "skip",
+        poll_interval: float = 0.001,
+        spin: float = 0.0002,
+        attach_timeout: float | None = None,
+    ):
+        super(ShmBroadcastLoop, self).__init__()
+        if start not in ("latest", "earliest"):
+            raise ValueError(f"start must be 'latest' or 'earliest', not {start}")
+        self._shm_name = shm_name
+        self._serializer = serializer or PickleSerializer()
+        self._start = start
+        self._on_overrun = self.OverrunPolicy(on_overrun)
+        self._poll_interval = poll_interval
+        self._spin = spin
+        self._attach_timeout = attach_timeout
+        self._lost = 0
+
+    async def loop(self) -> AsyncGenerator[Any, None]:
+        ring = await asyncio.wait_for(self._attach(), self._attach_timeout)
+        try:
+            seq = ring.oldest_seq if self._start == "earliest" else ring.latest_seq + 1
+            idle_since: float | None = None
+            delay = 0.0
+            while True:
+                try:
+                    payload = ring.read(seq)
+                except OverrunError:
+                    if self._on_overrun == self.OverrunPolicy.RAISE:
+                        raise
+                    oldest = ring.oldest_seq
+                    self._lost += oldest - seq
+                    seq = oldest
+                    continue
+                if payload is None:
+                    # スピンはCPUを使う時間なので、設定された時計ではなく実時間で測る
+                    now = time.monotonic()
+                    if idle_since is None:
+                        idle_since = now
+                    if now - idle_since < self._spin:
+                        await asyncio.sleep(0)
+                    else:
+                        delay = min(
+                            max(delay * 2, _MIN_POLL_INTERVAL), self._poll_interval
+                        )
+                        await asyncio.sleep(delay)
+                    continue
+                idle_since = None
+                delay = 0.0
+                seq += 1
+                yield self._serializer.loads(payload)
+        finally:
+            ring.close()
+
+    async def _attach(self) -> ShmRing:
+        while True:
+            try:
+                return ShmRing.attach(self._shm_name)
+            except (FileNotFoundError, ValueError):
+                # 書き手がまだ作っていないか、ヘッダーを書き込んでいる最中
+                await asyncio.sleep(self._poll_interval)
+
+    @property
+    def lost(self) -> int:
+        """Number of data skipped on overruns."""
+        return self._lost
+
+
+class ReplayLoop(Loop[Any]):
+    """ReplayLoop yields events recorded by a RecorderChain.
+
+    Each event has the recorded name, sequence number and data, and its chain emits
+    it as is, so that the next chains see the names of the recorded sources. Events
+    are sampled for tracing like the root events of a live flow.
+    Data is yielded at the recorded intervals divided by `speed`, or without waiting
+    at all if `speed` is None. Intervals are measured from the first event, so the
+    replay does not drift even if handling the data takes time. The log is read from
+    memory-mapped segments.
+
+    Args:
+        path (str | Path): Directory of the log.
+        speed (float, optional): Replay speed relative to the recording. None
+            replays as fast as possible.
+        names (Collection[str], optional): Names of the events to replay. All events
+            are replayed by default.
+        start (int, optional): Wall-clock time in nanoseconds to replay from.
+        end (int, optional): Wall-clock time in nanoseconds to replay until.
+        serializer (Serializer, optional): Serializer of event data. Must match the
+            one of the recorder. Defaults to PickleSerializer.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        speed: float | None = 1.0,
+        names: Collection[str] | None = None,
+        start: int | None = None,
+        end: int | None = None,
+        serializer: Serializer | None = None,
+    ):
+        super(ReplayLoop, self).__init__()
+        if speed is not None and speed <= 0:
+            raise ValueError(f"speed must be > 0, not {speed}")
+        self._reader = EventLogReader(path, serializer=serializer)
+        self._speed = speed
+        self._names = None if names is None else frozenset(names)
+        self._start = start
+        self._end = end
+        self._replayed = 0
+
+    async def loop(self) -> AsyncGenerator[Event, None]:
+        origin: tuple[int, float] | None = None
+        for record in self._reader.read(self._start, self._end):
+            if self._names is not None and record.name not in self._names:
+                continue
+            if self._speed is None:
+                # 待たなくても他のタスクに順番を回す
+                await asyncio.sleep(0)
+            elif origin is None:
+                origin = (record.ts, clock.monotonic())
+            else:
+                at = origin[1] + (record.ts - origin[0]) / 1e9 / self._speed
+                delay = at - clock.monotonic()
+                if delay > 0:
+                    await clock.sleep(delay)
+            self._replayed += 1
+            # 起点のイベントとして、to_eventと同じようにトレースするかを決める
+            tracer = tracing.tracer
+            yield Event(
+                record.name,
+                record.data,
+                seq=record.seq,
+                trace_id=0 if tracer is None else tracer.start_trace(),
+            )
+
+    @property
+    def speed(self) -> float | None:
+        return self._speed
+
+    @property
+    def replayed(self) -> int:
+        """Number of events replayed."""
+        return self._replayed
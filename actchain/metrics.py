@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from actchain.chains.base import Chainable
+
+# bucket k holds durations d with d.bit_length() == k, i.e. [2**(k-1), 2**k) ns
+_N_BUCKETS = 64
+
+
+class Histogram:
+    """Histogram of durations in nanoseconds with pre-allocated power-of-two buckets.
+
+    Recording is O(1) and allocation free; percentiles are resolved to the upper
+    bound of the bucket they fall in.
+    """
+
+    __slots__ = ("_buckets", "_count", "_sum", "_max")
+
+    def __init__(self) -> None:
+        self._buckets = [0] * _N_BUCKETS
+        self._count = 0
+        self._sum = 0
+        self._max = 0
+
+    def record(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        self._buckets[min(ns.bit_length(), _N_BUCKETS - 1)] += 1
+        self._count += 1
+        self._sum += ns
+        if ns > self._max:
+            self._max = ns
+
+    def percentile(self, q: float) -> int:
+        """Return the upper bound of the bucket containing the q-th percentile."""
+        if self._count == 0:
+            return 0
+        rank = q / 100 * self._count
+        seen = 0
+        for k, n in enumerate(self._buckets):
+            seen += n
+            if seen >= rank and n > 0:
+                return min((1 << k) - 1, self._max)
+        return self._max
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self._count,
+            "mean_ns": self._sum / self._count if self._count else 0.0,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+            "max_ns": self._max,
+        }
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+
+class ChainMetrics:
+    """ChainMetrics records runtime metrics of a chainable.
+
+    Counters are updated for every event while enabled. Timings (queue wait and
+    handle time) are recorded for one in every `sample_every` events.
+
+    Args:
+        enabled (bool): Whether to record metrics.
+        sample_every (int): Sampling interval of timings.
+    """
+
+    __slots__ = (
+        "enabled",
+        "received",
+        "emitted",
+        "dropped",
+        "queue_high_water",
+        "queue_wait",
+        "handle_time",
+        "gauges",
+        "_sample_every",
+        "_wait_tick",
+        "_handle_tick",
+    )
+
+    def __init__(self, *, enabled: bool = True, sample_every: int = 1):
+        self.enabled = enabled
+        self.received = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.queue_high_water = 0
+        self.queue_wait = Histogram()
+        self.handle_time = Histogram()
+        self.gauges: dict[str, float] = {}
+        self.sample_every = sample_every
+        self._wait_tick = 0
+        self._handle_tick = 0
+
+    @property
+    def sample_every(self) -> int:
+        return self._sample_every
+
+    @sample_every.setter
+    def sample_every(self, value: int) -> None:
+        if value < 1:
+            raise ValueError(f"sample_every must be >= 1, not {value}")
+        self._sample_every = value
+
+    def sample_wait(self) -> bool:
+        """Whether to time the queue wait of the event being dequeued."""
+        if not self.enabled:
+            return False
+        self._wait_tick += 1
+        return self._wait_tick % self._sample_every == 0
+
+    def sample_handle(self) -> bool:
+        """Whether to time the handling of the current event."""
+        if not self.enabled:
+            return False
+        self._handle_tick += 1
+        return self._handle_tick % self._sample_every == 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "received": self.received,
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "queue_high_water": self.queue_high_water,
+            "queue_wait": self.queue_wait.snapshot(),
+            "handle_time": self.handle_time.snapshot(),
+            **self.gauges,
+        }
+
+
+def collect(*chainables: Chainable) -> dict[str, dict[str, Any]]:
+    """Collect metrics snapshots of chainables keyed by chainable name.
+
+    Flows are expanded into the chainables they contain. Chainables sharing a name
+    are all kept: the second and later ones are keyed as "name#2", "name#3", ...
+    in the order they are collected. A chainable passed more than once is collected
+    once.
+    """
+    metrics: dict[str, dict[str, Any]] = {}
+    seen: set[int] = set()
+    for c in chainables:
+        if id(c) in seen:
+            continue
+        seen.add(id(c))
+        for name, snapshot in c.metrics().items():
+            key = name
+            i = 1
+            # 同名のchainで前のメトリクスを上書きしないよう番号を付ける
+            while key in metrics:
+                i += 1
+                key = f"{name}#{i}"
+            metrics[key] = snapshot
+    return metrics
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Iterator, Mapping
+
+
+class LayeredData(Mapping[Any, Any]):
+    """LayeredData is a read-only mapping that stacks payloads without copying them.
+
+    Keys are looked up from the first (upper) layer to the last (lower) one, so
+    upper layers shadow lower ones like `collections.ChainMap`. Stacking a
+    LayeredData on another one shares its layers instead of nesting views.
+
+    Args:
+        *layers (Mapping): Mappings from the upper layer to the lower layer.
+    """
+
+    __slots__ = ("_layers",)
+
+    _layers: tuple[Mapping[Any, Any], ...]
+
+    def __init__(self, *layers: Mapping[Any, Any]):
+        flattened: list[Mapping[Any, Any]] = []
+        for layer in layers:
+            if isinstance(layer, LayeredData):
+                flattened.extend(layer._layers)
+            else:
+                flattened.append(layer)
+        self._layers = tuple(flattened)
+
+    def __getitem__(self, key: Any) -> Any:
+        for layer in self._layers:
+            try:
+                return layer[key]
+            except KeyError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in layer for layer in self._layers)
+
+    def __iter__(self) -> Iterator[Any]:
+        seen: set = set()
+        for layer in self._layers:
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self) -> int:
+        return len(set().union(*self._layers))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        for layer in self._layers:
+            if key in layer:
+                return layer[key]
+        return default
+
+    def to_dict(self) -> dict[Any, Any]:
+        """Materialize the view as a new dict."""
+        data: dict[Any, Any] = {}
+        for layer in reversed(self._layers):
+            data.update(layer)
+        return data
+
+    @property
+    def layers(self) -> tuple[Mapping[Any, Any], ...]:
+        return self._layers
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import pickle
+import struct
+import sys
+from abc import ABCMeta, abstractmethod
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from actchain.exceptions import OverrunError
+
+# ヘッダー: magic, スロット数, スロットの大きさ, 最後に書き込んだメッセージの番号
+_HEADER = struct.Struct("<8sIIQ")
+_HEADER_SIZE = 64
+_MAGIC = b"actchain"
+_WRITE_SEQ_OFFSET = 16
+# スロット: seqlockのカウンタ（書き込み中は奇数）, ペイロードの長さ
+_SLOT_HEADER = struct.Struct("<QI")
+_SLOT_HEADER_SIZE = 16
+_U64 = struct.Struct("<Q")
+
+
+class Serializer(metaclass=ABCMeta):
+    """Serializer converts event data to bytes and back for shared memory."""
+
+    @abstractmethod
+    def dumps(self, data: Any) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, payload: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleSerializer(Serializer):
+    def dumps(self, data: Any) -> bytes:
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, payload: bytes) -> Any:
+        return pickle.loads(payload)
+
+
+class JsonSerializer(Serializer):
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+class ShmRing:
+    """ShmRing is a single-writer, multi-reader ring of messages in shared memory.
+
+    Messages are numbered from 1, and message `seq` is written to slot
+    `(seq - 1) % slots`. Each slot is guarded by a seqlock: the writer makes the
+    counter of the slot odd while writing and `2 * seq` when done, and readers check
+    the counter before and after copying the message out. Readers keep their own
+    cursors, so the writer never waits for nor copies per reader. A reader falling
+    more than `slots` messages behind loses messages, which `read` reports by
+    raising OverrunError.
+
+    Use `create` in the writer and `attach` in the readers.
+    """
+
+    def __init__(self, shm: SharedMemory, *, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+        magic, self._slots, self._slot_size, _ = _HEADER.unpack_from(self._buf)
+        if magic != _MAGIC:
+            raise ValueError(f"{shm.name} is not an actchain ring")
+        # スロットは8バイト境界に揃える
+        self._stride = _SLOT_HEADER_SIZE + (self._slot_size + 7) // 8 * 8
+
+    @classmethod
+    def create(cls, name: str, *, slots: int = 1024, slot_size: int = 4096) -> ShmRing:
+        """Create a ring in a new shared memory block.
+
+        Args:
+            name (str): Name of the shared memory block.
+            slots (int): Number of messages the ring holds.
+            slot_size (int): Maximum size of a serialized message in bytes.
+        """
+        if slots < 1 or slot_size < 1:
+            raise ValueError(
+                f"slots and slot_size must be >= 1, not {slots}, {slot_size}"
+            )
+        stride = _SLOT_HEADER_SIZE + (slot_size + 7) // 8 * 8
+        shm = SharedMemory(name, create=True, size=_HEADER_SIZE + slots * stride)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, slots, slot_size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> ShmRing:
+        """Attach to the ring created by the writer. Raises FileNotFoundError if none."""
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name, track=False)
+        else:
+            shm = SharedMemory(name)
+            # 読み手の終了時にresource_trackerがブロックを消してしまわないようにする
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+        return cls(shm, owner=False)
+
+    def write(self, payload: bytes) -> int:
+        """Write a message and return its number."""
+        if len(payload) > self._slot_size:
+            raise ValueError(
+                f"message of {len(payload)} bytes exceeds slot_size {self._slot_size}"
+            )
+        buf = self._buf
+        seq = _U64.unpack_from(buf, _WRITE_SEQ_OFFSET)[0] + 1
+        offset = self._slot_offset(seq)
+        _SLOT_HEADER.pack_into(buf, offset, 2 * seq - 1, len(payload))
+        start = offset + _SLOT_HEADER_SIZE
+        buf[start : start + len(payload)] = payload
+        _U64.pack_into(buf, offset, 2 * seq)
+        _U64.pack_into(buf, _WRITE_SEQ_OFFSET, seq)
+        return seq
+
+    def read(self, seq: int) -> bytes | None:
+        """Read message `seq`. Returns None if it is not written yet.
+
+        Raises:
+            OverrunError: If the message was overwritten before or while reading.
+        """
+        buf = self._buf
+        if seq > _U64.unpack_from(buf, _WRITE_SEQ_OFFSET)[0]:
+            return None
+        offset = self._slot_offset(seq)
+        counter, length = _SLOT_HEADER.unpack_from(buf, offset)
+        if counter != 2 * seq:
+            raise OverrunError(seq)
+        start = offset + _SLOT_HEADER_SIZE
+        payload = bytes(buf[start : start + length])
+        if _U64.unpack_from(buf, offset)[0] != counter:
+            # コピー中に上書きされた
+            raise OverrunError(seq)
+        return payload
+
+    def close(self) -> None:
+        """Detach from the ring, and remove it if this is the writer."""
+        del self._buf
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def _slot_offset(self, seq: int) -> int:
+        return _HEADER_SIZE + (seq - 1) % self._slots * self._stride
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    @property
+    def slot_size(self) -> int:
+        return self._slot_size
+
+    @property
+    def latest_seq(self) -> int:
+        """Number of the last message written. 0 if none."""
+        return _U64.unpack_from(self._buf, _WRITE_SEQ_OFFSET)[0]
+
+    @property
+    def oldest_seq(self) -> int:
+        """Number of the oldest message still in the ring."""
+        return max(self.latest_seq - self._slots + 1, 1)
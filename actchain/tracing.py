@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import os
+import random
+from typing import IO, Any
+
+from actchain.event import Event
+
+# 設定されたTracer。Noneならトレースしない
+tracer: Tracer | None = None
+
+
+class Tracer:
+    """Tracer records a span per chain hop of sampled events.
+
+    Spans are written to `path` as Chrome trace events (JSON array format), which can
+    be opened in chrome://tracing or https://ui.perfetto.dev. Each trace is rendered
+    as an async track whose slices are the chains the events went through.
+
+    Args:
+        path (str): Path of the trace file.
+        sample_rate (float): Ratio of root events (events without a parent) to trace.
+            Events caused by a traced event are always traced.
+        flush_every (int): Number of buffered spans that triggers a write.
+    """
+
+    def __init__(self, path: str, *, sample_rate: float = 1.0, flush_every: int = 1024):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in [0, 1], not {sample_rate}")
+        self._path = path
+        self._sample_rate = sample_rate
+        self._flush_every = flush_every
+        self._pid = os.getpid()
+        self._trace_ids = itertools.count(1)
+        self._buffer: list[str] = []
+        self._file: IO[str] | None = open(path, "w")
+        # 閉じ括弧は省略可能なフォーマットなので、途中で落ちても読める
+        self._file.write("[\n")
+
+    def start_trace(self) -> int:
+        """Return a new trace id for a root event, or 0 if it is not sampled."""
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            return 0
+        return next(self._trace_ids)
+
+    def record_span(
+        self,
+        chain_name: str,
+        event: Event,
+        start_ns: int,
+        end_ns: int,
+        args: dict[str, Any] | None = None,
+    ) -> None:
+        """Record the handling of `event` by a chain as a span of its trace."""
+        span_args = {
+            "event": f"{event.name}#{event.seq}",
+            "parent": None if event.parent is None else "{}#{}".format(*event.parent),
+            "queue_wait_us": (start_ns - event.ts) / 1e3,
+        }
+        if args:
+            span_args.update(args)
+        common = {"cat": "actchain", "name": chain_name, "id": event.trace_id}
+        self._buffer.append(
+            json.dumps(
+                {
+                    **common,
+                    "ph": "b",
+                    "ts": start_ns / 1e3,
+                    "pid": self._pid,
+                    "args": span_args,
+                }
+            )
+        )
+        self._buffer.append(
+            json.dumps({**common, "ph": "e", "ts": end_ns / 1e3, "pid": self._pid})
+        )
+        if len(self._buffer) >= self._flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file is None or len(self._buffer) == 0:
+            return
+        self._file.write(",\n".join(self._buffer) + ",\n")
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+
+def configure(
+    path: str | None, *, sample_rate: float = 1.0, flush_every: int = 1024
+) -> Tracer | None:
+    """Start tracing to `path`, or stop tracing if `path` is None.
+
+    Args:
+        path (str, optional): Path of the trace file.
+        sample_rate (float): Ratio of root events to trace.
+        flush_every (int): Number of buffered spans that triggers a write.
+    """
+    global tracer
+    if tracer is not None:
+        tracer.close()
+    tracer = (
+        None
+        if path is None
+        else Tracer(path, sample_rate=sample_rate, flush_every=flush_every)
+    )
+    return tracer
+
+
+def _close_at_exit() -> None:
+    if tracer is not None:
+        tracer.close()
+
+
+atexit.register(_close_at_exit)
@@ -0,0 +1,84 @@
+"""Compare allocation cost and memory footprint of Event against the plain
+dataclass it replaced, which carried only `name` and `data`. Memory is measured
+both as the bytes allocated per event (tracemalloc, including the instance
+`__dict__` of the dataclass) and as the shallow size of an instance
+(sys.getsizeof, which leaves the `__dict__` out).
+
+    PYTHONPATH=. python benchmarks/bench_event.py [-n 1000000]
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import timeit
+import tracemalloc
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import actchain
+from actchain import Event
+from actchain.chains.base import _current_event
+
+
+@dataclass
+class BaselineEvent:
+    """Event as it was defined before (actchain 0.1.1)."""
+
+    name: str
+    data: Any
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name}/{self.data})"
+
+
+def measure_memory(factory: Callable[[int], Any], n: int) -> float:
+    """Return bytes allocated per instance."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    instances = [factory(i) for i in range(n)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # リスト自体の分は除く
+    return (after - before - sys.getsizeof(instances)) / n
+
+
+def measure_shallow_size(factory: Callable[[int], Any]) -> int:
+    """Return sys.getsizeof of an instance, without its `__dict__` if any."""
+    return sys.getsizeof(factory(0))
+
+
+def measure_time(factory: Callable[[int], Any], n: int) -> float:
+    """Return nanoseconds per instantiation."""
+    return min(timeit.repeat(lambda: factory(0), number=n, repeat=5)) / n * 1e9
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("-n", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data: dict = {}
+    source = actchain.PassThroughChain("source")
+    source._seq = 1000  # seqが小さい整数のキャッシュに収まらないようにする
+    _current_event.set(source.to_event(data))
+    factories: dict[str, Callable[[int], Any]] = {
+        "baseline dataclass": lambda i: BaselineEvent("e", data),
+        "Event(name, data)": lambda i: Event("e", data),
+        "Chainable.to_event": lambda i: source.to_event(data),
+    }
+
+    print(
+        f"{'representation':<24} {'bytes/event':>12} {'getsizeof':>10}"
+        f" {'ns/event':>10}"
+    )
+    for label, factory in factories.items():
+        size = measure_memory(factory, args.n)
+        shallow = measure_shallow_size(factory)
+        elapsed = measure_time(factory, args.n)
+        print(f"{label:<24} {size:>12.1f} {shallow:>10} {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
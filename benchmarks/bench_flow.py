@@ -0,0 +1,61 @@
+"""Measure end-to-end latency of linear flows of 3, 10 and 50 FunctionChains,
+compared between the flow as built and the flow after `Flow.compile`.
+
+    PYTHONPATH=. python benchmarks/bench_flow.py [-n 5000]
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from argparse import ArgumentParser
+
+import actchain
+
+
+async def measure(n_stages: int, n_events: int, compile: bool) -> list[int]:
+    """Return end-to-end latencies in nanoseconds, one event in flight at a time."""
+    done = asyncio.Event()
+    latencies: list[int] = []
+    sent_at = 0
+
+    def on_result(event: actchain.Event) -> None:
+        latencies.append(time.perf_counter_ns() - sent_at)
+        done.set()
+
+    flow = actchain.Flow("bench")
+    for i in range(n_stages):
+        flow.add(actchain.Function(lambda e: e.data).as_chain(f"stage{i}"))
+    sink = actchain.PassThroughChain("sink", on_handle_cb=on_result)
+    flow.chain(sink)
+    if compile:
+        flow.compile()
+
+    tasks = [asyncio.create_task(c.run()) for c in (flow, sink)]
+    for i in range(n_events):
+        done.clear()
+        sent_at = time.perf_counter_ns()
+        flow.trigger(actchain.Event("source", {"i": i}))
+        await done.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return latencies
+
+
+async def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("-n", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'stages':>6} {'p50 us':>8} {'compiled p50 us':>16} {'speedup':>8}")
+    for n_stages in (3, 10, 50):
+        plain = await measure(n_stages, args.n, compile=False)
+        fused = await measure(n_stages, args.n, compile=True)
+        p50 = statistics.median(plain) / 1e3
+        fused_p50 = statistics.median(fused) / 1e3
+        print(f"{n_stages:>6} {p50:>8.1f} {fused_p50:>16.1f} {p50 / fused_p50:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
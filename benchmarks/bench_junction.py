@@ -0,0 +1,75 @@
+"""Measure JunctionChain handling cost per event for 2, 16 and 128 upstream chains,
+compared with the former implementation that rescans every input per event, with
+the default dict output and with snapshot output.
+
+    PYTHONPATH=. python benchmarks/bench_junction.py [-n 20000]
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from argparse import ArgumentParser
+from typing import Literal, cast
+
+import actchain
+from actchain import Event
+
+
+class LegacyJunctionChain(actchain.JunctionChain):
+    """JunctionChain with the former per-event scan over prev_chains."""
+
+    async def _on_handle(self, event: Event) -> dict | None:
+        self._last_handle_event = event
+        self._last_events[event.name] = event
+        _last_events = [
+            self._last_events.get(c.name, None) is not None for c in self.prev_chains
+        ]
+        if self._mode == self.Mode.ALL:
+            if all(_last_events):
+                return {e.name: e.data for e in self._last_events.values()}
+            return None
+        else:
+            if any(_last_events):
+                return {e.name: e.data for e in self._last_events.values()}
+            return None
+
+
+async def measure(
+    junction_type: type[actchain.JunctionChain],
+    n_inputs: int,
+    n_events: int,
+    output: Literal["dict", "snapshot"] = "dict",
+) -> float:
+    """Return nanoseconds per handled event."""
+    junction = cast(
+        actchain.JunctionChain, junction_type("junction", mode="all", output=output)
+    )
+    parents = [
+        actchain.Function[dict, dict](lambda e: e.data).as_chain(f"input{i}")
+        for i in range(n_inputs)
+    ]
+    for parent in parents:
+        parent.chain(junction)
+    events = [parent.to_event({"value": i}) for i, parent in enumerate(parents)]
+
+    start = time.perf_counter_ns()
+    for i in range(n_events):
+        await junction._on_handle(events[i % n_inputs])
+    return (time.perf_counter_ns() - start) / n_events
+
+
+async def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("-n", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'inputs':>6} {'legacy':>10} {'dict':>10} {'snapshot':>10}  (ns/event)")
+    for n_inputs in (2, 16, 128):
+        legacy = await measure(LegacyJunctionChain, n_inputs, args.n)
+        current = await measure(actchain.JunctionChain, n_inputs, args.n)
+        snapshot = await measure(actchain.JunctionChain, n_inputs, args.n, "snapshot")
+        print(f"{n_inputs:>6} {legacy:>10.0f} {current:>10.0f} {snapshot:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
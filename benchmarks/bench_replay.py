@@ -0,0 +1,63 @@
+"""Measure the throughput of replaying a recorded log as fast as possible through a
+FunctionChain.
+
+    PYTHONPATH=. python benchmarks/bench_replay.py [-n 100000]
+"""
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import actchain
+from actchain.eventlog import EventLogWriter
+
+
+async def measure(path: str, n_events: int) -> float:
+    """Return replayed events per second."""
+    done = asyncio.Event()
+    received = 0
+
+    def on_result(event: actchain.Event) -> None:
+        nonlocal received
+        received += 1
+        if received == n_events:
+            done.set()
+
+    loop = actchain.ReplayLoop(path, speed=None).as_chain("replay")
+    function = actchain.Function(lambda e: e.data).as_chain("function")
+    sink = actchain.PassThroughChain("sink", on_handle_cb=on_result)
+    loop.chain(function)
+    function.chain(sink)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(c.run()) for c in (loop, function, sink)]
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return n_events / elapsed
+
+
+async def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("-n", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        writer = EventLogWriter(path, fsync="never")
+        start = time.perf_counter()
+        for i in range(args.n):
+            writer.append("orderbook", i, {"bid": 100.0 + i, "ask": 101.0 + i})
+        writer.close()
+        write_rate = args.n / (time.perf_counter() - start)
+
+        replay_rate = await measure(path, args.n)
+    print(f"record {write_rate:>12,.0f} events/s")
+    print(f"replay {replay_rate:>12,.0f} events/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -35,6 +35,8 @@ class Config(actchain.State):
     order_interval: int = 3
     # 永続化するかどうか
     run_forever: bool = True
+    # 入力のストリームを記録するディレクトリ（記録しない場合はNone）
+    record_dir: str | None = None
 
     @classmethod
     def configure(cls, filepath: str) -> Config:
@@ -1,3 +1,5 @@
+from typing import cast
+
 import actchain
 from actchain import Event
 
@@ -16,17 +18,20 @@ class BuySellRatioEstimator(
     actchain.Function[BuySellRatioEstimatorReceiveData, BuySellRatioEstimatorSendData]
 ):
     def __init__(self, k: int = 10):
-        super(BuySellRatioEstimator, self).__init__()
+        # 追加するキーだけ返し、受け取った板情報の上に重ねてもらう
+        super(BuySellRatioEstimator, self).__init__(layered=True)
         self._k = k
 
     async def handle(
         self, event: Event[BuySellRatioEstimatorReceiveData]
     ) -> BuySellRatioEstimatorSendData | None:
-        return BuySellRatioEstimatorSendData(
-            **event.data,
-            buy_sell_ratio=self.estimate_by_orderbook(
-                event.data["BUY"], event.data["SELL"]
-            ),
+        return cast(
+            BuySellRatioEstimatorSendData,
+            {
+                "buy_sell_ratio": self.estimate_by_orderbook(
+                    event.data["BUY"], event.data["SELL"]
+                )
+            },
         )
 
     def estimate_by_orderbook(
@@ -1,4 +1,3 @@
-import asyncio
 from abc import ABCMeta
 from typing import AsyncGenerator, Literal, TypeAlias, TypedDict
 
@@ -37,7 +36,7 @@ class _OHLCVLoopBase(actchain.Loop[OHLCVData], metaclass=ABCMeta):
             df = await self.fetch_ohlcv()
             if df is not None:
                 yield {"df_ohlcv": df}
-            await asyncio.sleep(self._interval_seconds)
+            await actchain.clock.sleep(self._interval_seconds)
 
     async def fetch_ohlcv(self) -> pd.DataFrame | None:
         raise NotImplementedError
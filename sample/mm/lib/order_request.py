@@ -1,7 +1,6 @@
 import asyncio
-import time
 from dataclasses import dataclass
-from typing import TypedDict
+from typing import TypedDict, cast
 
 import pandas as pd
 import pybotters_wrapper as pbw
@@ -26,22 +25,25 @@ class RateLimitState(actchain.State):
 
     @classmethod
     def suspended(cls) -> None:
-        cls().last_order_ts = time.monotonic()
+        cls().last_order_ts = actchain.clock.monotonic()
 
     @classmethod
     def penalized(cls) -> None:
-        cls().last_penalized_ts = time.monotonic()
+        cls().last_penalized_ts = actchain.clock.monotonic()
         logger.error(
             f"Rate limit exceeded. No Order/Cancel request for next {config.sleep_at_api_limit} seconds."
         )
 
     @property
     def is_being_penalized(self) -> bool:
-        return time.monotonic() - self.last_penalized_ts < config.sleep_at_api_limit
+        return (
+            actchain.clock.monotonic() - self.last_penalized_ts
+            < config.sleep_at_api_limit
+        )
 
     @property
     def is_being_suspended(self) -> bool:
-        return time.monotonic() - self.last_order_ts < config.order_interval
+        return actchain.clock.monotonic() - self.last_order_ts < config.order_interval
 
 
 class OrderPricerReceiveData(
@@ -65,7 +67,7 @@ class OrderPricerSendData(OrderPricerReceiveData):
 
 class OrderPricer(actchain.Function[OrderPricerReceiveData, OrderPricerSendData]):
     def __init__(self, max_position_size: float = 0.02):
-        super(OrderPricer, self).__init__()
+        super(OrderPricer, self).__init__(layered=True)
         self._max_position_size = max_position_size
 
     async def handle(
@@ -77,12 +79,7 @@ class OrderPricer(actchain.Function[OrderPricerReceiveData, OrderPricerSendData]
             event.data["buy_sell_ratio"],
             event.data["net_position"],
         )
-        return OrderPricerSendData(
-            **{
-                **event.data,
-                **price_data,
-            }
-        )
+        return cast(OrderPricerSendData, price_data)
 
     def estimate_prices(
         self, vola: float, mid: float, buy_sell_ratio: float, net_position: float
@@ -128,7 +125,7 @@ class LimitOrderCommander(
         reorder_price_diff: float = 100,
         symbol: str = "FX_BTC_JPY",
     ):
-        super(LimitOrderCommander, self).__init__()
+        super(LimitOrderCommander, self).__init__(layered=True)
         self._symbol = symbol
         self._order_size = order_size
         self._max_position_size = max_position_size
@@ -148,11 +145,9 @@ class LimitOrderCommander(
         )
 
         if len(limit_order_commands):
-            return LimitOrderCommanderSendData(
-                **{
-                    **event.data,
-                    "limit_order_commands": limit_order_commands,
-                }
+            return cast(
+                LimitOrderCommanderSendData,
+                {"limit_order_commands": limit_order_commands},
             )
         else:
             return None
@@ -243,7 +238,7 @@ class CancelOrderCommander(
         reorder_price_diff: float = 100,
         symbol: str = "FX_BTC_JPY",
     ):
-        super(CancelOrderCommander, self).__init__()
+        super(CancelOrderCommander, self).__init__(layered=True)
         self._symbol = symbol
         self._max_position_size = max_position_size
         self._reorder_price_diff = reorder_price_diff
@@ -260,11 +255,9 @@ class CancelOrderCommander(
             event.data["df_ohlcv"],
         )
         if len(cancel_order_commands):
-            return CancelOrderCommanderSendData(
-                **{
-                    **event.data,
-                    "cancel_order_commands": cancel_order_commands,
-                }
+            return cast(
+                CancelOrderCommanderSendData,
+                {"cancel_order_commands": cancel_order_commands},
             )
         else:
             return None
@@ -358,7 +351,7 @@ class OrderRequester(
         results = await asyncio.gather(
             *[self.limit_order(cmd) for cmd in event.data["limit_order_commands"]]
         )
-        await asyncio.sleep(self._sleep_after_order)
+        await actchain.clock.sleep(self._sleep_after_order)
 
         return {"responses": results}
 
@@ -407,9 +400,10 @@ class OrderCanceler(actchain.Function[OrderCancelerReceiveData, OrderCancelerSen
 
         if id not in self._canceling:
             self._canceling.add(id)
-            resp = await self._cancel_order(command)
-            self._canceling.remove(id)
-            return resp
+            try:
+                return await self._cancel_order(command)
+            finally:
+                self._canceling.remove(id)
         else:
             return None
 
@@ -422,4 +416,6 @@ class OrderCanceler(actchain.Function[OrderCancelerReceiveData, OrderCancelerSen
             resp = await api.cancel_order(**command)
             if resp.resp.status == 429:
                 RateLimitState.penalized()
+                # chainのlimiterに同時実行数を絞らせる
+                raise actchain.exceptions.ThrottledError(command["order_id"])
             return resp
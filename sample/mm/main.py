@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import os
 
 from lib import (
     BuySellRatioEstimator,
@@ -22,6 +23,16 @@ from lib import (
 import actchain
 
 
+def build_orderbook_flow() -> actchain.Flow:
+    # 板情報を取得・加工・配信するフロー
+    return (
+        actchain.Flow("orderbook")
+        .add(OrderbookLoop().as_chain("orderbook"))
+        # 板情報は最新のスナップショットだけ処理すればよいので古いものは間引く
+        .add(ExtendOrderbookFunction().as_chain("extend_orderbook", input="latest"))
+    )
+
+
 async def main() -> None:
     # 状態フロー
     # ポジション状態を取得・加工・配信するフロー
@@ -35,17 +46,23 @@ async def main() -> None:
     flow_order_status = actchain.Flow("orders").add(OrderStatusLoop().as_chain("order"))
 
     # OHLCVを取得・加工・配信するフロー
+    # 加工だけが重いので、その関数だけをワーカープロセスで実行する
+    # （flowごと子プロセスに移すProcessFlowと重ねると、プロセスの中でさらに
+    # プールを作ることになり、1つのワーカーのためにプロセス間の受け渡しが倍になる）
     flow_ohlcv = (
         actchain.Flow("ohlcv")
         .add(OHLCVLoop(config.ohlcv_interval).as_chain("ohlcv"))
-        .add(ExtendOHLCVFunction().as_chain("ohlcv_feature"))
+        .add(
+            ExtendOHLCVFunction().as_chain(
+                "ohlcv_feature", chain_type="process", workers=1
+            )
+        )
     )
 
-    # 板情報を取得・加工・配信するフロー
-    flow_orderbook = (
-        actchain.Flow("orderbook")
-        .add(OrderbookLoop().as_chain("orderbook"))
-        .add(ExtendOrderbookFunction().as_chain("extend_orderbook"))
+    # 板情報のフローは取得から加工まで子プロセスで動かし、他のフローを止めない
+    # （configを引き継ぐためにforkで起動する）
+    flow_orderbook = actchain.ProcessFlow(
+        "orderbook", build_orderbook_flow, mp_context="fork"
     )
 
     # フィーチャー作成・状態統合するフロー
@@ -78,7 +95,10 @@ async def main() -> None:
             ).as_chain("order_command")
         )
         .add(
-            OrderRequester().as_chain("order_request", chain_type="exclusive"),
+            # 注文中に届いた最新の指示は取りこぼさず、完了後すぐに送る
+            OrderRequester().as_chain(
+                "order_request", chain_type="exclusive", mode="latest"
+            ),
         )
     )
 
@@ -91,19 +111,43 @@ async def main() -> None:
                 config.max_position_size, config.reorder_price_diff
             ).as_chain("cancel_order_command")
         )
-        .add(OrderCanceler().as_chain("cancel_order_request", chain_type="exclusive"))
+        # 取消は最新の指示だけを、APIの混み具合に合わせた並列数で送る
+        .add(
+            OrderCanceler().as_chain(
+                "cancel_order_request",
+                chain_type="concurrent",
+                input="latest",
+                max_concurrency=actchain.AIMDLimiter(initial_limit=1, max_limit=4),
+            )
+        )
     )
 
+    # 入力のストリーム（ポジション・注文・板・OHLCV）をイベントログに記録する
+    recorders = []
+    if config.record_dir is not None:
+        for flow in (
+            flow_position_status,
+            flow_order_status,
+            flow_orderbook,
+            flow_ohlcv,
+        ):
+            recorder = actchain.RecorderChain(
+                f"record_{flow.name}", os.path.join(config.record_dir, flow.name)
+            )
+            flow.chain(recorder)
+            recorders.append(recorder)
+
     # 各フローとその中を構成するchainableを実行する
     await actchain.run(
         flow_position_status,
         flow_order_status,
-        flow_orderbook,
         flow_ohlcv,
+        # flow_orderbookはflow_featureの中で実行される
         flow_feature,
         flow_order_pricer,
         flow_limit_order,
         flow_cancel_order,
+        *recorders,
         run_forever=config.run_forever,
     )
 
@@ -0,0 +1,66 @@
+import asyncio
+import gc
+import sys
+
+import pytest
+import pytest_mock
+
+import actchain
+from actchain.chains.base import Chainable
+
+
+class ProbeChainable(Chainable):
+    """Chainable recording the runtime it runs on."""
+
+    async def _run_impl(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.loop_module = type(loop).__module__.split(".")[0]
+        self.task_factory = loop.get_task_factory()
+        self.freeze_count = gc.get_freeze_count()
+        self.threshold = gc.get_threshold()
+
+
+class TestRunSync:
+    def test_runs_on_asyncio_loop(self) -> None:
+        probe = ProbeChainable("probe")
+        threshold = gc.get_threshold()
+
+        actchain.run_sync(
+            probe, loop="asyncio", gc_freeze=True, gc_threshold=(50000, 20, 20)
+        )
+
+        assert probe.loop_module == "asyncio"
+        assert probe.freeze_count > 0
+        assert probe.threshold == (50000, 20, 20)
+        assert gc.get_freeze_count() == 0
+        assert gc.get_threshold() == threshold
+
+    def test_runs_on_uvloop_if_installed(self) -> None:
+        uvloop = pytest.importorskip("uvloop")
+        probe = ProbeChainable("probe")
+
+        actchain.run_sync(probe, loop="auto")
+
+        assert probe.loop_module == uvloop.__name__
+
+    @pytest.mark.skipif(sys.version_info < (3, 12), reason="requires Python 3.12")
+    def test_runs_with_eager_tasks(self) -> None:
+        probe = ProbeChainable("probe")
+
+        actchain.run_sync(probe, loop="asyncio", eager_tasks=True)
+
+        assert probe.task_factory is asyncio.eager_task_factory  # type: ignore
+
+
+class TestNewEventLoop:
+    def test_falls_back_to_asyncio_without_uvloop(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        mocker.patch.dict(sys.modules, {"uvloop": None})
+
+        loop = actchain.new_event_loop("auto")
+        loop.close()
+
+        assert isinstance(loop, asyncio.BaseEventLoop)
+        with pytest.raises(ImportError):
+            actchain.new_event_loop("uvloop")
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from actchain import bench
+
+
+def report(**results: float) -> dict:
+    return {
+        "meta": {},
+        "results": {
+            name: {"value": value, "unit": "us", "lower_is_better": True}
+            for name, value in results.items()
+        },
+    }
+
+
+class TestBench:
+    def test_run_reports_metrics(self, tmp_path: Path) -> None:
+        result = bench.run(["hop", "fanout", "channel"], n=20)
+
+        assert result["meta"]["n"] == 20
+        assert {
+            "hop.emit_next_ns",
+            "hop.p50_us",
+            "fanout.10.p50_us",
+            "channel.channel.handoff_ns",
+        } <= set(result["results"])
+        assert result["results"]["hop.p50_us"]["value"] > 0
+
+        bench.save(result, tmp_path / "bench.json")
+        assert bench.load(tmp_path / "bench.json") == result
+
+    def test_run_options_reports_each_variant(self) -> None:
+        result = bench.run(["run_options"], n=20)
+
+        assert {
+            "run_options.asyncio.hop.p50_us",
+            "run_options.asyncio+gc_freeze.burst.concurrent.events_per_s",
+        } <= set(result["results"])
+
+    def test_compare_detects_regressions(self) -> None:
+        baseline = report(a=10.0, b=10.0, c=10.0)
+        current = report(a=10.5, b=12.0, c=5.0, d=100.0)
+        current["results"]["c"]["lower_is_better"] = False
+
+        regressions = bench.compare(baseline, current, threshold=0.1)
+
+        assert [(r.name, r.baseline, r.current) for r in regressions] == [
+            ("b", 10.0, 12.0),
+            ("c", 10.0, 5.0),
+        ]
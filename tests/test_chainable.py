@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 import actchain
@@ -51,3 +53,48 @@ class TestChainable:
         c = ChainableImpl("c")
         with pytest.raises(TypeError):
             c.trigger({"msg": "hello"})  # type: ignore
+
+    def test_drop_newest_when_queue_is_full(self) -> None:
+        c = ChainableImpl("c", maxsize=2, overflow="drop_newest")
+        for i in range(3):
+            c.trigger(c.to_event({"n": i}))
+
+        assert c.queue_size == 2
+        assert c.overflow_counts[actchain.OverflowPolicy.DROP_NEWEST] == 1
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_when_queue_is_full(self) -> None:
+        c = ChainableImpl("c", maxsize=2, overflow="drop_oldest")
+        for i in range(3):
+            c.trigger(c.to_event({"n": i}))
+
+        assert c.queue_size == 2
+        assert c.overflow_counts[actchain.OverflowPolicy.DROP_OLDEST] == 1
+        assert (await c.next()).data == {"n": 1}
+        assert (await c.next()).data == {"n": 2}
+
+    def test_raise_when_queue_is_full(self) -> None:
+        c = ChainableImpl("c", maxsize=1, overflow="raise")
+        c.trigger(c.to_event({"n": 0}))
+
+        with pytest.raises(actchain.exceptions.QueueOverflowError):
+            c.trigger(c.to_event({"n": 1}))
+        assert c.queue_size == 1
+        assert c.overflow_counts[actchain.OverflowPolicy.RAISE] == 1
+
+    @pytest.mark.asyncio
+    async def test_block_waits_until_queue_has_room(self) -> None:
+        c1 = ChainableImpl("c1")
+        c2 = ChainableImpl("c2", maxsize=1)
+        c1.chain(c2)
+        c1.emit({"n": 0})
+        assert not c2.writable
+
+        waiter = asyncio.create_task(c1._wait_next_chains_writable())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        await c2.next()
+        await asyncio.sleep(0)
+        assert waiter.done()
+        assert c2.overflow_counts[actchain.OverflowPolicy.BLOCK] == 1
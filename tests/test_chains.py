@@ -1,5 +1,8 @@
 import asyncio
-from typing import Any, AsyncGenerator
+import os
+import pickle
+import time
+from typing import Any, AsyncGenerator, Iterator, Mapping
 
 import pytest
 import pytest_mock
@@ -13,6 +16,22 @@ def pass_through_function_chain() -> actchain.FunctionChain:
     return actchain.Function[dict, dict](fn=lambda e: e.data).as_chain("dummy")
 
 
+def sleep_in_process(event: Event) -> dict:
+    # ワーカープロセスで実行されるので、pickleできるようモジュールレベルに置く
+    time.sleep(event.data["sleep"])
+    return {"n": event.data["n"], "pid": os.getpid()}
+
+
+def virtual_event_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    """Event loop for tests depending on timing, which takes no real time to sleep."""
+    loop = actchain.clock.VirtualTimeEventLoop()
+    previous = actchain.clock.get_clock()
+    actchain.clock.set_clock(actchain.clock.LoopClock(loop))
+    yield loop
+    actchain.clock.set_clock(previous)
+    loop.close()
+
+
 class TestChain:
     @pytest.mark.asyncio
     async def test_emit_return_value_of_on_handle_event(
@@ -60,6 +79,47 @@ class TestChain:
         with pytest.raises(actchain.exceptions.EventHandleError):
             await c._process_event()
 
+    @pytest.mark.asyncio
+    async def test_latest_input_skips_to_the_most_recent_event(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        class ChainImpl(Chain):
+            async def _on_handle(self, event: Event) -> dict:
+                return event.data
+
+        c = ChainImpl("c", input="latest")
+        spy = mocker.spy(c, "emit")
+        for i in range(3):
+            c.trigger(c.to_event({"n": i}))
+
+        await c._process_event()
+
+        spy.assert_called_once_with({"n": 2})
+        assert c.queue_size == 0
+        assert c.conflated_count == 2
+
+    @pytest.mark.asyncio
+    async def test_latest_by_name_input_keeps_the_most_recent_event_per_name(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        class ChainImpl(Chain):
+            async def _on_handle(self, event: Event) -> dict:
+                return event.data
+
+        c = ChainImpl("c", input="latest_by_name")
+        spy = mocker.spy(c, "emit")
+        c.trigger(Event("a", {"n": 1}))
+        c.trigger(Event("b", {"n": 2}))
+        c.trigger(Event("a", {"n": 3}))
+
+        await c._process_event()
+        await c._process_event()
+
+        # 新しいイベントで置き換えられた"a"は後回しになる
+        assert spy.call_args_list[0][0][0] == {"n": 2}
+        assert spy.call_args_list[1][0][0] == {"n": 3}
+        assert c.conflated_count == 1
+
 
 class TestLoopChain:
     @pytest.mark.asyncio
@@ -98,6 +158,34 @@ class TestLoopChain:
 
         assert spy.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_blocked_by_bounded_next_chain(self) -> None:
+        class TestLoop(actchain.Loop):
+            async def loop(self):
+                for i in range(10):
+                    yield {"n": i}
+
+        max_queue_size = 0
+
+        async def fn(event: actchain.Event) -> None:
+            nonlocal max_queue_size
+            max_queue_size = max(max_queue_size, chain.queue_size)
+            await asyncio.sleep(0.01)
+
+        loop_chain = TestLoop().as_chain()
+        chain = actchain.Function[dict, dict](fn).as_chain(maxsize=2)
+        loop_chain.chain(chain)
+
+        task = asyncio.create_task(chain.run())
+        await loop_chain.run()
+        while chain.queue_size > 0:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        # 下流のキューが空くまでloopが待たされるので上限を超えない
+        assert max_queue_size <= 2
+        assert chain.overflow_counts[actchain.OverflowPolicy.BLOCK] > 0
+
 
 class TestFunctionChain:
     @pytest.mark.asyncio
@@ -139,6 +227,24 @@ class TestFunctionChain:
 
         actchain.Function(fn).as_chain()
 
+    @pytest.mark.asyncio
+    async def test_stacks_layered_function_result_on_received_data(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.Function[dict, dict](
+            lambda e: {"b": 2}, layered=True
+        ).as_chain()
+        spy = mocker.spy(chain, "emit")
+        received = {"a": 1}
+
+        chain.trigger(chain.to_event(received))
+        await chain._process_event()
+
+        emitted = spy.call_args[0][0]
+        assert isinstance(emitted, actchain.LayeredData)
+        assert emitted == {"a": 1, "b": 2}
+        assert emitted.layers[-1] is received
+
 
 class TestConcurrentFunctionChain:
     @pytest.mark.asyncio
@@ -173,6 +279,62 @@ class TestConcurrentFunctionChain:
 
         task.cancel()
 
+    @pytest.mark.asyncio
+    async def test_stops_pulling_events_at_max_concurrency(self) -> None:
+        running = 0
+        max_running = 0
+        release = asyncio.Event()
+
+        async def handle(event: actchain.Event) -> dict:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await release.wait()
+            running -= 1
+            return event.data
+
+        chain = actchain.Function(handle).as_chain(
+            chain_type="concurrent", max_concurrency=2
+        )
+        task = asyncio.create_task(chain.run())
+        for i in range(5):
+            chain.trigger(chain.to_event({"n": i}))
+        await asyncio.sleep(0.05)
+
+        # 上限に達している間はキューから取り出さない
+        assert chain.in_flight == 2
+        assert chain.queue_size == 3
+
+        release.set()
+        while chain.last_emit_event is None or chain.last_emit_event.data["n"] < 4:
+            await asyncio.sleep(0.01)
+        assert max_running == 2
+        assert chain.in_flight == 0
+
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_emits_in_event_order_if_ordered(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        async def handle(event: actchain.Event) -> dict:
+            await asyncio.sleep(event.data["sleep"])
+            return event.data
+
+        chain = actchain.Function(handle).as_chain(
+            chain_type="concurrent", ordered=True
+        )
+        spy = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+        for i, sleep in enumerate([0.1, 0.02, 0.05]):
+            chain.trigger(chain.to_event({"n": i, "sleep": sleep}))
+        while spy.call_count < 3:
+            await asyncio.sleep(0.01)
+
+        assert [c[0][0]["n"] for c in spy.call_args_list] == [0, 1, 2]
+
+        task.cancel()
+
 
 class TestExclusiveFunctionChain:
     @pytest.mark.asyncio
@@ -216,6 +378,235 @@ class TestExclusiveFunctionChain:
 
         task.cancel()
 
+    @pytest.mark.asyncio
+    async def test_latest_mode_handles_the_latest_pending_event(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        async def handle(event: actchain.Event) -> dict:
+            await asyncio.sleep(0.05)
+            return event.data
+
+        chain = actchain.Function(handle).as_chain(
+            chain_type="exclusive", mode="latest"
+        )
+        spy_emit = mocker.spy(chain, "emit")
+
+        task = asyncio.create_task(chain.run())
+        for i in range(4):
+            chain.trigger(chain.to_event({"msg": i}))
+        while spy_emit.call_count < 2:
+            await asyncio.sleep(0.01)
+
+        # 実行中に届いた1, 2は捨てられ、最新の3が完了後に処理される
+        assert [c[0][0] for c in spy_emit.call_args_list] == [{"msg": 0}, {"msg": 3}]
+        assert chain.metrics()[chain.name]["dropped"] == 2
+        assert chain.last_emit_event is not None
+        assert chain.last_emit_event.parent == (chain.name, 4)
+
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_latest_mode_drops_pending_event_older_than_new_handling(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        gates = {n: asyncio.Event() for n in "ABC"}
+
+        async def handle(event: actchain.Event) -> dict:
+            await gates[event.data["msg"]].wait()
+            return event.data
+
+        chain = actchain.Function[dict, dict](handle).as_chain(
+            chain_type="exclusive", mode="latest"
+        )
+        spy_emit = mocker.spy(chain, "emit")
+
+        await chain._on_handle(chain.to_event({"msg": "A"}))
+        await asyncio.sleep(0)
+        await chain._on_handle(chain.to_event({"msg": "B"}))
+        gates["A"].set()
+        await asyncio.sleep(0)
+        # Aは完了したが、完了コールバックはまだ呼ばれていない
+        assert chain._task is not None and chain._task.done()
+        assert spy_emit.call_count == 0
+        await chain._on_handle(chain.to_event({"msg": "C"}))
+        for gate in gates.values():
+            gate.set()
+        await asyncio.sleep(0.01)
+
+        # Bより新しいCが先に始まったので、Bは捨てられる
+        assert [c[0][0] for c in spy_emit.call_args_list] == [
+            {"msg": "A"},
+            {"msg": "C"},
+        ]
+        assert chain.metrics()[chain.name]["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_restart_mode_cancels_running_handling(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        async def handle(event: actchain.Event) -> dict:
+            await asyncio.sleep(0.05)
+            return event.data
+
+        chain = actchain.Function(handle).as_chain(
+            chain_type="exclusive", mode="restart"
+        )
+        spy_emit = mocker.spy(chain, "emit")
+
+        task = asyncio.create_task(chain.run())
+        for i in range(3):
+            chain.trigger(chain.to_event({"msg": i}))
+        while spy_emit.call_count < 1:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        spy_emit.assert_called_once_with({"msg": 2})
+        assert chain.metrics()[chain.name]["dropped"] == 2
+
+        task.cancel()
+
+
+class TestBatchFunctionChain:
+    @pytest.mark.asyncio
+    async def test_handles_queued_events_in_batches(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        class TestFunction(actchain.Function):
+            async def handle_batch(self, events: list[actchain.Event]) -> list:
+                return [{"n": e.data["n"] * 10} for e in events]
+
+        chain = TestFunction().as_chain(chain_type="batch", batch_size=3)
+        spy_handle_batch = mocker.spy(chain._function, "handle_batch")
+        spy_emit = mocker.spy(chain, "emit")
+        for i in range(5):
+            chain.trigger(chain.to_event({"n": i}))
+
+        await chain._process_event()
+        await chain._process_event()
+
+        assert [len(c[0][0]) for c in spy_handle_batch.call_args_list] == [3, 2]
+        assert [c[0][0] for c in spy_emit.call_args_list] == [
+            {"n": 0},
+            {"n": 10},
+            {"n": 20},
+            {"n": 30},
+            {"n": 40},
+        ]
+        assert chain.last_handle_event == chain.to_event({"n": 4})
+
+    @pytest.mark.asyncio
+    async def test_waits_for_events_up_to_max_wait(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.Function[dict, dict](lambda e: e.data).as_chain(
+            chain_type="batch", batch_size=10, max_wait=0.1
+        )
+        spy_handle_batch = mocker.spy(chain._function, "handle_batch")
+
+        async def trigger_later() -> None:
+            await asyncio.sleep(0.02)
+            chain.trigger(chain.to_event({"n": 2}))
+
+        chain.trigger(chain.to_event({"n": 1}))
+        task = asyncio.create_task(trigger_later())
+        await chain._process_event()
+        await task
+
+        spy_handle_batch.assert_called_once()
+        assert len(spy_handle_batch.call_args[0][0]) == 2
+
+    @pytest.mark.asyncio
+    async def test_raise_error_when_results_do_not_match_events(self) -> None:
+        class TestFunction(actchain.Function):
+            async def handle_batch(self, events: list[actchain.Event]) -> list:
+                return [e.data for e in events[1:]]
+
+        chain = TestFunction().as_chain(chain_type="batch", batch_size=3)
+        events = [chain.to_event({"n": i}) for i in range(3)]
+        for event in events:
+            chain.trigger(event)
+
+        with pytest.raises(actchain.exceptions.BatchHandleError) as e:
+            await chain._process_event()
+        assert isinstance(e.value, actchain.exceptions.EventHandleError)
+        assert e.value.args == (events[0],)
+        assert e.value.events == events
+        assert isinstance(e.value.__context__, ValueError)
+
+    def test_raise_error_with_non_async_handle_batch_override(self) -> None:
+        class TestFunction(actchain.Function):
+            def handle_batch(self, events: list[actchain.Event]) -> list:  # type: ignore
+                return []
+
+        with pytest.raises(actchain.exceptions.InvalidOverrideError):
+            TestFunction().as_chain(chain_type="batch")
+
+
+class TestProcessFunctionChain:
+    async def run_until_emitted(
+        self, chain: actchain.ProcessFunctionChain, spy: Any, n: int
+    ) -> None:
+        task = asyncio.create_task(chain.run())
+        for i, sleep in enumerate([0.3, 0.1, 0.2][:n]):
+            chain.trigger(chain.to_event({"n": i, "sleep": sleep}))
+        while spy.call_count < n:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_emits_in_event_order(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.Function(sleep_in_process).as_chain(
+            chain_type="process", workers=3
+        )
+        spy = mocker.spy(chain, "emit")
+
+        await self.run_until_emitted(chain, spy, 3)
+
+        assert [c[0][0]["n"] for c in spy.call_args_list] == [0, 1, 2]
+        # ワーカープロセスで処理されている
+        assert all(c[0][0]["pid"] != os.getpid() for c in spy.call_args_list)
+        # 親子関係はプロセスをまたいでも保たれる
+        assert chain.last_emit_event is not None
+        assert chain.last_emit_event.parent == (chain.name, 3)
+
+    @pytest.mark.asyncio
+    async def test_emits_in_completion_order_if_unordered(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.Function(sleep_in_process).as_chain(
+            chain_type="process", workers=3, ordered=False
+        )
+        spy = mocker.spy(chain, "emit")
+
+        await self.run_until_emitted(chain, spy, 3)
+
+        assert [c[0][0]["n"] for c in spy.call_args_list] == [1, 2, 0]
+
+    @pytest.mark.asyncio
+    async def test_does_not_block_event_loop(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.Function(sleep_in_process).as_chain(
+            chain_type="process", workers=1
+        )
+        spy = mocker.spy(chain, "emit")
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        await self.run_until_emitted(chain, spy, 1)
+        ticker.cancel()
+
+        # 0.3秒の処理中もイベントループは回り続ける
+        assert ticks >= 10
+
 
 class TestJunctionChain:
     @pytest.fixture
@@ -237,7 +628,9 @@ class TestJunctionChain:
         chain2: actchain.Chain,
         mocker: pytest_mock.MockerFixture,
     ) -> None:
-        junction_chain = actchain.JunctionChain("junction", mode="all")
+        junction_chain: actchain.JunctionChain = actchain.JunctionChain(
+            "junction", mode="all"
+        )
         spy_emit = mocker.spy(junction_chain, "emit")
         chain1.chain(junction_chain)
         chain2.chain(junction_chain)
@@ -368,6 +761,99 @@ class TestJunctionChain:
             "chain2": chain2.to_event({"msg": 22}),
         }
 
+    @pytest.mark.asyncio
+    async def test_emits_when_all_of_many_inputs_are_ready(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chains = [
+            actchain.Function[dict, dict](lambda e: e.data).as_chain(f"chain{i}")
+            for i in range(16)
+        ]
+        junction_chain: actchain.JunctionChain = actchain.JunctionChain(
+            "junction", mode="all"
+        )
+        spy_emit = mocker.spy(junction_chain, "emit")
+        for c in chains:
+            c.chain(junction_chain)
+
+        for i, c in enumerate(chains):
+            junction_chain.trigger(c.to_event({"n": i}))
+            await junction_chain._process_event()
+
+        spy_emit.assert_called_once()
+        assert isinstance(spy_emit.call_args[0][0], dict)
+        assert spy_emit.call_args[0][0] == {
+            f"chain{i}": {"n": i} for i in range(len(chains))
+        }
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_not_affected_by_later_events(
+        self, chain1: actchain.Chain, chain2: actchain.Chain
+    ) -> None:
+        junction_chain = actchain.JunctionChain("junction", mode="any")
+        chain1.chain(junction_chain)
+        chain2.chain(junction_chain)
+
+        junction_chain.trigger(chain1.to_event({"msg": 1}))
+        await junction_chain._process_event()
+        snapshot = junction_chain.snapshot()
+        junction_chain.trigger(chain2.to_event({"msg": 2}))
+        await junction_chain._process_event()
+
+        assert isinstance(snapshot, actchain.JunctionSnapshot)
+        assert snapshot == {"chain1": {"msg": 1}}
+        assert junction_chain.snapshot() == {"chain1": {"msg": 1}, "chain2": {"msg": 2}}
+        # プロセス間で受け渡せるようpickleできる
+        assert pickle.loads(pickle.dumps(snapshot)) == {"chain1": {"msg": 1}}
+
+    @pytest.mark.asyncio
+    async def test_emits_snapshots_sharing_unchanged_inputs(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chains = [
+            actchain.Function[dict, dict](lambda e: e.data).as_chain(f"chain{i}")
+            for i in range(16)
+        ]
+        junction_chain: actchain.JunctionChain = actchain.JunctionChain(
+            "junction", output="snapshot"
+        )
+        spy_emit = mocker.spy(junction_chain, "emit")
+        for c in chains:
+            c.chain(junction_chain)
+
+        # 全入力が揃った後、一部の入力だけが何度も変わる
+        for n in range(3):
+            for i, c in enumerate(chains):
+                if n == 0 or i < 5:
+                    junction_chain.trigger(c.to_event({"n": n}))
+                    await junction_chain._process_event()
+
+        snapshots = [call[0][0] for call in spy_emit.call_args_list]
+        assert all(isinstance(s, actchain.JunctionSnapshot) for s in snapshots)
+        assert snapshots[0] == {f"chain{i}": {"n": 0} for i in range(16)}
+        for k, snapshot in enumerate(snapshots[1:], start=1):
+            n, changed = divmod(k - 1, 5)
+            assert snapshot == {
+                f"chain{i}": {"n": n + 1 if i <= changed else n if i < 5 else 0}
+                for i in range(16)
+            }
+
+    @pytest.mark.asyncio
+    async def test_events_from_unconnected_chains_do_not_make_it_ready(
+        self, chain1: actchain.Chain, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        junction_chain = actchain.JunctionChain("junction", mode="any")
+        spy_emit = mocker.spy(junction_chain, "emit")
+        chain1.chain(junction_chain)
+
+        junction_chain.trigger(actchain.Event("other", {"msg": 0}))
+        await junction_chain._process_event()
+        spy_emit.assert_not_called()
+
+        junction_chain.trigger(chain1.to_event({"msg": 1}))
+        await junction_chain._process_event()
+        spy_emit.assert_called_once_with({"other": {"msg": 0}, "chain1": {"msg": 1}})
+
 
 class TestAccompanyChain:
     @pytest.mark.asyncio
@@ -476,6 +962,10 @@ class TestAccompanyChain:
 
 
 class TestIntervalSamplingChain:
+    @pytest.fixture
+    def event_loop(self) -> Iterator[asyncio.AbstractEventLoop]:
+        yield from virtual_event_loop()
+
     @pytest.fixture
     def loop(self) -> actchain.LoopChain:
         class _Loop(actchain.Loop):
@@ -512,3 +1002,356 @@ class TestIntervalSamplingChain:
 
         loop_task.cancel()
         sampling_task.cancel()
+
+
+class TestThrottleChain:
+    @pytest.fixture
+    def event_loop(self) -> Iterator[asyncio.AbstractEventLoop]:
+        yield from virtual_event_loop()
+
+    @pytest.mark.asyncio
+    async def test_emits_leading_and_trailing_events(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.ThrottleChain[dict]("throttle", interval=0.05)
+        spy_emit = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+
+        for i in range(3):
+            chain.trigger(chain.to_event({"n": i}))
+        await asyncio.sleep(0.01)
+        assert [c[0][0] for c in spy_emit.call_args_list] == [{"n": 0}]
+
+        # 上流が止まっても窓の終わりに最後のイベントが届く
+        await asyncio.sleep(0.06)
+        assert [c[0][0] for c in spy_emit.call_args_list] == [{"n": 0}, {"n": 2}]
+        assert chain.last_emit_event is not None
+        assert chain.last_emit_event.parent == ("throttle", 3)
+
+        task.cancel()
+
+
+class TestDebounceChain:
+    @pytest.fixture
+    def event_loop(self) -> Iterator[asyncio.AbstractEventLoop]:
+        yield from virtual_event_loop()
+
+    @pytest.mark.asyncio
+    async def test_emits_latest_event_after_quiet_period(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.DebounceChain[dict]("debounce", interval=0.05)
+        spy_emit = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+
+        for i in range(3):
+            chain.trigger(chain.to_event({"n": i}))
+            await asyncio.sleep(0.03)
+        assert spy_emit.call_count == 0
+
+        await asyncio.sleep(0.05)
+        spy_emit.assert_called_once_with({"n": 2})
+
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_emits_within_max_wait(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.DebounceChain[dict]("debounce", interval=0.05, max_wait=0.1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        emits: list[tuple[float, dict]] = []
+        emit = chain.emit
+
+        def record_emit(data: dict) -> None:
+            emits.append((loop.time() - start, data))
+            emit(data)
+
+        mocker.patch.object(chain, "emit", side_effect=record_emit)
+        task = asyncio.create_task(chain.run())
+
+        # 0.03 秒おきにイベントが届き続けるので、静止期間 (0.05 秒) では発火しない
+        for i in range(6):
+            chain.trigger(chain.to_event({"n": i}))
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.05)
+
+        # 最初の保留から max_wait 経過した 0.1 秒で強制的に発火し、
+        # 残りは最後のイベント (0.15 秒) から静止期間後の 0.2 秒で発火する
+        assert [data for _, data in emits] == [{"n": 3}, {"n": 5}]
+        assert [ts for ts, _ in emits] == [
+            pytest.approx(0.1),
+            pytest.approx(0.2),
+        ]
+
+        task.cancel()
+
+
+class TestSampleChain:
+    @pytest.fixture
+    def event_loop(self) -> Iterator[asyncio.AbstractEventLoop]:
+        yield from virtual_event_loop()
+
+    @pytest.mark.asyncio
+    async def test_emits_latest_event_at_fixed_rate(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.SampleChain[dict]("sample", interval=0.03)
+        spy_emit = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+
+        chain.trigger(chain.to_event({"n": 0}))
+        chain.trigger(chain.to_event({"n": 1}))
+        await asyncio.sleep(0.1)
+
+        # 新しいイベントがなくても最新の値を出し続ける
+        assert spy_emit.call_count >= 2
+        assert all(c[0][0] == {"n": 1} for c in spy_emit.call_args_list)
+
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_skips_ticks_without_new_event_unless_hold(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.SampleChain[dict]("sample", interval=0.03, hold=False)
+        spy_emit = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+
+        chain.trigger(chain.to_event({"n": 0}))
+        await asyncio.sleep(0.1)
+
+        spy_emit.assert_called_once_with({"n": 0})
+
+        task.cancel()
+
+
+class TestWindowChain:
+    @staticmethod
+    async def _feed(chain: actchain.WindowChain, rows: list[dict]) -> None:
+        source = actchain.PassThroughChain[Mapping[str, Any]]("source")
+        task = asyncio.create_task(chain.run())
+        for row in rows:
+            chain.trigger(source.to_event(row))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_tumbling_count_window_emits_on_close(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.WindowChain("window", ["x"], size=3)
+        spy_emit = mocker.spy(chain, "emit")
+
+        await self._feed(chain, [{"x": x} for x in [1, 5, 3, 2, 2, 8, 4]])
+
+        results = [c[0][0] for c in spy_emit.call_args_list]
+        assert [r["count"] for r in results] == [3, 3]
+        assert results[0]["x"] == {
+            "sum": 9.0,
+            "mean": 3.0,
+            "variance": pytest.approx(8 / 3),
+            "min": 1.0,
+            "max": 5.0,
+        }
+        assert results[1]["x"]["min"] == 2.0
+        assert results[1]["x"]["max"] == 8.0
+
+    @pytest.mark.asyncio
+    async def test_sliding_count_window_evicts_oldest(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.WindowChain(
+            "window", ["p"], kind="sliding", size=3, vwap=("p", "v")
+        )
+        spy_emit = mocker.spy(chain, "emit")
+        rows = [{"p": p, "v": v} for p, v in [(10, 1), (7, 2), (12, 1), (9, 3)]]
+
+        await self._feed(chain, rows)
+
+        results = [c[0][0] for c in spy_emit.call_args_list]
+        assert [r["count"] for r in results] == [1, 2, 3, 3]
+        # 最大値の10が窓から出ても正しく追従する
+        assert [r["p"]["max"] for r in results] == [10.0, 10.0, 12.0, 12.0]
+        assert [r["p"]["min"] for r in results] == [10.0, 7.0, 7.0, 7.0]
+        assert results[-1]["p"]["mean"] == pytest.approx(28 / 3)
+        assert results[-1]["p"]["variance"] == pytest.approx(
+            sum((p - 28 / 3) ** 2 for p in [7, 12, 9]) / 3
+        )
+        assert results[-1]["vwap"] == pytest.approx((14 + 12 + 27) / 6)
+
+    @pytest.mark.asyncio
+    async def test_tumbling_time_window_with_allowed_lateness(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.WindowChain(
+            "window", ["x"], duration=10, time_field="t", allowed_lateness=2
+        )
+        spy_emit = mocker.spy(chain, "emit")
+        rows = [
+            {"t": 1, "x": 1},
+            {"t": 11, "x": 2},
+            # 遅れて届いたが許容範囲内なので最初の窓に入る
+            {"t": 9, "x": 3},
+            {"t": 13, "x": 4},
+            # 最初の窓は閉じているので捨てられる
+            {"t": 5, "x": 5},
+            {"t": 25, "x": 6},
+        ]
+
+        await self._feed(chain, rows)
+
+        results = [c[0][0] for c in spy_emit.call_args_list]
+        assert [(r["start"], r["end"], r["count"]) for r in results] == [
+            (0, 10, 2),
+            (10, 20, 2),
+        ]
+        assert results[0]["x"]["sum"] == 4.0
+        assert chain.metrics()[chain.name]["dropped"] == 1
+        assert chain.watermark == 23
+
+    @pytest.mark.asyncio
+    async def test_sliding_time_window(self, mocker: pytest_mock.MockerFixture) -> None:
+        chain = actchain.WindowChain(
+            "window", ["x"], kind="sliding", duration=5, time_field="t"
+        )
+        spy_emit = mocker.spy(chain, "emit")
+        rows = [{"t": t, "x": t} for t in [0, 2, 4, 6, 9]]
+
+        await self._feed(chain, rows)
+
+        results = [c[0][0] for c in spy_emit.call_args_list]
+        assert [r["count"] for r in results] == [1, 2, 3, 3, 2]
+        assert results[-1]["x"]["min"] == 6.0
+        assert (results[-1]["start"], results[-1]["end"]) == (4, 9)
+
+    def test_rejects_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError):
+            actchain.WindowChain("window", ["x"])
+        with pytest.raises(ValueError):
+            actchain.WindowChain("window", ["x"], size=3, duration=1)
+        with pytest.raises(ValueError):
+            actchain.WindowChain("window", ["x"], kind="sliding", size=3, emit="close")
+
+
+class TestRecorderChain:
+    @pytest.mark.asyncio
+    async def test_records_and_passes_through_events(
+        self, tmp_path: Any, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.RecorderChain("recorder", tmp_path, flush_interval=0.01)
+        spy_emit = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+
+        source = actchain.PassThroughChain("source")
+        for i in range(3):
+            chain.trigger(source.to_event({"n": i}))
+        await asyncio.sleep(0.05)
+
+        # 停止を待たずに定期的に書き出される
+        records = list(actchain.eventlog.EventLogReader(tmp_path).read())
+        assert [(r.name, r.seq, r.data) for r in records] == [
+            ("source", i + 1, {"n": i}) for i in range(3)
+        ]
+        assert spy_emit.call_count == 3
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+class TestBroadcastChain:
+    @pytest.mark.asyncio
+    async def test_fans_out_through_ring(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        broadcast = actchain.BroadcastChain("broadcast")
+        children = [actchain.PassThroughChain(f"child{i}") for i in range(3)]
+        spies = []
+        for child in children:
+            broadcast.chain(child)
+            spies.append(mocker.spy(child, "trigger"))
+
+        for i in range(3):
+            broadcast.emit({"n": i})
+
+        for child, spy in zip(children, spies):
+            assert child.queue_size == 3
+            assert [(await child.next()).data["n"] for _ in range(3)] == [0, 1, 2]
+            assert child.last_trigger_event == broadcast.last_emit_event
+            assert spy.call_count == 0
+        assert broadcast.lags == {"child0": 0, "child1": 0, "child2": 0}
+
+    @pytest.mark.asyncio
+    async def test_wakes_waiting_subscriber(self) -> None:
+        broadcast = actchain.BroadcastChain("broadcast")
+        child = actchain.PassThroughChain("child")
+        broadcast.chain(child)
+        other = actchain.PassThroughChain("other")
+        other.chain(child)
+
+        waiter = asyncio.create_task(child.next())
+        await asyncio.sleep(0)
+        broadcast.emit({"n": 0})
+        assert (await waiter).data == {"n": 0}
+
+        # 他の親からのイベントも受け取る
+        waiter = asyncio.create_task(child.next())
+        await asyncio.sleep(0)
+        other.emit({"n": 1})
+        assert (await waiter).data == {"n": 1}
+
+    @pytest.mark.asyncio
+    async def test_subscribes_entry_of_flow(self) -> None:
+        broadcast = actchain.BroadcastChain("broadcast")
+        function = actchain.Function[dict, dict](lambda e: e.data).as_chain("function")
+        broadcast.chain(actchain.Flow("flow").add(function))
+
+        broadcast.emit({"n": 0})
+
+        assert (await function.next()).data == {"n": 0}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "slow_consumer, expected, dropped",
+        [("lag", [6, 7, 8, 9], 6), ("skip", [9], 9)],
+    )
+    async def test_slow_consumer_loses_events(
+        self, slow_consumer: Any, expected: list[int], dropped: int
+    ) -> None:
+        broadcast = actchain.BroadcastChain(
+            "broadcast", capacity=4, slow_consumer=slow_consumer
+        )
+        child = actchain.PassThroughChain("child")
+        child.enable_metrics()
+        broadcast.chain(child)
+
+        for i in range(10):
+            broadcast.emit({"n": i})
+
+        assert [e.data["n"] for e in child.drain()] == expected
+        assert child.metrics()["child"]["dropped"] == dropped
+
+    @pytest.mark.asyncio
+    async def test_disconnects_slow_consumer(self) -> None:
+        broadcast = actchain.BroadcastChain(
+            "broadcast", capacity=4, slow_consumer="disconnect"
+        )
+        slow = actchain.PassThroughChain("slow")
+        fast = actchain.PassThroughChain("fast")
+        broadcast.chain(slow)
+        broadcast.chain(fast)
+
+        for i in range(5):
+            broadcast.emit({"n": i})
+            await fast.next()
+
+        with pytest.raises(actchain.exceptions.OverrunError):
+            await slow.next()
+        assert broadcast.next_chains == [fast]
+        assert slow.prev_chains == []
+
+        broadcast.emit({"n": 5})
+        assert slow.queue_size == 0
+        assert (await fast.next()).data == {"n": 5}
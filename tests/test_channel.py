@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import actchain
+from actchain.channel import Channel
+
+
+class TestChannel:
+    @pytest.mark.asyncio
+    async def test_get_waits_for_put(self) -> None:
+        channel: Channel[int] = Channel()
+        getter = asyncio.create_task(channel.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+
+        channel.put(1)
+        channel.put(2)
+
+        assert await getter == 1
+        assert await channel.get() == 2
+        assert len(channel) == 0
+
+    @pytest.mark.asyncio
+    async def test_keeps_item_if_consumer_is_cancelled(self) -> None:
+        channel: Channel[int] = Channel()
+        getter = asyncio.create_task(channel.get())
+        await asyncio.sleep(0)
+
+        channel.put(1)
+        getter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await getter
+
+        assert await channel.get() == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_second_consumer(self) -> None:
+        channel: Channel[int] = Channel()
+        getter = asyncio.create_task(channel.get())
+        await asyncio.sleep(0)
+
+        with pytest.raises(RuntimeError):
+            await channel.get()
+        getter.cancel()
+
+    def test_drain(self) -> None:
+        channel: Channel[int] = Channel()
+        for i in range(5):
+            channel.put(i)
+
+        assert channel.drain(2) == [0, 1]
+        assert channel.drain() == [2, 3, 4]
+        assert channel.drain() == []
+        with pytest.raises(asyncio.QueueEmpty):
+            channel.get_nowait()
+
+
+class TestChainableDrain:
+    @pytest.mark.asyncio
+    async def test_drain_frees_bounded_queue(self) -> None:
+        chain = actchain.PassThroughChain("chain")
+        chain.configure_queue(maxsize=2)
+        chain.enable_metrics()
+        for i in range(2):
+            chain.trigger(actchain.Event("source", {"n": i}))
+        assert not chain.writable
+
+        events = chain.drain()
+
+        assert [e.data["n"] for e in events] == [0, 1]
+        assert chain.writable
+        assert chain.metrics()["chain"]["queue_wait"]["count"] == 2
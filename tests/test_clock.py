@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+import pytest_mock
+
+import actchain
+from actchain import clock
+
+
+class TestSystemClock:
+    def test_reads_system_time(self) -> None:
+        assert isinstance(clock.get_clock(), clock.SystemClock)
+        assert abs(clock.time() - time.time()) < 1
+        assert clock.monotonic_ns() <= time.monotonic_ns()
+
+
+class TestRunVirtual:
+    def test_sleeps_without_real_time(self) -> None:
+        async def main() -> tuple[float, float]:
+            start = clock.monotonic()
+            await asyncio.sleep(3600)
+            await clock.sleep(1800)
+            return start, clock.monotonic()
+
+        real_start = time.monotonic()
+        start, end = clock.run_virtual(main())
+
+        assert end - start == pytest.approx(5400)
+        assert time.monotonic() - real_start < 1
+        # 終わったら元の時計に戻る
+        assert isinstance(clock.get_clock(), clock.SystemClock)
+
+    def test_wall_clock_starts_at_epoch(self) -> None:
+        async def main() -> float:
+            await asyncio.sleep(60)
+            return clock.time()
+
+        assert clock.run_virtual(main(), epoch=1_700_000_000) == pytest.approx(
+            1_700_000_060
+        )
+
+    def test_orders_timers_deterministically(self) -> None:
+        async def main() -> list[int]:
+            order: list[int] = []
+
+            async def wake(i: int, delay: float) -> None:
+                await asyncio.sleep(delay)
+                order.append(i)
+
+            await asyncio.gather(*(wake(i, 10 - i) for i in range(10)))
+            return order
+
+        assert clock.run_virtual(main()) == list(reversed(range(10)))
+
+    def test_handles_work_in_threads(self) -> None:
+        async def main() -> int:
+            def work() -> int:
+                time.sleep(0.01)
+                return 1
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, work)
+
+        assert clock.run_virtual(main()) == 1
+
+    def test_runs_chains_in_virtual_time(
+        self, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        async def main() -> list[dict]:
+            chain = actchain.ThrottleChain[dict]("throttle", interval=60)
+            spy_emit = mocker.spy(chain, "emit")
+            task = asyncio.create_task(chain.run())
+            for i in range(3):
+                chain.trigger(chain.to_event({"n": i}))
+                await asyncio.sleep(25)
+            await asyncio.sleep(60)
+            assert chain.last_emit_event is not None
+            assert chain.last_emit_event.ts == pytest.approx(60e9)
+            task.cancel()
+            return [c[0][0] for c in spy_emit.call_args_list]
+
+        assert clock.run_virtual(main()) == [{"n": 0}, {"n": 2}]
+
+
+class OffsetClock(clock.SystemClock):
+    """SystemClock whose monotonic time starts 1000 seconds ahead."""
+
+    def monotonic(self) -> float:
+        return super(OffsetClock, self).monotonic() + 1000
+
+    def monotonic_ns(self) -> int:
+        return super(OffsetClock, self).monotonic_ns() + 1_000_000_000_000
+
+
+class TestSetClock:
+    @pytest.mark.asyncio
+    async def test_timers_follow_clock(self, mocker: pytest_mock.MockerFixture) -> None:
+        offset_clock = OffsetClock()
+        spy_call_at = mocker.spy(offset_clock, "call_at")
+        clock.set_clock(offset_clock)
+        try:
+            chain = actchain.ThrottleChain[dict]("throttle", interval=0.02)
+            spy_emit = mocker.spy(chain, "emit")
+            task = asyncio.create_task(chain.run())
+            for i in range(2):
+                chain.trigger(chain.to_event({"n": i}))
+            await asyncio.sleep(0.06)
+            task.cancel()
+        finally:
+            clock.set_clock(clock.SystemClock())
+
+        assert [c[0][0] for c in spy_emit.call_args_list] == [{"n": 0}, {"n": 1}]
+        # タイマーの時刻も設定した時計で測る
+        assert spy_call_at.call_args[0][0] > 1000
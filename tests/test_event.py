@@ -0,0 +1,56 @@
+import pytest
+
+import actchain
+from actchain.chains.base import Chain
+
+
+def test_is_slotted() -> None:
+    event: actchain.Event[dict] = actchain.Event("test", {})
+
+    assert not hasattr(event, "__dict__")
+
+
+def test_ignores_metadata_in_comparison() -> None:
+    assert actchain.Event("test", {"n": 1}, ts=1, seq=1) == actchain.Event(
+        "test", {"n": 1}, ts=2, seq=2, parent=("parent", 1)
+    )
+
+
+def test_to_event_fills_metadata() -> None:
+    class ChainImpl(Chain):
+        async def _on_handle(self, event: actchain.Event) -> None:
+            return None
+
+    c = ChainImpl("c")
+    event1 = c.to_event({})
+    event2 = c.to_event({})
+
+    assert event1.id == ("c", 1)
+    assert event2.id == ("c", 2)
+    assert event1.ts <= event2.ts
+    assert event1.parent is None
+
+
+@pytest.mark.asyncio
+async def test_emitted_event_refers_to_handled_event_as_parent() -> None:
+    chain1 = actchain.Function[dict, dict](lambda e: e.data).as_chain("chain1")
+    chain2 = actchain.Function[dict, dict](lambda e: e.data).as_chain("chain2")
+    chain1.chain(chain2)
+    event = actchain.Event("source", {"n": 1}, seq=10)
+
+    chain1.trigger(event)
+    await chain1._process_event()
+
+    assert chain1.last_emit_event is not None
+    assert chain1.last_emit_event.parent == ("source", 10)
+    assert chain2.last_trigger_event is chain1.last_emit_event
+
+
+def test_trigger_stamps_event_created_directly() -> None:
+    chain: actchain.PassThroughChain = actchain.PassThroughChain("chain")
+    event: actchain.Event[dict] = actchain.Event("source", {})
+    assert event.ts == 0 and event.parent is None
+
+    chain.trigger(event)
+
+    assert event.ts > 0
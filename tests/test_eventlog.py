@@ -0,0 +1,110 @@
+import threading
+from pathlib import Path
+
+import pytest
+import pytest_mock
+
+from actchain.eventlog import EventLogReader, EventLogWriter, LogRecord
+from actchain.shm import JsonSerializer
+
+
+class TestEventLog:
+    def test_reads_appended_events(self, tmp_path: Path) -> None:
+        writer = EventLogWriter(tmp_path, fsync="never")
+        for i in range(3):
+            writer.append("source", i, {"n": i}, ts=100 + i)
+        writer.close()
+
+        records = list(EventLogReader(tmp_path).read())
+
+        assert records == [LogRecord("source", 100 + i, i, {"n": i}) for i in range(3)]
+
+    def test_batches_writes(self, tmp_path: Path) -> None:
+        writer = EventLogWriter(tmp_path, flush_size=1024, fsync="never")
+        writer.append("source", 1, {"n": 1})
+
+        # flushするまではファイルに書き込まれない
+        assert list(EventLogReader(tmp_path).read()) == []
+        writer.flush()
+        assert len(list(EventLogReader(tmp_path).read())) == 1
+        writer.close()
+
+    def test_rolls_segments_and_reads_time_range(self, tmp_path: Path) -> None:
+        writer = EventLogWriter(
+            tmp_path,
+            serializer=JsonSerializer(),
+            segment_size=512,
+            flush_size=64,
+            index_interval=64,
+            fsync="flush",
+        )
+        for i in range(100):
+            writer.append("source", i, i, ts=1000 + 10 * i)
+        writer.close()
+        reader = EventLogReader(tmp_path, serializer=JsonSerializer())
+
+        assert len(reader.segments()) > 1
+        assert [r.data for r in reader.read()] == list(range(100))
+        assert [r.data for r in reader.read(start=1255, end=1500)] == list(
+            range(26, 50)
+        )
+        assert [r.data for r in reader.read(start=1990)] == [99]
+        assert list(reader.read(end=1000)) == []
+
+    def test_keeps_times_monotonic(self, tmp_path: Path) -> None:
+        writer = EventLogWriter(tmp_path, fsync="never")
+        writer.append("source", 1, {}, ts=200)
+        writer.append("source", 2, {}, ts=100)
+        writer.close()
+
+        assert [r.ts for r in EventLogReader(tmp_path).read()] == [200, 200]
+
+    def test_ignores_incomplete_record(self, tmp_path: Path) -> None:
+        writer = EventLogWriter(tmp_path, fsync="never")
+        writer.append("source", 1, {"n": 1})
+        writer.append("source", 2, {"n": 2})
+        writer.close()
+        segment = EventLogReader(tmp_path).segments()[0]
+        segment.write_bytes(segment.read_bytes()[:-3])
+
+        assert [r.seq for r in EventLogReader(tmp_path).read()] == [1]
+
+    def test_new_writer_starts_new_segment(self, tmp_path: Path) -> None:
+        for i in range(2):
+            writer = EventLogWriter(tmp_path, fsync="never")
+            writer.append("source", i, {"n": i})
+            writer.close()
+
+        reader = EventLogReader(tmp_path)
+        assert [p.name for p in reader.segments()] == ["00000001.log", "00000002.log"]
+        assert [r.seq for r in reader.read()] == [0, 1]
+
+    def test_writes_in_background_thread(
+        self, tmp_path: Path, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        threads: list[int] = []
+        mocker.patch(
+            "actchain.eventlog.os.fsync",
+            side_effect=lambda fd: threads.append(threading.get_ident()),
+        )
+        writer = EventLogWriter(
+            tmp_path, segment_size=64, fsync="flush", background=True
+        )
+        for i in range(4):
+            writer.append("source", i, {"n": i})
+        writer.close()
+
+        assert [r.seq for r in EventLogReader(tmp_path).read()] == [0, 1, 2, 3]
+        assert len(EventLogReader(tmp_path).segments()) > 1
+        assert threads and threading.get_ident() not in threads
+
+    def test_raises_background_error_on_next_call(self, tmp_path: Path) -> None:
+        writer = EventLogWriter(tmp_path, fsync="never", background=True)
+        writer.append("source", 1, {"n": 1})
+        writer.flush()
+        (tmp_path / "00000002.log").touch()
+
+        # 既存のファイルは上書きしないので、書き込みスレッドで失敗する
+        writer._roll()
+        with pytest.raises(FileExistsError):
+            writer.close()
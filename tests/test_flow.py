@@ -1,10 +1,34 @@
 import asyncio
-from typing import AsyncGenerator
+import os
+import time
+from typing import Any, AsyncGenerator
 
 import pytest
 import pytest_mock
 
 import actchain
+from actchain.chains.base import Chainable
+
+
+def build_pid_flow() -> actchain.Flow:
+    """Flow tagging events with the pid of the process handling them."""
+
+    def tag(event: actchain.Event) -> dict:
+        if event.data.get("crash"):
+            os._exit(1)
+        time.sleep(event.data.get("sleep", 0))
+        return {**event.data, "pid": os.getpid()}
+
+    inner = actchain.Flow("inner").add(actchain.Function(tag).as_chain("tag"))
+    return (
+        actchain.Flow("outer")
+        .add(inner)
+        .add(
+            actchain.Function[dict, dict](
+                lambda e: {**e.data, "n": e.data["n"] * 2}
+            ).as_chain("x2")
+        )
+    )
 
 
 class TestFlow:
@@ -202,6 +226,162 @@ class TestFlow:
             spy_freeze.assert_called_once()
             assert flow.next_chains == [add_2]
 
+    class TestQueueDefaults:
+        def test_applies_defaults_to_added_chainables(
+            self, loop_123: actchain.LoopChain, add_1: actchain.FunctionChain
+        ) -> None:
+            flow = (
+                actchain.Flow("test", maxsize=8, overflow="drop_oldest")
+                .add(loop_123)
+                .add(add_1)
+                .freeze()
+            )
+            for chainable in flow.chainables(flat=True):
+                assert isinstance(chainable, Chainable)
+                assert chainable.maxsize == 8
+                assert chainable.overflow == actchain.OverflowPolicy.DROP_OLDEST
+
+        def test_does_not_override_chainable_settings(
+            self, loop_123: actchain.LoopChain
+        ) -> None:
+            add_1 = actchain.Function[dict, dict](lambda e: e.data).as_chain(
+                "add_1", maxsize=2, overflow="raise"
+            )
+            actchain.Flow("test", maxsize=8).add(loop_123).add(add_1)
+
+            assert add_1.maxsize == 2
+            assert add_1.overflow == actchain.OverflowPolicy.RAISE
+
+        def test_sums_overflow_counts(self, loop_123: actchain.LoopChain) -> None:
+            add_1 = actchain.Function[dict, dict](lambda e: e.data).as_chain("add_1")
+            flow = actchain.Flow("test", maxsize=1, overflow="drop_newest")
+            flow.add(loop_123).add(add_1)
+            add_1.trigger(add_1.to_event({}))
+            add_1.trigger(add_1.to_event({}))
+
+            assert flow.overflow_counts[actchain.OverflowPolicy.DROP_NEWEST] == 1
+
+    class TestCompile:
+        def test_fuses_linear_function_chains(
+            self,
+            loop_123: actchain.LoopChain,
+            add_1: actchain.FunctionChain,
+            add_2: actchain.FunctionChain,
+        ) -> None:
+            flow = actchain.Flow("test").add(loop_123).add(add_1).add(add_2).compile()
+
+            assert flow.is_compiled
+            assert [f.stages for f in flow.fused_chains] == [[add_1, add_2]]
+            assert isinstance(flow.anchor_chain, actchain.PassThroughChain)
+            assert flow.anchor_chain.inline
+            # 接続はそのまま残る
+            assert add_1.next_chains == [add_2]
+
+        def test_does_not_fuse_fan_out(
+            self,
+            loop_123: actchain.LoopChain,
+            add_1: actchain.FunctionChain,
+            add_2: actchain.FunctionChain,
+        ) -> None:
+            add_3 = actchain.Function[dict, dict](lambda e: e.data).as_chain("add_3")
+            flow = (
+                actchain.Flow("test")
+                .add(loop_123)
+                .add(add_1)
+                .add(add_2, add_3)
+                .compile()
+            )
+
+            assert flow.fused_chains == []
+            assert isinstance(flow.anchor_chain, actchain.JunctionChain)
+
+        @pytest.mark.asyncio
+        async def test_emits_same_results_with_stage_metrics(
+            self,
+            loop_123: actchain.LoopChain,
+            add_1: actchain.FunctionChain,
+            add_2: actchain.FunctionChain,
+        ) -> None:
+            results = []
+            sink = actchain.Function[Any, Any](
+                lambda e: results.append(e.data)
+            ).as_chain("sink")
+            flow = actchain.Flow("test").add(loop_123).add(add_1).add(add_2)
+            flow.chain(sink)
+            flow.compile()
+
+            tasks = [asyncio.create_task(c.run()) for c in (flow, sink)]
+            while len(results) < 3:
+                await asyncio.sleep(0.01)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            assert results == [4, 5, 6]
+            assert add_1.last_emit_event == add_1.to_event(4)
+            assert add_2.last_trigger_event is add_1.last_emit_event
+            # 融合されても各ステージのメトリクスは記録される
+            metrics = flow.metrics()
+            assert metrics["add_1_function"]["received"] == 3
+            assert metrics["add_1_function"]["emitted"] == 3
+            assert metrics["add_2_function"]["received"] == 3
+            assert metrics["add_2_function"]["emitted"] == 3
+            # インラインのアンカーから下流へも親子関係が辿れる
+            assert sink.last_handle_event is not None
+            assert sink.last_handle_event.id == ("test_anchor", 3)
+            assert sink.last_handle_event.parent == ("add_2_function", 3)
+
+        @pytest.mark.asyncio
+        async def test_reads_broadcast_subscribed_after_compile(
+            self,
+            add_1: actchain.FunctionChain,
+            add_2: actchain.FunctionChain,
+        ) -> None:
+            flow = actchain.Flow("test").add(add_1).add(add_2).compile()
+            broadcast: actchain.BroadcastChain = actchain.BroadcastChain("broadcast")
+            broadcast.chain(flow)
+            [fused] = flow.fused_chains
+            task = asyncio.create_task(flow.run())
+
+            broadcast.emit(1)
+            assert fused.queue_size == 1
+            await asyncio.sleep(0.01)
+
+            # 差し替えられた先頭ステージのキューを読む
+            assert add_2.last_emit_event is not None
+            assert add_2.last_emit_event.data == 4
+            assert fused.queue_size == 0
+            task.cancel()
+
+            # キューの設定も先頭ステージに委譲される
+            fused.configure_queue(maxsize=4, overflow="drop_newest")
+            assert (add_1.maxsize, add_1.overflow) == (4, "drop_newest")
+            assert (fused.maxsize, fused.overflow) == (4, "drop_newest")
+
+        @pytest.mark.asyncio
+        async def test_rejects_switching_inline_while_running(self) -> None:
+            anchor = actchain.PassThroughChain("anchor")
+            task = asyncio.create_task(anchor.run())
+            await asyncio.sleep(0)
+
+            with pytest.raises(actchain.exceptions.UnsupportedOperationError):
+                anchor.set_inline()
+            task.cancel()
+
+        def test_compiles_nested_flows(
+            self,
+            loop_123: actchain.LoopChain,
+            add_1: actchain.FunctionChain,
+            add_2: actchain.FunctionChain,
+        ) -> None:
+            inner = actchain.Flow("inner").add(loop_123).add(add_1)
+            outer = actchain.Flow("outer").add(inner).add(add_2).compile()
+
+            assert inner.is_compiled
+            assert outer.is_compiled
+            assert isinstance(inner.anchor_chain, actchain.PassThroughChain)
+            assert inner.anchor_chain.inline
+
     @pytest.mark.asyncio
     async def test_simple_flow(
         self, loop_123: actchain.LoopChain, add_1: actchain.FunctionChain
@@ -235,3 +415,128 @@ class TestFlow:
                 "test",
                 anchor_chain=add_1,  # type: ignore
             )
+
+
+class TestProcessFlow:
+    @staticmethod
+    def _build(
+        on_result: list[actchain.Event],
+    ) -> tuple[actchain.PassThroughChain, actchain.ProcessFlow]:
+        source = actchain.PassThroughChain("source")
+        process_flow = actchain.ProcessFlow("process", build_pid_flow)
+        sink = actchain.PassThroughChain("sink", on_handle_cb=on_result.append)
+        source.chain(process_flow)
+        process_flow.chain(sink)
+        return source, process_flow
+
+    @staticmethod
+    async def _wait_for(results: list, n: int) -> None:
+        async def wait() -> None:
+            while len(results) < n:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait(), timeout=10)
+
+    @pytest.mark.asyncio
+    async def test_runs_flow_in_child_process(self) -> None:
+        results: list[actchain.Event] = []
+        source, process_flow = self._build(results)
+        task = asyncio.create_task(actchain.run(source, process_flow))
+        sink_task = asyncio.create_task(process_flow.next_chains[0].run())
+
+        for i in range(3):
+            source.trigger(source.to_event({"n": i}))
+        await self._wait_for(results, 3)
+
+        assert [e.data["n"] for e in results] == [0, 2, 4]
+        pids = {e.data["pid"] for e in results}
+        assert pids == {process_flow.pid} and os.getpid() not in pids
+        # 子プロセスのflowでemitされたイベントが親になる
+        assert process_flow.last_emit_event is not None
+        assert process_flow.last_emit_event.parent is not None
+        assert process_flow.last_emit_event.parent[0] == "outer_anchor"
+
+        task.cancel()
+        sink_task.cancel()
+        await asyncio.gather(task, sink_task, return_exceptions=True)
+        assert process_flow.pid is None
+
+    @pytest.mark.asyncio
+    async def test_run_raises_when_child_exits(self) -> None:
+        results: list[actchain.Event] = []
+        source, process_flow = self._build(results)
+        task = asyncio.create_task(source.run())
+
+        run = asyncio.create_task(process_flow.run())
+        source.trigger(source.to_event({"n": 0, "crash": True}))
+
+        with pytest.raises(actchain.exceptions.ProcessExitedError):
+            await asyncio.wait_for(run, timeout=10)
+        assert process_flow.pid is None
+
+        task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_does_not_block_event_loop(self) -> None:
+        results: list[actchain.Event] = []
+        source, process_flow = self._build(results)
+        task = asyncio.create_task(actchain.run(source, process_flow))
+        source.trigger(source.to_event({"n": 0}))
+        await asyncio.wait_for(self._wait_started(process_flow), timeout=10)
+        # 子プロセスが処理中のままキャンセルする
+        source.trigger(source.to_event({"n": 1, "sleep": 0.5}))
+        await asyncio.sleep(0.1)
+
+        gaps = []
+
+        async def tick() -> None:
+            last = time.monotonic()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(tick())
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        ticker.cancel()
+
+        assert process_flow.pid is None
+        assert max(gaps) < 0.2
+
+    @staticmethod
+    async def _wait_started(process_flow: actchain.ProcessFlow) -> None:
+        while process_flow.pid is None:
+            await asyncio.sleep(0.01)
+
+    @pytest.mark.asyncio
+    async def test_run_forever_restarts_child(self) -> None:
+        results: list[actchain.Event] = []
+        source, process_flow = self._build(results)
+        tasks = [
+            asyncio.create_task(source.run()),
+            asyncio.create_task(process_flow.next_chains[0].run()),
+            asyncio.create_task(process_flow.run_forever(cooldown=0)),
+        ]
+
+        source.trigger(source.to_event({"n": 1}))
+        await self._wait_for(results, 1)
+        first_pid = process_flow.pid
+        source.trigger(source.to_event({"n": 2, "crash": True}))
+        source.trigger(source.to_event({"n": 3}))
+
+        async def wait_restart() -> None:
+            while process_flow.pid in (None, first_pid):
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait_restart(), timeout=10)
+        source.trigger(source.to_event({"n": 4}))
+        await self._wait_for(results, 2)
+
+        assert results[-1].data["n"] == 8
+        assert results[-1].data["pid"] != first_pid
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,6 +1,10 @@
-from typing import TypedDict
+import asyncio
+import threading
+import time
+from typing import Iterator, TypedDict
 
 import pytest
+import pytest_mock
 
 import actchain
 
@@ -33,6 +37,77 @@ async def test_calls_sync_function() -> None:
     assert expected == actual
 
 
+@pytest.mark.asyncio
+async def test_offloads_sync_function_to_thread_pool() -> None:
+    def blocking_fnc(event: actchain.Event) -> dict:
+        time.sleep(0.1)
+        return {"thread": threading.current_thread().name}
+
+    fnc = actchain.Function(blocking_fnc, offload=True)
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    actual = await fnc.handle(actchain.Event("test", {}))
+    ticker.cancel()
+
+    assert actual is not None
+    assert actual["thread"].startswith("actchain")
+    # ブロッキング中もイベントループは止まらない
+    assert ticks >= 5
+
+
+@pytest.fixture
+def two_workers() -> Iterator[None]:
+    actchain.executor.configure(max_workers=2)
+    yield
+    # 共有のスレッドプールを既定の設定に戻す
+    actchain.executor.configure()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("two_workers")
+async def test_offloaded_function_runs_concurrently_in_concurrent_chain(
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    # 2つの呼び出しが同時に実行されていなければ揃わずにタイムアウトする
+    barrier = threading.Barrier(2, timeout=5)
+
+    def blocking_fnc(event: actchain.Event) -> dict:
+        barrier.wait()
+        return event.data
+
+    chain = actchain.Function[dict, dict](blocking_fnc, offload=True).as_chain(
+        chain_type="concurrent"
+    )
+    spy_emit = mocker.spy(chain, "emit")
+    for i in range(2):
+        chain.trigger(chain.to_event({"n": i}))
+        await chain._process_event()
+    async with asyncio.timeout(10):
+        while spy_emit.call_count < 2 and not barrier.broken:
+            await asyncio.sleep(0.01)
+
+    assert not barrier.broken
+    assert sorted(c[0][0]["n"] for c in spy_emit.call_args_list) == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_handle_batch_calls_handle_for_each_event() -> None:
+    fnc = actchain.Function[dict, dict](lambda e: {"n": e.data["n"] + 1})
+
+    actual = await fnc.handle_batch(
+        [actchain.Event("test", {"n": 1}), actchain.Event("test", {"n": 2})]
+    )
+
+    assert actual == [{"n": 2}, {"n": 3}]
+
+
 @pytest.mark.asyncio
 @pytest.mark.skip(reason="typecheck check")
 async def test_type() -> None:
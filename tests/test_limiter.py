@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+import actchain
+from actchain.exceptions import ThrottledError
+
+
+def test_aimd_limiter_increases_while_saturated_and_backs_off_on_error() -> None:
+    limiter = actchain.AIMDLimiter(initial_limit=4, max_limit=8)
+
+    # 上限まで使われている間だけ増える
+    for _ in range(50):
+        limiter._in_flight = limiter.limit
+        limiter.release(1_000)
+    assert limiter.limit == 8
+
+    limiter._in_flight = 1
+    limiter.release(1_000, error=True)
+    assert limiter.limit == 7
+
+    for _ in range(100):
+        limiter._in_flight = 1
+        limiter.release(1_000)
+    assert limiter.limit == 7
+
+
+def test_aimd_limiter_backs_off_on_slow_handling() -> None:
+    limiter = actchain.AIMDLimiter(initial_limit=10, latency_threshold=0.1)
+
+    limiter._in_flight = 1
+    limiter.release(200_000_000)
+
+    assert limiter.limit == 9
+
+
+def test_gradient_limiter_shrinks_when_latency_rises() -> None:
+    limiter = actchain.GradientLimiter(initial_limit=20)
+    for _ in range(50):
+        limiter._in_flight = limiter.limit
+        limiter.release(1_000_000)
+    grown = limiter.limit
+
+    for _ in range(20):
+        limiter._in_flight = limiter.limit
+        limiter.release(10_000_000)
+
+    assert grown > 20
+    assert limiter.limit < grown
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_until_released() -> None:
+    limiter = actchain.FixedLimiter(1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    limiter.release(1_000)
+    await asyncio.wait_for(waiter, 1)
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chain_backs_off_on_throttle() -> None:
+    async def handle(event: actchain.Event) -> dict:
+        if event.data["throttled"]:
+            raise ThrottledError()
+        return event.data
+
+    limiter = actchain.AIMDLimiter(initial_limit=4)
+    chain = actchain.Function(handle).as_chain(
+        chain_type="concurrent", max_concurrency=limiter
+    )
+    task = asyncio.create_task(chain.run())
+    for _ in range(3):
+        chain.trigger(chain.to_event({"throttled": True}))
+    while chain.metrics()[chain.name]["dropped"] < 3:
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    # 4 * 0.9^3 = 2.9
+    assert chain.max_concurrency == 2
+    metrics = chain.metrics()[chain.name]
+    assert metrics["concurrency_limit"] == 2
+    assert metrics["dropped"] == 3
+    assert chain.last_emit_event is None
@@ -1,8 +1,12 @@
+import asyncio
+import time
+from pathlib import Path
 from typing import AsyncGenerator
 
 import pytest
 
 import actchain
+from actchain.eventlog import EventLogWriter
 
 
 @pytest.mark.asyncio
@@ -62,3 +66,61 @@ async def test_raises_error_if_loop_fn_is_not_async() -> None:
 
     with pytest.raises(actchain.exceptions.InvalidOverrideError):
         TestLoop().as_chain()
+
+
+def write_log(path: Path) -> None:
+    writer = EventLogWriter(path, fsync="never")
+    for i in range(5):
+        name = "orderbook" if i % 2 == 0 else "trade"
+        writer.append(name, i, {"n": i}, ts=i * 20_000_000)
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_as_fast_as_possible(tmp_path: Path) -> None:
+    write_log(tmp_path)
+    loop = actchain.ReplayLoop(tmp_path, speed=None)
+
+    start = time.monotonic()
+    items = [data async for data in loop.loop()]
+
+    assert [(e.name, e.seq, e.data) for e in items] == [
+        ("orderbook" if i % 2 == 0 else "trade", i, {"n": i}) for i in range(5)
+    ]
+    assert time.monotonic() - start < 0.05
+    assert loop.replayed == 5
+
+
+@pytest.mark.asyncio
+async def test_replay_honors_intervals_scaled_by_speed(tmp_path: Path) -> None:
+    write_log(tmp_path)
+    loop = actchain.ReplayLoop(tmp_path, speed=2.0, names=["orderbook"])
+
+    start = time.monotonic()
+    items = [data async for data in loop.loop()]
+
+    # 記録上は80msの間隔を2倍速で再生する
+    assert [e.data for e in items] == [{"n": 0}, {"n": 2}, {"n": 4}]
+    assert 0.035 < time.monotonic() - start < 0.08
+
+
+@pytest.mark.asyncio
+async def test_replay_chain_keeps_recorded_names(tmp_path: Path) -> None:
+    write_log(tmp_path)
+    replay = actchain.ReplayLoop(tmp_path, speed=None).as_chain("replay")
+    received: list[tuple[str, int]] = []
+
+    class CollectChain(actchain.Chain):
+        async def _on_handle(self, event: actchain.Event) -> None:
+            received.append((event.name, event.seq))
+
+    collector = CollectChain("collect")
+    replay.chain(collector)
+    task = asyncio.create_task(actchain.run(replay, collector))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # 記録したときの名前とseqのまま次のchainに渡る
+    assert received == [("orderbook" if i % 2 == 0 else "trade", i) for i in range(5)]
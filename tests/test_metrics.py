@@ -0,0 +1,105 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+
+import actchain
+from actchain.metrics import ChainMetrics, Histogram
+
+
+def test_histogram() -> None:
+    h = Histogram()
+    for ns in (0, 1, 100, 1000, 1000):
+        h.record(ns)
+
+    snapshot = h.snapshot()
+    assert snapshot["count"] == 5
+    assert snapshot["mean_ns"] == 2101 / 5
+    assert snapshot["max_ns"] == 1000
+    # 100nsは[64, 128)のバケットに入る
+    assert h.percentile(50) == 127
+    assert h.percentile(100) == 1000
+
+
+def test_samples_timings_every_n_events() -> None:
+    m = ChainMetrics(sample_every=3)
+
+    assert [m.sample_handle() for _ in range(6)] == [False, False, True] * 2
+
+
+@pytest.mark.asyncio
+async def test_records_chain_metrics() -> None:
+    c1 = actchain.Function[dict, dict](lambda e: e.data).as_chain("c1")
+    c2 = actchain.Function[dict, dict](lambda e: None).as_chain(
+        "c2", maxsize=1, overflow="raise"
+    )
+    c3 = actchain.Function[dict, dict](lambda e: None).as_chain("c3", input="latest")
+    c1.chain(c2)
+    c1.chain(c3)
+
+    for i in range(2):
+        c1.trigger(c1.to_event({"n": i}))
+    await c1._process_event()
+    await c2._process_event()
+    await c1._process_event()
+    await c3._process_event()
+
+    m1 = c1.metrics()["c1"]
+    assert m1["received"] == 2
+    assert m1["emitted"] == 2
+    assert m1["queue_high_water"] == 2
+    assert m1["queue_wait"]["count"] == 2
+    assert m1["handle_time"]["count"] == 2
+    # c3はlatestなので1つ目のイベントは捨てられる
+    assert c3.metrics()["c3"]["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_metrics_are_not_recorded() -> None:
+    c = actchain.Function[dict, dict](lambda e: e.data).as_chain("c")
+    c.enable_metrics(False)
+
+    c.trigger(c.to_event({}))
+    await c._process_event()
+
+    assert c.metrics()["c"]["received"] == 0
+    assert c.metrics()["c"]["handle_time"]["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_flow_collects_metrics_of_chainables() -> None:
+    class Loop123(actchain.Loop):
+        async def loop(self) -> AsyncGenerator[dict, None]:
+            for i in range(3):
+                yield {"n": i}
+
+    loop = Loop123().as_chain("loop")
+    add_1 = actchain.Function[dict, dict](lambda e: {"n": e.data["n"] + 1}).as_chain(
+        "add_1"
+    )
+    flow = actchain.Flow("test").add(loop).add(add_1).freeze()
+
+    task = asyncio.create_task(flow.run())
+    while flow.metrics()["add_1"]["emitted"] < 3:
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    metrics = flow.metrics()
+    assert set(metrics) == {"loop", "add_1", "test_anchor"}
+    assert metrics["loop"]["emitted"] == 3
+    assert metrics["add_1"]["received"] == 3
+    assert metrics == actchain.metrics.collect(flow)
+
+
+def test_collect_keeps_chainables_sharing_a_name() -> None:
+    c1 = actchain.PassThroughChain("same")
+    c2 = actchain.PassThroughChain("same")
+    flow = actchain.Flow("test").add(c1).add(c2).freeze()
+    c2.trigger(c2.to_event({}))
+
+    metrics = flow.metrics()
+
+    assert [k for k in metrics if k.startswith("same")] == ["same", "same#2"]
+    assert metrics["same"]["received"] == 0
+    assert metrics["same#2"]["received"] == 1
+    assert actchain.metrics.collect(c1, c1) == c1.metrics()
@@ -0,0 +1,41 @@
+import pickle
+
+import pytest
+
+import actchain
+
+
+def test_upper_layers_shadow_lower_layers() -> None:
+    data = actchain.LayeredData({"a": 1}, {"a": 0, "b": 2})
+
+    assert data["a"] == 1
+    assert data["b"] == 2
+    assert data.get("c") is None
+    with pytest.raises(KeyError):
+        data["c"]
+
+
+def test_behaves_like_a_mapping() -> None:
+    data = actchain.LayeredData({"a": 1}, {"a": 0, "b": 2})
+
+    assert list(data) == ["a", "b"]
+    assert len(data) == 2
+    assert "b" in data
+    assert data == {"a": 1, "b": 2}
+    assert {**data} == {"a": 1, "b": 2}
+    assert data.to_dict() == {"a": 1, "b": 2}
+
+
+def test_flattens_stacked_layers_without_copying() -> None:
+    lower = {"a": 0}
+    middle = actchain.LayeredData({"b": 1}, lower)
+    data = actchain.LayeredData({"c": 2}, middle)
+
+    assert len(data.layers) == 3
+    assert data.layers[-1] is lower
+
+
+def test_is_picklable() -> None:
+    data = actchain.LayeredData({"a": 1}, {"b": 2})
+
+    assert pickle.loads(pickle.dumps(data)) == data
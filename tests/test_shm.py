@@ -0,0 +1,209 @@
+import asyncio
+import multiprocessing
+import uuid
+from typing import Any, Generator
+
+import pytest
+import pytest_mock
+
+import actchain
+from actchain.shm import JsonSerializer, ShmRing
+
+
+@pytest.fixture
+def shm_name() -> str:
+    return f"actchain-test-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def ring(shm_name: str) -> Generator[ShmRing, None, None]:
+    ring = ShmRing.create(shm_name, slots=4, slot_size=16)
+    yield ring
+    ring.close()
+
+
+def read_in_child(shm_name: str, n: int, queue: Any) -> None:
+    async def read() -> list:
+        loop = actchain.ShmBroadcastLoop(shm_name, start="earliest")
+        items = []
+        async for data in loop.loop():
+            items.append(data)
+            if len(items) == n:
+                break
+        return items
+
+    queue.put(asyncio.run(read()))
+
+
+class TestShmRing:
+    def test_reads_written_messages(self, ring: ShmRing, shm_name: str) -> None:
+        reader = ShmRing.attach(shm_name)
+        assert reader.read(1) is None
+
+        assert ring.write(b"a") == 1
+        assert ring.write(b"bc") == 2
+
+        assert reader.read(1) == b"a"
+        assert reader.read(2) == b"bc"
+        assert reader.read(3) is None
+        reader.close()
+
+    def test_raises_overrun_error_on_overwritten_message(self, ring: ShmRing) -> None:
+        for i in range(6):
+            ring.write(bytes([i]))
+
+        assert (ring.oldest_seq, ring.latest_seq) == (3, 6)
+        with pytest.raises(actchain.exceptions.OverrunError):
+            ring.read(2)
+        assert ring.read(3) == bytes([2])
+
+    def test_rejects_too_large_message(self, ring: ShmRing) -> None:
+        with pytest.raises(ValueError):
+            ring.write(b"x" * 17)
+
+
+class TestShmBroadcast:
+    @pytest.mark.asyncio
+    async def test_broadcasts_to_loops(self, shm_name: str) -> None:
+        chain = actchain.ShmBroadcastChain(
+            "broadcast", shm_name, slots=8, serializer=JsonSerializer()
+        )
+        task = asyncio.create_task(chain.run())
+        await asyncio.sleep(0)
+
+        loops = [
+            actchain.ShmBroadcastLoop(
+                shm_name, serializer=JsonSerializer(), start="earliest"
+            )
+            for _ in range(2)
+        ]
+        readers = [loop.loop() for loop in loops]
+        for i in range(3):
+            chain.trigger(chain.to_event({"n": i}))
+        await asyncio.sleep(0.01)
+
+        for reader in readers:
+            assert [await anext(reader) for _ in range(3)] == [
+                {"n": 0},
+                {"n": 1},
+                {"n": 2},
+            ]
+            await reader.aclose()
+
+        task.cancel()
+        chain.close()
+
+    @pytest.mark.asyncio
+    async def test_skips_overwritten_data(self, shm_name: str) -> None:
+        chain = actchain.ShmBroadcastChain("broadcast", shm_name, slots=4)
+        task = asyncio.create_task(chain.run())
+        loop = actchain.ShmBroadcastLoop(shm_name, start="earliest")
+        reader = loop.loop()
+        await asyncio.sleep(0)
+
+        chain.trigger(chain.to_event({"n": 0}))
+        await asyncio.sleep(0.01)
+        assert await anext(reader) == {"n": 0}
+
+        for i in range(1, 10):
+            chain.trigger(chain.to_event({"n": i}))
+        await asyncio.sleep(0.01)
+
+        # 遅れた読み手は残っている最も古いデータから読み直す
+        assert await anext(reader) == {"n": 6}
+        assert loop.lost == 5
+
+        await reader.aclose()
+        task.cancel()
+        chain.close()
+
+    @pytest.mark.asyncio
+    async def test_raises_on_overrun_if_configured(self, shm_name: str) -> None:
+        ring = ShmRing.create(shm_name, slots=2, slot_size=64)
+        loop = actchain.ShmBroadcastLoop(
+            shm_name, serializer=JsonSerializer(), start="earliest", on_overrun="raise"
+        )
+        for i in range(4):
+            ring.write(JsonSerializer().dumps(i))
+
+        reader = loop.loop()
+        assert await anext(reader) == 2
+        ring.write(b"")
+        ring.write(b"")
+        with pytest.raises(actchain.exceptions.OverrunError):
+            await anext(reader)
+        ring.close()
+
+    @pytest.mark.asyncio
+    async def test_drops_oversized_data(
+        self, shm_name: str, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        chain = actchain.ShmBroadcastChain(
+            "broadcast", shm_name, slot_size=32, serializer=JsonSerializer()
+        )
+        spy_emit = mocker.spy(chain, "emit")
+        task = asyncio.create_task(chain.run())
+        loop = actchain.ShmBroadcastLoop(
+            shm_name, serializer=JsonSerializer(), start="earliest"
+        )
+        reader = loop.loop()
+        await asyncio.sleep(0)
+
+        chain.trigger(chain.to_event({"n": "x" * 64}))
+        chain.trigger(chain.to_event({"n": 1}))
+        await asyncio.sleep(0.01)
+
+        # 大きすぎるデータはリングに書かずに数え、chainは止まらない
+        assert await anext(reader) == {"n": 1}
+        assert chain.oversized == 1
+        assert chain.metrics()["broadcast"]["dropped"] == 1
+        assert [c[0][0] for c in spy_emit.call_args_list] == [{"n": "x" * 64}, {"n": 1}]
+
+        await reader.aclose()
+        task.cancel()
+        chain.close()
+
+    @pytest.mark.asyncio
+    async def test_backs_off_polling_after_spin(
+        self, ring: ShmRing, shm_name: str, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        loop = actchain.ShmBroadcastLoop(shm_name, spin=0.005, poll_interval=0.001)
+        spy_sleep = mocker.spy(asyncio, "sleep")
+
+        async def read() -> Any:
+            return await anext(loop.loop())
+
+        reader = asyncio.create_task(read())
+        await asyncio.sleep(0.03)
+        ring.write(JsonSerializer().dumps(None))
+        reader.cancel()
+
+        delays = [c[0][0] for c in spy_sleep.call_args_list if c[0][0] != 0.03]
+        # 最初はイベントループの1周ごとに確認し、その後は待ち時間を倍にしていく
+        assert delays[0] == 0
+        backoff = [d for d in delays if d > 0]
+        assert backoff[:3] == pytest.approx([1e-5, 2e-5, 4e-5])
+        assert max(backoff) == 0.001
+
+    @pytest.mark.asyncio
+    async def test_reads_from_other_process(self, shm_name: str) -> None:
+        chain = actchain.ShmBroadcastChain("broadcast", shm_name)
+        task = asyncio.create_task(chain.run())
+        await asyncio.sleep(0)
+        for i in range(3):
+            chain.trigger(chain.to_event({"n": i}))
+        await asyncio.sleep(0.01)
+
+        queue = multiprocessing.get_context("spawn").Queue()
+        process = multiprocessing.get_context("spawn").Process(
+            target=read_in_child, args=(shm_name, 3, queue)
+        )
+        process.start()
+        items = await asyncio.get_running_loop().run_in_executor(
+            None, queue.get, True, 10
+        )
+        process.join()
+
+        assert [item["n"] for item in items] == [0, 1, 2]
+        task.cancel()
+        chain.close()
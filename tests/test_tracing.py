@@ -0,0 +1,137 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+import actchain
+from actchain import tracing
+from actchain.eventlog import EventLogWriter
+
+
+@pytest.fixture
+def trace_path(tmp_path: Path) -> Iterator[Path]:
+    path = tmp_path / "trace.json"
+    yield path
+    tracing.configure(None)
+
+
+def load_spans(path: Path) -> list[dict]:
+    # 末尾のカンマと閉じ括弧を補って読む
+    return json.loads(path.read_text().rstrip().rstrip(",") + "]")
+
+
+def test_untraced_by_default() -> None:
+    c = actchain.Function[Any, Any](lambda e: e.data).as_chain("c")
+
+    assert c.to_event(1).trace_id == 0
+
+
+@pytest.mark.asyncio
+async def test_records_spans_along_the_chain(trace_path: Path) -> None:
+    tracing.configure(str(trace_path))
+    c1 = actchain.Function[Any, Any](lambda e: e.data).as_chain("c1")
+    c2 = actchain.Function[Any, Any](lambda e: e.data + 1).as_chain("c2")
+    c1.chain(c2)
+
+    root = c1.to_event(1)
+    c1.trigger(root)
+    await c1._process_event()
+    await c2._process_event()
+    tracing.configure(None)
+
+    assert root.trace_id == 1
+    assert c1.last_emit_event is not None and c2.last_emit_event is not None
+    # 子のイベントはトレースを引き継ぐ
+    assert c1.last_emit_event.trace_id == root.trace_id
+    assert c2.last_emit_event.trace_id == root.trace_id
+
+    spans = load_spans(trace_path)
+    assert [(s["name"], s["ph"]) for s in spans] == [
+        ("c1", "b"),
+        ("c1", "e"),
+        ("c2", "b"),
+        ("c2", "e"),
+    ]
+    assert {s["id"] for s in spans} == {root.trace_id}
+    # c1#1はtriggerしたイベント、c1#2はc1がemitしたイベント
+    assert spans[0]["args"]["event"] == "c1#1"
+    assert spans[0]["args"]["parent"] is None
+    assert spans[2]["args"]["event"] == "c1#2"
+    assert spans[2]["args"]["parent"] == "c1#1"
+
+
+@pytest.mark.asyncio
+async def test_junction_links_other_inputs(trace_path: Path) -> None:
+    tracing.configure(str(trace_path))
+    c1 = actchain.Function[Any, Any](lambda e: e.data).as_chain("c1")
+    c2 = actchain.Function[Any, Any](lambda e: e.data).as_chain("c2")
+    junction = actchain.JunctionChain("junction")
+    c1.chain(junction)
+    c2.chain(junction)
+
+    for c in (c1, c2):
+        c.trigger(c.to_event(1))
+        await c._process_event()
+    await junction._process_event()
+    await junction._process_event()
+    tracing.configure(None)
+
+    begins = [s for s in load_spans(trace_path) if s["ph"] == "b"]
+    assert begins[-1]["name"] == "junction"
+    assert begins[-1]["args"]["links"] == ["c1#2"]
+
+
+def test_sample_rate_zero_disables_tracing(trace_path: Path) -> None:
+    tracing.configure(str(trace_path), sample_rate=0.0)
+    c = actchain.Function[Any, Any](lambda e: e.data).as_chain("c")
+
+    assert c.to_event(1).trace_id == 0
+
+
+def test_invalid_sample_rate(trace_path: Path) -> None:
+    with pytest.raises(ValueError):
+        tracing.Tracer(str(trace_path), sample_rate=1.5)
+
+
+def test_measures_queue_wait_with_clock(trace_path: Path) -> None:
+    async def main() -> None:
+        tracing.configure(str(trace_path))
+        c = actchain.Function[Any, Any](lambda e: e.data).as_chain("c")
+        c.trigger(c.to_event(1))
+        await asyncio.sleep(5)
+        await c._process_event()
+        tracing.configure(None)
+
+    actchain.clock.run_virtual(main())
+
+    # 仮想時間で5秒待ったことになる
+    spans = load_spans(trace_path)
+    assert spans[0]["args"]["queue_wait_us"] == pytest.approx(5e6)
+    assert spans[1]["ts"] - spans[0]["ts"] == pytest.approx(0)
+
+
+@pytest.mark.asyncio
+async def test_traces_replayed_events(tmp_path: Path, trace_path: Path) -> None:
+    writer = EventLogWriter(tmp_path / "log", fsync="never")
+    for i in range(2):
+        writer.append("source", i + 1, i)
+    writer.close()
+    tracing.configure(str(trace_path))
+    replay = actchain.ReplayLoop(tmp_path / "log", speed=None).as_chain("replay")
+    c = actchain.Function[Any, Any](lambda e: e.data).as_chain("c")
+    replay.chain(c)
+
+    await replay.run()
+    await c._process_event()
+    await c._process_event()
+    tracing.configure(None)
+
+    # 再生したイベントもそれぞれトレースの起点になる
+    begins = [s for s in load_spans(trace_path) if s["ph"] == "b"]
+    assert [(s["name"], s["args"]["event"]) for s in begins] == [
+        ("c", "source#1"),
+        ("c", "source#2"),
+    ]
+    assert len({s["id"] for s in begins}) == 2